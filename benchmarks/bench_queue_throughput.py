@@ -0,0 +1,78 @@
+"""
+操作队列吞吐量基准测试
+
+不执行实际文件操作 (执行器直接返回成功)，只测量队列自身的开销:
+  - 入队: add_batch_operations 每秒可加入的操作数
+  - 状态查询: 队列中有大量操作时 get_status / get_next_operations 的耗时
+  - 执行: 工作线程每秒可完成的操作数 (包括状态信号)
+
+用法:
+    python benchmarks/bench_queue_throughput.py [--ops 500000] [--dirs 5000] [--workers 3]
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.operation_queue import operation_queue, OperationType
+
+
+def build_operations(count: int, dirs: int) -> list:
+    """生成删除操作 (分布在多个目录中，路径互不冲突)"""
+    return [
+        {
+            "op_type": OperationType.DELETE_FILE,
+            "source": os.path.join(os.sep, "bench", f"dir_{i % dirs:05d}", f"file_{i:07d}"),
+            "task_id": f"task_{i % 4}",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(func, repeat: int = 1) -> float:
+    """平均耗时 (秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="操作队列吞吐量基准测试")
+    parser.add_argument("--ops", type=int, default=500000, help="操作数量")
+    parser.add_argument("--dirs", type=int, default=5000, help="目录数量")
+    parser.add_argument("--workers", type=int, default=3, help="工作线程数")
+    args = parser.parse_args()
+
+    operation_queue.set_executor(lambda op: (True, ""))
+    operation_queue.configure(args.workers)
+    operation_queue.pause()
+    try:
+        operations = build_operations(args.ops, args.dirs)
+        enqueue = timed(lambda: operation_queue.add_batch_operations(operations))
+        status = timed(operation_queue.get_status, repeat=100)
+        preview = timed(operation_queue.get_next_operations, repeat=100)
+
+        start = time.perf_counter()
+        operation_queue.resume()
+        while True:
+            current = operation_queue.get_status()
+            if current["pending"] == 0 and current["running"] == 0:
+                break
+            time.sleep(0.01)
+        drain = time.perf_counter() - start
+
+        print(f"{args.ops} 个操作, {args.dirs} 个目录, {args.workers} 个工作线程")
+        print(f"{'入队':<12}{enqueue:>10.2f} s{args.ops / enqueue:>12.0f} 操作/秒")
+        print(f"{'状态查询':<12}{status * 1000:>10.3f} ms")
+        print(f"{'操作预览':<12}{preview * 1000:>10.3f} ms")
+        print(f"{'执行':<12}{drain:>10.2f} s{args.ops / drain:>12.0f} 操作/秒")
+    finally:
+        operation_queue.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+小文件复制吞吐量基准测试
+
+对比两种入队方式下操作队列复制大量小文件的速度 (文件/秒):
+  - 逐个文件: 每个文件调用一次 add_operation，生成一个操作并单独执行 (原有路径)
+  - 批量: 调用 add_batch_operations，小文件被打包为批量操作，目录创建在批次内缓存
+
+用法:
+    python benchmarks/bench_small_files.py [--files 20000] [--size 2048] [--dirs 200] [--targets 1]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.operation_queue import operation_queue, OperationType
+
+
+def create_files(root: str, count: int, size: int, dirs: int) -> list:
+    """创建测试文件 (平均分布在多个子目录中)，返回相对路径列表"""
+    rel_paths = []
+    data = os.urandom(size)
+    for i in range(count):
+        rel_dir = f"dir_{i % dirs:04d}"
+        os.makedirs(os.path.join(root, rel_dir), exist_ok=True)
+        rel_path = os.path.join(rel_dir, f"file_{i:06d}.bin")
+        with open(os.path.join(root, rel_path), "wb") as f:
+            f.write(data)
+        rel_paths.append(rel_path)
+    return rel_paths
+
+
+def wait_until_drained():
+    """等待队列中的操作全部完成"""
+    while True:
+        status = operation_queue.get_status()
+        if status["pending"] == 0 and status["current_op"] is None:
+            return
+        time.sleep(0.005)
+
+
+def run(source: str, target_roots: list, rel_paths: list, batched: bool) -> float:
+    start = time.perf_counter()
+    if batched:
+        operation_queue.add_batch_operations([
+            {
+                "op_type": OperationType.COPY_FILE,
+                "source": os.path.join(source, rel_path),
+                "target": os.path.join(target_root, rel_path),
+            }
+            for rel_path in rel_paths for target_root in target_roots
+        ])
+    else:
+        for rel_path in rel_paths:
+            for target_root in target_roots:
+                operation_queue.add_operation(OperationType.COPY_FILE, os.path.join(source, rel_path),
+                                              os.path.join(target_root, rel_path))
+    wait_until_drained()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="小文件复制吞吐量基准测试")
+    parser.add_argument("--files", type=int, default=20000, help="测试文件数量")
+    parser.add_argument("--size", type=int, default=2048, help="单个文件大小 (字节)")
+    parser.add_argument("--dirs", type=int, default=200, help="子目录数量")
+    parser.add_argument("--targets", type=int, default=1, help="目标目录数量")
+    args = parser.parse_args()
+    
+    root = tempfile.mkdtemp(prefix="sfbs_bench_small_")
+    try:
+        source = os.path.join(root, "source")
+        rel_paths = create_files(source, args.files, args.size, args.dirs)
+        
+        print(f"{args.files} 个文件 x {args.size} 字节, {args.dirs} 个目录, {args.targets} 个目标")
+        print(f"{'方式':<16}{'耗时(s)':>10}{'文件/秒':>12}")
+        for label, batched in (("逐个文件", False), ("批量", True)):
+            target_roots = [os.path.join(root, f"{'batch' if batched else 'single'}_{i}")
+                            for i in range(args.targets)]
+            elapsed = run(source, target_roots, rel_paths, batched)
+            copied = args.files * args.targets
+            print(f"{label:<16}{elapsed:>10.2f}{copied / elapsed:>12.0f}")
+    finally:
+        operation_queue.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from utils.file_utils import (
     generate_versioned_filename, format_file_size
 )
 from utils.logger import logger
+from .hash_cache import hash_cache
 
 
 @dataclass
@@ -34,16 +35,19 @@ class ConflictHandler:
     """
     
     def __init__(self, strategy: ConflictStrategy = ConflictStrategy.NEWEST_WINS,
-                 user_callback: Callable[[ConflictInfo], ConflictStrategy] = None):
+                 user_callback: Callable[[ConflictInfo], ConflictStrategy] = None,
+                 compare_method: str = "mtime"):
         """
         初始化冲突处理器
         
         Args:
             strategy: 默认冲突处理策略
             user_callback: 用户决策回调 (用于ASK_USER策略)
+            compare_method: 比较方式 (mtime, hash, fingerprint)
         """
         self.strategy = strategy
         self.user_callback = user_callback
+        self.compare_method = compare_method
     
     def get_conflict_info(self, source_path: str, target_path: str) -> ConflictInfo:
         """获取冲突详细信息"""
@@ -70,23 +74,37 @@ class ConflictHandler:
         Returns:
             True表示存在冲突
         """
-        if not os.path.exists(target_path):
+        try:
+            target_stat = os.stat(target_path)
+            source_stat = os.stat(source_path)
+        except OSError:
             return False
         
-        if not os.path.exists(source_path):
+        # 时间和大小都相同,认为无冲突
+        if (source_stat.st_mtime_ns == target_stat.st_mtime_ns and
+                source_stat.st_size == target_stat.st_size):
             return False
         
-        # 检查文件是否相同
-        source_mtime = get_file_mtime(source_path)
-        target_mtime = get_file_mtime(target_path)
-        source_size = get_file_size(source_path)
-        target_size = get_file_size(target_path)
+        return not self.same_content(source_path, target_path, source_stat, target_stat)
         
-        # 时间和大小都相同,认为无冲突
-        if source_mtime == target_mtime and source_size == target_size:
-            return False
+    def same_content(self, source_path: str, target_path: str,
+                     source_stat: os.stat_result, target_stat: os.stat_result) -> bool:
+        """
+        大小相同但修改时间不同时，按比较方式判断内容是否一致 (使用哈希缓存)
         
-        return True
+        hash: 比较完整哈希；fingerprint: 先比较快速指纹，指纹相同才比较完整哈希。
+        mtime 方式下不读取内容，始终返回 False。
+        """
+        if source_stat.st_size != target_stat.st_size:
+            return False
+        if self.compare_method == "fingerprint":
+            source_fingerprint = hash_cache.get_fingerprint(source_path, st=source_stat)
+            if not source_fingerprint or source_fingerprint != hash_cache.get_fingerprint(target_path, st=target_stat):
+                return False
+        elif self.compare_method != "hash":
+            return False
+        source_hash = hash_cache.get_hash(source_path, st=source_stat)
+        return bool(source_hash) and source_hash == hash_cache.get_hash(target_path, st=target_stat)
     
     def resolve(self, source_path: str, target_path: str,
                 strategy: ConflictStrategy = None) -> Tuple[str, Optional[str], str]:
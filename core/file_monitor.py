@@ -20,6 +20,8 @@ from watchdog.events import (
 
 from utils.constants import FileEventType, FileEvent
 from utils.logger import logger
+from utils.path_filter import PathFilter
+from .scanner import Scanner, ScanEntry, ScanBaseline, SCAN_MODE_FULL, SCAN_MODE_STAT
 
 
 class DebouncedEventHandler(FileSystemEventHandler):
@@ -32,29 +34,45 @@ class DebouncedEventHandler(FileSystemEventHandler):
                  debounce_seconds: float = 1.0,
                  ignore_hidden: bool = True,
                  include_patterns: List[str] = None,
-                 exclude_patterns: List[str] = None):
+                 exclude_patterns: List[str] = None,
+                 path_filter: Optional[PathFilter] = None,
+                 root_path: str = None):
         super().__init__()
         self.callback = callback
         self.debounce_seconds = debounce_seconds
         self.ignore_hidden = ignore_hidden
-        self.include_patterns = include_patterns or []
-        self.exclude_patterns = exclude_patterns or []
+        if path_filter is None:
+            path_filter = PathFilter(include_patterns, exclude_patterns)
+        self.path_filter = path_filter.with_root(root_path) if root_path else path_filter
         
         self._pending_events: Dict[str, FileEvent] = {}
         self._lock = threading.Lock()
         self._timer: Optional[threading.Timer] = None
         self._processed_paths: Set[str] = set()
     
-    def _should_ignore(self, path: str) -> bool:
+    @property
+    def include_patterns(self) -> List[str]:
+        return self.path_filter.include_patterns
+        
+    @property
+    def exclude_patterns(self) -> List[str]:
+        return self.path_filter.exclude_patterns
+        
+    def set_filter(self, path_filter: PathFilter):
+        """替换过滤器 (保持当前根目录)"""
+        root_path = self.path_filter.root_path
+        self.path_filter = path_filter.with_root(root_path) if root_path else path_filter
+        
+    def _should_ignore(self, path: str, is_directory: bool = False) -> bool:
         """检查是否应该忽略该路径"""
-        from utils.file_utils import is_hidden_file, match_file_patterns
+        from utils.file_utils import is_hidden_file
         
         # 忽略隐藏文件
         if self.ignore_hidden and is_hidden_file(path):
             return True
         
         # 检查文件过滤
-        if not match_file_patterns(path, self.include_patterns, self.exclude_patterns):
+        if not self.path_filter.match(path, is_directory):
             return True
         
         return False
@@ -81,7 +99,7 @@ class DebouncedEventHandler(FileSystemEventHandler):
     
     def _add_event(self, event: FileEvent):
         """添加事件到待处理队列"""
-        if self._should_ignore(event.src_path):
+        if self._should_ignore(event.src_path, event.is_directory):
             return
         
         with self._lock:
@@ -146,7 +164,8 @@ class FileMonitor:
                  debounce_seconds: float = 1.0,
                  ignore_hidden: bool = True,
                  include_patterns: List[str] = None,
-                 exclude_patterns: List[str] = None):
+                 exclude_patterns: List[str] = None,
+                 path_filter: Optional[PathFilter] = None):
         """
         初始化文件监控器
         
@@ -158,6 +177,7 @@ class FileMonitor:
             ignore_hidden: 是否忽略隐藏文件
             include_patterns: 包含文件模式
             exclude_patterns: 排除文件模式
+            path_filter: 预编译的过滤器 (提供时忽略 include/exclude 参数)
         """
         self.path = os.path.abspath(path)
         self.callback = callback
@@ -169,7 +189,9 @@ class FileMonitor:
             debounce_seconds=debounce_seconds,
             ignore_hidden=ignore_hidden,
             include_patterns=include_patterns,
-            exclude_patterns=exclude_patterns
+            exclude_patterns=exclude_patterns,
+            path_filter=path_filter,
+            root_path=self.path
         )
         self._running = False
     
@@ -221,10 +243,12 @@ class FileMonitor:
     def update_filters(self, include_patterns: List[str] = None,
                        exclude_patterns: List[str] = None):
         """更新过滤规则"""
-        if include_patterns is not None:
-            self._event_handler.include_patterns = include_patterns
-        if exclude_patterns is not None:
-            self._event_handler.exclude_patterns = exclude_patterns
+        handler = self._event_handler
+        if include_patterns is None:
+            include_patterns = handler.include_patterns
+        if exclude_patterns is None:
+            exclude_patterns = handler.exclude_patterns
+        handler.set_filter(PathFilter(include_patterns, exclude_patterns))
 
 
 class MultiPathMonitor:
@@ -277,7 +301,12 @@ class PollingMonitor:
                  interval: int = 5,
                  recursive: bool = True,
                  include_patterns: List[str] = None,
-                 exclude_patterns: List[str] = None):
+                 exclude_patterns: List[str] = None,
+                 path_filter: Optional[PathFilter] = None,
+                 scan_workers: int = 1,
+                 metadata_index=None,
+                 task_id: str = "",
+                 scan_mode: str = SCAN_MODE_STAT):
         """
         初始化轮询监控器
         
@@ -288,31 +317,47 @@ class PollingMonitor:
             recursive: 是否递归监控子目录
             include_patterns: 包含文件模式
             exclude_patterns: 排除文件模式
+            path_filter: 预编译的过滤器 (提供时忽略 include/exclude 参数)
+            scan_workers: 目录扫描并行线程数
+            metadata_index: 元数据索引 (提供时启动扫描保存为源快照，之后的变化增量写入)
+            task_id: 任务ID
+            scan_mode: 增量扫描模式 (每次轮询以上一次的结果为基准，只重新列出变化的目录)
         """
         self.path = os.path.abspath(path)
         self.callback = callback
         self.interval = interval
+        self.scan_workers = scan_workers
+        self.metadata_index = metadata_index
+        self.task_id = task_id
+        self.scan_mode = scan_mode
         self.recursive = recursive
-        self.include_patterns = include_patterns or []
-        self.exclude_patterns = exclude_patterns or []
+        if path_filter is None:
+            path_filter = PathFilter(include_patterns, exclude_patterns)
+        self.path_filter = path_filter.with_root(self.path)
+        self.include_patterns = self.path_filter.include_patterns
+        self.exclude_patterns = self.path_filter.exclude_patterns
         
         self._running = False
         self._thread: Optional[threading.Thread] = None
-        self._file_states: Dict[str, float] = {}  # path -> mtime
+        self._file_states: Dict[str, ScanEntry] = {}  # path -> 扫描记录
+        self._baseline: Optional[ScanBaseline] = None  # 上一次扫描结果 (增量扫描基准)
+        self._last_scanner: Optional[Scanner] = None
     
-    def _scan_files(self) -> Dict[str, float]:
+    def _scan_files(self) -> Dict[str, ScanEntry]:
         """扫描目录获取文件状态"""
-        from utils.file_utils import scan_directory, match_file_patterns
-        
         file_states = {}
+        incremental = self.scan_mode != SCAN_MODE_FULL
         try:
-            files = scan_directory(self.path)
-            for file_path in files:
-                if match_file_patterns(file_path, self.include_patterns, self.exclude_patterns):
-                    try:
-                        file_states[file_path] = os.path.getmtime(file_path)
-                    except OSError:
-                        pass
+            # 扫描时已带回 mtime，无需逐个再次 stat
+            scanner = Scanner(self.path, path_filter=self.path_filter, workers=self.scan_workers,
+                              baseline=self._baseline, mode=self.scan_mode, track_dirs=incremental)
+            entries = {}
+            for entry in scanner.iter_entries():
+                entries[entry.rel_path] = entry
+                file_states[os.path.join(self.path, entry.rel_path)] = entry
+            if incremental:
+                self._baseline = scanner.get_baseline(entries)
+            self._last_scanner = scanner
         except Exception as e:
             logger.error(f"轮询扫描失败: {e}", category="monitor")
         return file_states
@@ -324,21 +369,26 @@ class PollingMonitor:
                 current_states = self._scan_files()
                 
                 # 检测新增和修改的文件
-                for path, mtime in current_states.items():
-                    if path not in self._file_states:
+                for path, entry in current_states.items():
+                    previous = self._file_states.get(path)
+                    if previous is None:
                         # 新文件
                         self.callback(FileEvent(
                             event_type=FileEventType.CREATED,
                             src_path=path,
                             is_directory=False
                         ))
-                    elif self._file_states[path] != mtime:
+                    elif previous.mtime_ns != entry.mtime_ns:
                         # 修改的文件
                         self.callback(FileEvent(
                             event_type=FileEventType.MODIFIED,
                             src_path=path,
                             is_directory=False
                         ))
+                    else:
+                        continue
+                    if self.metadata_index is not None:
+                        self.metadata_index.record(self.task_id, self.path, entry)
                 
                 # 检测删除的文件
                 for path in self._file_states:
@@ -348,6 +398,8 @@ class PollingMonitor:
                             src_path=path,
                             is_directory=False
                         ))
+                        if self.metadata_index is not None:
+                            self.metadata_index.forget(self.task_id, self.path, path)
                 
                 self._file_states = current_states
                 
@@ -366,8 +418,25 @@ class PollingMonitor:
             logger.error(f"轮询路径不存在: {self.path}", category="monitor")
             return False
         
-        # 初始化文件状态
+        # 初始化文件状态 (有索引时以上次保存的快照为基准)
+        previous = None
+        if self.metadata_index is not None and self.scan_mode != SCAN_MODE_FULL:
+            try:
+                self._baseline = previous = self.metadata_index.load_baseline(
+                    self.task_id, self.path, self.path_filter.signature)
+            except Exception as e:
+                logger.warning(f"读取轮询快照失败: {e}", category="monitor")
         self._file_states = self._scan_files()
+        if self.metadata_index is not None:
+            try:
+                self.metadata_index.save_snapshot(self.task_id, self.path, self._file_states.values(),
+                                                  previous=previous.files if previous else None)
+                scanner = self._last_scanner
+                if scanner is not None and scanner.track_dirs:
+                    self.metadata_index.save_dirs(self.task_id, self.path, scanner.dir_mtimes,
+                                                  scanner.started_at, self.path_filter.signature)
+            except Exception as e:
+                logger.warning(f"保存轮询快照失败: {e}", category="monitor")
         
         self._running = True
         self._thread = threading.Thread(target=self._poll_loop, daemon=True)
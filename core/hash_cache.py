@@ -0,0 +1,204 @@
+"""
+内容哈希缓存模块
+按 (设备, inode, 大小, 修改时间) 缓存文件哈希，文件未变化时不再重新读取内容
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from utils.file_utils import get_file_hash, get_file_fingerprint, available_hash_algorithms
+from utils.logger import logger
+from .metadata_index import metadata_index, HashKey
+
+
+# 默认哈希算法 (与 get_file_hash 一致)
+DEFAULT_HASH_ALGORITHM = "md5"
+
+# 快速指纹在缓存键中的算法前缀 (与完整哈希分开缓存)
+FINGERPRINT_PREFIX = "fp-"
+
+# 内存中保留的最近使用记录数
+_MEMORY_ENTRIES = 4096
+
+# 缓冲的写入达到该数量或超过该时间后写入数据库
+_FLUSH_THRESHOLD = 200
+_FLUSH_INTERVAL = 5.0
+
+
+class HashCache:
+    """内容哈希缓存 - 单例模式 (内存 LRU + 索引库持久化)"""
+    
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+        
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        
+        self.max_entries = 100000
+        self.algorithm = DEFAULT_HASH_ALGORITHM
+        self._memory: "OrderedDict[HashKey, str]" = OrderedDict()
+        # 待写入的记录 (新哈希或刷新使用时间): 键 -> (哈希, 使用时间)
+        self._pending: Dict[HashKey, Tuple[str, float]] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+    def configure(self, max_entries: int, algorithm: Optional[str] = None):
+        """
+        配置缓存
+        
+        Args:
+            max_entries: 持久化缓存的记录上限 (超出时淘汰最久未使用的记录)
+            algorithm: 默认哈希算法 (不可用时保持原设置)
+        """
+        self.max_entries = max(0, int(max_entries))
+        if algorithm:
+            if algorithm in available_hash_algorithms():
+                self.algorithm = algorithm
+            else:
+                logger.warning(f"[HashCache] Unsupported hash algorithm {algorithm}, "
+                               f"using {self.algorithm}", category="hash")
+        
+    @staticmethod
+    def make_key(st: os.stat_result, algorithm: str) -> HashKey:
+        """由 stat 结果构造缓存键"""
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, algorithm)
+        
+    def lookup(self, key: HashKey) -> Optional[str]:
+        """查询缓存 (不读取文件)"""
+        with self._lock:
+            digest = self._memory.get(key)
+            if digest is not None:
+                self._memory.move_to_end(key)
+                self._touch(key, digest)
+                self.hits += 1
+                return digest
+        try:
+            digest = metadata_index.get_hash(key)
+        except Exception as e:
+            logger.warning(f"[HashCache] Lookup failed: {e}", category="hash")
+            digest = None
+        with self._lock:
+            if digest is not None:
+                self._remember(key, digest)
+                self._touch(key, digest)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return digest
+        
+    def store(self, key: HashKey, digest: str):
+        """记录新计算的哈希"""
+        with self._lock:
+            self._remember(key, digest)
+            self._touch(key, digest)
+            
+    def store_if_unchanged(self, filepath: str, key: HashKey, digest: str):
+        """记录计算完成的哈希 (计算期间文件被修改时哈希不对应缓存键，不缓存)"""
+        if not digest:
+            return
+        try:
+            after = os.stat(filepath)
+        except OSError:
+            return
+        if self.make_key(after, key[-1]) == key:
+            self.store(key, digest)
+            
+    def get_hash(self, filepath: str, algorithm: Optional[str] = None,
+                 st: Optional[os.stat_result] = None) -> str:
+        """
+        获取文件哈希 (优先使用缓存)
+        
+        Args:
+            filepath: 文件路径
+            algorithm: 哈希算法 (默认使用配置的算法)
+            st: 已获取的 stat 结果 (可选)
+            
+        Returns:
+            文件哈希值，读取失败时返回空字符串
+        """
+        algorithm = algorithm or self.algorithm
+        try:
+            if st is None:
+                st = os.stat(filepath)
+        except OSError:
+            return ""
+        key = self.make_key(st, algorithm)
+        digest = self.lookup(key)
+        if digest is not None:
+            return digest
+            
+        digest = get_file_hash(filepath, algorithm)
+        self.store_if_unchanged(filepath, key, digest)
+        return digest
+        
+    def get_fingerprint(self, filepath: str, st: Optional[os.stat_result] = None) -> str:
+        """
+        获取文件快速指纹 (大小 + 头、中、尾采样哈希，优先使用缓存)
+        
+        Args:
+            filepath: 文件路径
+            st: 已获取的 stat 结果 (可选)
+            
+        Returns:
+            文件指纹，读取失败时返回空字符串
+        """
+        try:
+            if st is None:
+                st = os.stat(filepath)
+        except OSError:
+            return ""
+        key = self.make_key(st, FINGERPRINT_PREFIX + self.algorithm)
+        fingerprint = self.lookup(key)
+        if fingerprint is not None:
+            return fingerprint
+            
+        fingerprint = get_file_fingerprint(filepath, self.algorithm)
+        self.store_if_unchanged(filepath, key, fingerprint)
+        return fingerprint
+        
+    def _remember(self, key: HashKey, digest: str):
+        memory = self._memory
+        memory[key] = digest
+        memory.move_to_end(key)
+        while len(memory) > _MEMORY_ENTRIES:
+            memory.popitem(last=False)
+            
+    def _touch(self, key: HashKey, digest: str):
+        """记录使用时间 (缓冲写入，用于持久化的 LRU 淘汰)"""
+        self._pending[key] = (digest, time.time())
+        if (len(self._pending) >= _FLUSH_THRESHOLD or
+                time.monotonic() - self._last_flush >= _FLUSH_INTERVAL):
+            self._flush_locked()
+            
+    def flush(self):
+        """将缓冲的记录写入数据库"""
+        with self._lock:
+            self._flush_locked()
+            
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        records: List[Tuple[HashKey, str, float]] = [
+            (key, digest, last_used) for key, (digest, last_used) in self._pending.items()
+        ]
+        self._pending = {}
+        try:
+            metadata_index.put_hashes(records, self.max_entries)
+        except Exception as e:
+            logger.error(f"[HashCache] Flush failed: {e}", category="hash")
+
+
+# 全局实例
+hash_cache = HashCache()
@@ -0,0 +1,154 @@
+"""
+文件哈希服务模块
+批量计算文件哈希: 先查询哈希缓存，未命中的文件交给进程池并行计算
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.file_utils import get_file_hash
+from utils.logger import logger
+from .hash_cache import hash_cache
+from .metadata_index import HashKey
+
+
+# 小于该大小的文件跨进程传递的开销高于计算本身，在调用线程中直接计算
+_INLINE_SIZE = 256 * 1024
+
+# 自动设置时的最大进程数
+_MAX_AUTO_WORKERS = 8
+
+
+class HashService:
+    """文件哈希服务 - 单例模式 (进程池按需创建)"""
+    
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+        
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        
+        self.workers = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        
+    def configure(self, workers: int):
+        """
+        设置哈希进程数
+        
+        Args:
+            workers: 进程数 (0 表示按 CPU 核数自动设置，1 表示不使用进程池)
+        """
+        workers = max(0, int(workers))
+        with self._lock:
+            if workers != self.workers:
+                self._shutdown_locked()
+            self.workers = workers
+            
+    @property
+    def effective_workers(self) -> int:
+        """实际使用的进程数"""
+        if self.workers > 0:
+            return self.workers
+        return max(1, min(os.cpu_count() or 1, _MAX_AUTO_WORKERS))
+        
+    def hash_files(self, paths: Iterable[str], algorithm: Optional[str] = None) -> Dict[str, str]:
+        """
+        批量获取文件哈希 (优先使用缓存)
+        
+        Args:
+            paths: 文件路径
+            algorithm: 哈希算法 (默认使用哈希缓存配置的算法)
+            
+        Returns:
+            {文件路径: 哈希值}，无法读取的文件不包含在结果中
+        """
+        algorithm = algorithm or hash_cache.algorithm
+        results: Dict[str, str] = {}
+        pending: List[Tuple[str, HashKey]] = []
+        for path in dict.fromkeys(paths):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            key = hash_cache.make_key(st, algorithm)
+            digest = hash_cache.lookup(key)
+            if digest is not None:
+                results[path] = digest
+            else:
+                pending.append((path, key))
+                
+        if not pending:
+            return results
+            
+        # 大文件交给进程池，小文件在当前线程计算
+        futures = {}
+        large = [(path, key) for path, key in pending if key[2] >= _INLINE_SIZE]
+        pool = self._get_pool() if len(large) > 1 else None
+        if pool is not None:
+            try:
+                for path, key in large:
+                    futures[path] = pool.submit(get_file_hash, path, algorithm)
+            except Exception as e:
+                logger.warning(f"[HashService] Process pool unavailable: {e}", category="hash")
+                self.shutdown()
+                
+        for path, key in pending:
+            if path in futures:
+                continue
+            self._finish(results, path, key, get_file_hash(path, algorithm))
+            
+        for path, key in pending:
+            future = futures.get(path)
+            if future is None:
+                continue
+            try:
+                digest = future.result()
+            except Exception as e:
+                logger.warning(f"[HashService] Worker failed for {path}: {e}", category="hash")
+                digest = get_file_hash(path, algorithm)
+            self._finish(results, path, key, digest)
+        return results
+        
+    def _finish(self, results: Dict[str, str], path: str, key: HashKey, digest: str):
+        if digest:
+            results[path] = digest
+            hash_cache.store_if_unchanged(path, key, digest)
+            
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        workers = self.effective_workers
+        if workers <= 1:
+            return None
+        with self._lock:
+            if self._pool is None:
+                try:
+                    # spawn: 避免在多线程的 GUI 进程中 fork
+                    self._pool = ProcessPoolExecutor(max_workers=workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+                except Exception as e:
+                    logger.warning(f"[HashService] Cannot start process pool: {e}", category="hash")
+                    return None
+            return self._pool
+            
+    def shutdown(self):
+        """关闭进程池 (下次需要时重新创建)"""
+        with self._lock:
+            self._shutdown_locked()
+            
+    def _shutdown_locked(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# 全局实例
+hash_service = HashService()
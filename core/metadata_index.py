@@ -0,0 +1,474 @@
+"""
+元数据索引模块
+按任务持久化源目录和各目标目录的文件快照 (路径、大小、修改时间、inode、可选哈希)，
+全量同步时可与上次已知状态比对，而不必重新扫描程序自己写入的目标目录；
+同时存放按文件身份 (设备、inode、大小、修改时间) 缓存的内容哈希
+"""
+import os
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from peewee import (
+    Proxy, SqliteDatabase, Model, CharField, TextField, FloatField,
+    BigIntegerField, IntegerField, chunked
+)
+
+from utils.constants import DATA_DIR
+from utils.logger import logger
+from .scanner import ScanEntry, ScanBaseline
+
+
+# 索引数据库连接代理 (与日志库 backup.db 分开存放，避免大批量写入相互阻塞)
+index_db_proxy = Proxy()
+
+INDEX_DB_NAME = "index.db"
+# 表结构版本: 索引只是缓存，版本不一致时直接重建
+INDEX_SCHEMA_VERSION = 3
+
+# 缓冲的增量更新达到该数量或超过该时间后写入数据库
+_FLUSH_THRESHOLD = 500
+_FLUSH_INTERVAL = 2.0
+
+
+class IndexRoot(Model):
+    """快照根目录 (每个任务的源目录和每个目标目录各一条)"""
+    task_id = CharField(max_length=50)
+    root = TextField()
+    scanned_at = FloatField(default=0)  # 最近一次完整扫描的时间戳
+    dirs_started_at = FloatField(default=0)  # 记录目录修改时间的那次扫描的开始时间
+    filter_key = CharField(max_length=64, null=True)  # 记录目录时使用的过滤规则摘要
+    
+    class Meta:
+        database = index_db_proxy
+        table_name = "index_roots"
+        indexes = ((("task_id", "root"), True),)
+
+
+class IndexEntry(Model):
+    """快照中的单个文件记录"""
+    root_id = IntegerField()
+    rel_path = TextField()
+    size = BigIntegerField()
+    mtime_ns = BigIntegerField()
+    inode = BigIntegerField(default=0)
+    file_hash = CharField(max_length=128, null=True)
+    
+    class Meta:
+        database = index_db_proxy
+        table_name = "index_entries"
+        indexes = ((("root_id", "rel_path"), True),)
+
+
+class IndexDir(Model):
+    """快照中的目录修改时间 (增量扫描时跳过未变化的目录)"""
+    root_id = IntegerField()
+    rel_dir = TextField()  # "" 为根目录，其余以分隔符结尾
+    mtime_ns = BigIntegerField()
+    
+    class Meta:
+        database = index_db_proxy
+        table_name = "index_dirs"
+        indexes = ((("root_id", "rel_dir"), True),)
+
+
+class HashRecord(Model):
+    """内容哈希缓存 (文件身份未变时哈希必然不变)"""
+    dev = BigIntegerField()
+    inode = BigIntegerField()
+    size = BigIntegerField()
+    mtime_ns = BigIntegerField()
+    algorithm = CharField(max_length=20)
+    digest = CharField(max_length=128)
+    last_used = FloatField()
+    
+    class Meta:
+        database = index_db_proxy
+        table_name = "hash_cache"
+        indexes = (
+            (("dev", "inode", "size", "mtime_ns", "algorithm"), True),
+            (("last_used",), False),
+        )
+
+
+# 哈希缓存键: (dev, inode, size, mtime_ns, algorithm)
+HashKey = Tuple[int, int, int, int, str]
+
+_TABLES = [IndexRoot, IndexEntry, IndexDir, HashRecord]
+
+
+class MetadataIndex:
+    """元数据索引 - 单例模式"""
+    
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+        
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        
+        self._db: Optional[SqliteDatabase] = None
+        self._lock = threading.RLock()
+        self._root_ids: Dict[Tuple[str, str], int] = {}
+        # 待写入的增量更新: (task_id, root) -> {rel_path: ScanEntry 或 None(删除)}
+        self._pending: Dict[Tuple[str, str], Dict[str, Optional[ScanEntry]]] = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        
+    def _ensure_db(self):
+        """首次使用时打开索引数据库"""
+        if self._db is not None:
+            return
+        try:
+            from utils.config_manager import config_manager
+            storage_path = config_manager.get("general.storage_path", DATA_DIR)
+        except Exception:
+            storage_path = DATA_DIR
+        self._setup_database(storage_path)
+        
+    def _setup_database(self, storage_path: str):
+        """初始化数据库"""
+        db_file = os.path.join(storage_path, INDEX_DB_NAME)
+        os.makedirs(storage_path, exist_ok=True)
+        
+        db = SqliteDatabase(db_file, timeout=10, check_same_thread=False, pragmas={
+            "journal_mode": "wal",
+            "synchronous": "normal",  # 索引丢失只会导致重新扫描，无需每次提交都落盘
+        })
+        index_db_proxy.initialize(db)
+        db.connect(reuse_if_open=True)
+        version = db.execute_sql("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_SCHEMA_VERSION:
+            db.drop_tables(_TABLES, safe=True)
+            db.execute_sql(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        db.create_tables(_TABLES, safe=True)
+        self._db = db
+        
+    def update_storage_path(self, new_path: str):
+        """切换存储路径 (旧索引不迁移，下次同步时重新扫描)"""
+        with self._lock:
+            self.flush()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._root_ids.clear()
+            self._setup_database(new_path)
+            
+    def _get_root_id(self, task_id: str, root: str, create: bool = False) -> Optional[int]:
+        """获取根目录记录ID"""
+        key = (task_id, root)
+        root_id = self._root_ids.get(key)
+        if root_id is not None:
+            return root_id
+            
+        row = IndexRoot.get_or_none((IndexRoot.task_id == task_id) & (IndexRoot.root == root))
+        if row is None:
+            if not create:
+                return None
+            row = IndexRoot.create(task_id=task_id, root=root, scanned_at=0)
+        self._root_ids[key] = row.id
+        return row.id
+        
+    def snapshot_age(self, task_id: str, root: str) -> Optional[float]:
+        """
+        获取快照距上次完整扫描的秒数
+        
+        Returns:
+            秒数，没有完整快照时返回 None
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            self._ensure_db()
+            row = IndexRoot.get_or_none((IndexRoot.task_id == task_id) & (IndexRoot.root == root))
+        if row is None or not row.scanned_at:
+            return None
+        return max(0.0, time.time() - row.scanned_at)
+        
+    def load_snapshot(self, task_id: str, root: str) -> Optional[Dict[str, ScanEntry]]:
+        """
+        读取快照
+        
+        Returns:
+            {相对路径: ScanEntry}，没有完整快照时返回 None
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            self._ensure_db()
+            self.flush()
+            row = IndexRoot.get_or_none((IndexRoot.task_id == task_id) & (IndexRoot.root == root))
+            if row is None or not row.scanned_at:
+                return None
+            query = (IndexEntry
+                     .select(IndexEntry.rel_path, IndexEntry.size, IndexEntry.mtime_ns, IndexEntry.inode)
+                     .where(IndexEntry.root_id == row.id)
+                     .tuples())
+            return {rel_path: ScanEntry(rel_path, size, mtime_ns, inode)
+                    for rel_path, size, mtime_ns, inode in query.iterator()}
+                    
+    def load_baseline(self, task_id: str, root: str, filter_key: str = "") -> Optional[ScanBaseline]:
+        """
+        读取快照和目录修改时间，作为增量扫描的基准
+        
+        Args:
+            filter_key: 当前过滤规则摘要，与记录时不一致则不提供目录修改时间 (全部重新列出)
+            
+        Returns:
+            ScanBaseline，没有完整快照时返回 None
+        """
+        files = self.load_snapshot(task_id, root)
+        if files is None:
+            return None
+        root = os.path.abspath(root)
+        with self._lock:
+            row = IndexRoot.get_or_none((IndexRoot.task_id == task_id) & (IndexRoot.root == root))
+            if row is None or not row.dirs_started_at or row.filter_key != filter_key:
+                return ScanBaseline(files)
+            query = (IndexDir
+                     .select(IndexDir.rel_dir, IndexDir.mtime_ns)
+                     .where(IndexDir.root_id == row.id)
+                     .tuples())
+            dirs = dict(query.iterator())
+        return ScanBaseline(files, dirs, row.dirs_started_at)
+        
+    def save_dirs(self, task_id: str, root: str, dir_mtimes: Dict[str, int],
+                  started_at: float, filter_key: str = ""):
+        """记录一次完整扫描得到的目录修改时间"""
+        root = os.path.abspath(root)
+        fields = [IndexDir.root_id, IndexDir.rel_dir, IndexDir.mtime_ns]
+        with self._lock:
+            self._ensure_db()
+            with self._db.atomic():
+                root_id = self._get_root_id(task_id, root, create=True)
+                IndexDir.delete().where(IndexDir.root_id == root_id).execute()
+                rows = ((root_id, rel_dir, mtime_ns) for rel_dir, mtime_ns in dir_mtimes.items())
+                for batch in chunked(rows, 500):
+                    IndexDir.insert_many(batch, fields=fields).execute()
+                IndexRoot.update(dirs_started_at=started_at, filter_key=filter_key).where(
+                    IndexRoot.id == root_id).execute()
+                    
+    def save_snapshot(self, task_id: str, root: str, entries: Iterable[ScanEntry],
+                      previous: Optional[Dict[str, ScanEntry]] = None):
+        """
+        用一次完整扫描的结果替换快照
+        大小和修改时间未变的文件保留已记录的哈希
+        
+        Args:
+            previous: 本次扫描前读取的快照，提供时只写入差异部分
+        """
+        root = os.path.abspath(root)
+        if previous is not None:
+            self._save_snapshot_diff(task_id, root, entries, previous)
+            return
+        start = time.monotonic()
+        count = 0
+        with self._lock:
+            self._ensure_db()
+            self.flush()
+            with self._db.atomic():
+                root_id = self._get_root_id(task_id, root, create=True)
+                hashes = {
+                    rel_path: (size, mtime_ns, file_hash)
+                    for rel_path, size, mtime_ns, file_hash in (
+                        IndexEntry
+                        .select(IndexEntry.rel_path, IndexEntry.size, IndexEntry.mtime_ns, IndexEntry.file_hash)
+                        .where((IndexEntry.root_id == root_id) & IndexEntry.file_hash.is_null(False))
+                        .tuples())
+                }
+                IndexEntry.delete().where(IndexEntry.root_id == root_id).execute()
+                
+                def rows():
+                    nonlocal count
+                    for entry in entries:
+                        count += 1
+                        known = hashes.get(entry.rel_path)
+                        file_hash = known[2] if known and known[:2] == (entry.size, entry.mtime_ns) else None
+                        yield (root_id, entry.rel_path, entry.size, entry.mtime_ns, entry.inode, file_hash)
+                        
+                fields = [IndexEntry.root_id, IndexEntry.rel_path, IndexEntry.size,
+                          IndexEntry.mtime_ns, IndexEntry.inode, IndexEntry.file_hash]
+                for batch in chunked(rows(), 500):
+                    IndexEntry.insert_many(batch, fields=fields).execute()
+                    
+                IndexRoot.update(scanned_at=time.time()).where(IndexRoot.id == root_id).execute()
+                
+        logger.debug(f"[Index] Saved snapshot of {count} files for {root} "
+                     f"in {time.monotonic() - start:.2f}s", category="index")
+                     
+    def _save_snapshot_diff(self, task_id: str, root: str, entries: Iterable[ScanEntry],
+                            previous: Dict[str, ScanEntry]):
+        """只写入与上次快照不同的记录 (未变化的大目录树几乎无需写入)"""
+        current = {entry.rel_path: entry for entry in entries}
+        removed = [rel_path for rel_path in previous if rel_path not in current]
+        changed = {rel_path: entry for rel_path, entry in current.items() if previous.get(rel_path) != entry}
+        with self._lock:
+            self._ensure_db()
+            self.flush()
+            with self._db.atomic():
+                root_id = self._get_root_id(task_id, root, create=True)
+                for batch in chunked(removed, 500):
+                    IndexEntry.delete().where(
+                        (IndexEntry.root_id == root_id) & IndexEntry.rel_path.in_(batch)).execute()
+                self._apply_updates(root_id, changed)
+                IndexRoot.update(scanned_at=time.time()).where(IndexRoot.id == root_id).execute()
+        logger.debug(f"[Index] Updated snapshot of {root}: {len(changed)} changed, "
+                     f"{len(removed)} removed", category="index")
+                     
+    def record(self, task_id: str, root: str, entry: ScanEntry):
+        """记录单个文件的最新状态 (缓冲写入)"""
+        self._queue_update(task_id, root, entry.rel_path, entry)
+        
+    def record_path(self, task_id: str, root: str, path: str) -> bool:
+        """
+        按当前磁盘状态记录单个文件 (复制完成后调用)
+        
+        Returns:
+            是否成功记录
+        """
+        root = os.path.abspath(root)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        rel_path = os.path.relpath(path, root)
+        self._queue_update(task_id, root, rel_path, ScanEntry(rel_path, st.st_size, st.st_mtime_ns, st.st_ino))
+        return True
+        
+    def forget(self, task_id: str, root: str, path: str):
+        """
+        移除文件或目录 (含其下所有文件) 的记录
+        
+        Args:
+            path: 完整路径或相对路径
+        """
+        root = os.path.abspath(root)
+        rel_path = os.path.relpath(path, root) if os.path.isabs(path) else os.path.normpath(path)
+        self._queue_update(task_id, root, rel_path, None)
+        
+    def _queue_update(self, task_id: str, root: str, rel_path: str, entry: Optional[ScanEntry]):
+        """缓冲增量更新，达到数量或时间阈值后批量写入"""
+        with self._lock:
+            self._pending.setdefault((task_id, os.path.abspath(root)), {})[rel_path] = entry
+            self._pending_count += 1
+            if (self._pending_count >= _FLUSH_THRESHOLD or
+                    time.monotonic() - self._last_flush >= _FLUSH_INTERVAL):
+                self.flush()
+                
+    def flush(self):
+        """将缓冲的增量更新写入数据库"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+            try:
+                self._ensure_db()
+                with self._db.atomic():
+                    for (task_id, root), updates in pending.items():
+                        root_id = self._get_root_id(task_id, root)
+                        if root_id is None:
+                            # 尚无完整快照的根目录不记录增量
+                            continue
+                        self._apply_updates(root_id, updates)
+            except Exception as e:
+                logger.error(f"[Index] Flush failed: {e}", category="index")
+                
+    def _apply_updates(self, root_id: int, updates: Dict[str, Optional[ScanEntry]]):
+        upserts = []
+        for rel_path, entry in updates.items():
+            if entry is None:
+                # 删除文件记录，以及作为目录时其下的所有记录
+                # (按二进制排序，"dir/" 开头的路径全部落在 ["dir/", "dir0") 区间内，可走索引)
+                lower = rel_path + os.sep
+                upper = rel_path + chr(ord(os.sep) + 1)
+                IndexEntry.delete().where(
+                    (IndexEntry.root_id == root_id) &
+                    ((IndexEntry.rel_path == rel_path) |
+                     ((IndexEntry.rel_path >= lower) & (IndexEntry.rel_path < upper)))
+                ).execute()
+            else:
+                upserts.append((root_id, entry.rel_path, entry.size, entry.mtime_ns, entry.inode, None))
+                
+        fields = [IndexEntry.root_id, IndexEntry.rel_path, IndexEntry.size,
+                  IndexEntry.mtime_ns, IndexEntry.inode, IndexEntry.file_hash]
+        for batch in chunked(upserts, 500):
+            IndexEntry.insert_many(batch, fields=fields).on_conflict_replace().execute()
+            
+    def get_hash(self, key: HashKey) -> Optional[str]:
+        """查询缓存的内容哈希"""
+        dev, inode, size, mtime_ns, algorithm = key
+        with self._lock:
+            self._ensure_db()
+            row = (HashRecord
+                   .select(HashRecord.digest)
+                   .where((HashRecord.dev == dev) & (HashRecord.inode == inode) &
+                          (HashRecord.size == size) & (HashRecord.mtime_ns == mtime_ns) &
+                          (HashRecord.algorithm == algorithm))
+                   .tuples()
+                   .first())
+        return row[0] if row else None
+        
+    def put_hashes(self, records: List[Tuple[HashKey, str, float]], max_entries: int = 0):
+        """
+        写入 (或刷新使用时间) 一批哈希记录
+        
+        Args:
+            records: [(键, 哈希, 最近使用时间)]
+            max_entries: 缓存上限，超出时淘汰最久未使用的记录 (0 表示不限)
+        """
+        fields = [HashRecord.dev, HashRecord.inode, HashRecord.size, HashRecord.mtime_ns,
+                  HashRecord.algorithm, HashRecord.digest, HashRecord.last_used]
+        rows = [key + (digest, last_used) for key, digest, last_used in records]
+        with self._lock:
+            self._ensure_db()
+            with self._db.atomic():
+                for batch in chunked(rows, 200):
+                    HashRecord.insert_many(batch, fields=fields).on_conflict_replace().execute()
+                if max_entries > 0:
+                    excess = HashRecord.select().count() - max_entries
+                    if excess > 0:
+                        oldest = HashRecord.select(HashRecord.id).order_by(HashRecord.last_used).limit(excess)
+                        HashRecord.delete().where(HashRecord.id.in_(oldest)).execute()
+                        logger.debug(f"[Index] Evicted {excess} hash cache entries", category="index")
+                        
+    def invalidate(self, task_id: str, root: str):
+        """标记快照失效 (下次同步时重新扫描该根目录)"""
+        root = os.path.abspath(root)
+        with self._lock:
+            self._ensure_db()
+            self.flush()
+            IndexRoot.update(scanned_at=0).where(
+                (IndexRoot.task_id == task_id) & (IndexRoot.root == root)).execute()
+                
+    def drop_task(self, task_id: str):
+        """删除任务的全部快照"""
+        with self._lock:
+            self._ensure_db()
+            self.flush()
+            root_ids = [row.id for row in IndexRoot.select(IndexRoot.id).where(IndexRoot.task_id == task_id)]
+            if not root_ids:
+                return
+            with self._db.atomic():
+                IndexEntry.delete().where(IndexEntry.root_id.in_(root_ids)).execute()
+                IndexDir.delete().where(IndexDir.root_id.in_(root_ids)).execute()
+                IndexRoot.delete().where(IndexRoot.id.in_(root_ids)).execute()
+            for key in [k for k in self._root_ids if k[0] == task_id]:
+                del self._root_ids[key]
+            logger.debug(f"[Index] Dropped snapshots of task {task_id}", category="index")
+            
+    def close(self):
+        """写入缓冲并关闭数据库"""
+        with self._lock:
+            if self._db is None:
+                return
+            self.flush()
+            self._db.close()
+
+
+# 全局实例
+metadata_index = MetadataIndex()
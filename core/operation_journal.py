@@ -0,0 +1,290 @@
+"""
+操作日志模块
+以追加方式把操作队列中每个操作的入队、开始和结束记录到 SQLite (WAL)，
+程序崩溃或退出后重新启动时据此恢复未完成的操作，不必重新扫描整个目录树；
+同时保存重试用尽的操作 (死信列表)
+"""
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+from peewee import (
+    Proxy, SqliteDatabase, Model, AutoField, CharField, TextField, FloatField, IntegerField, chunked
+)
+
+from utils.constants import DATA_DIR
+from utils.logger import logger
+
+
+# 日志数据库连接代理 (与索引库分开存放，队列写入不与快照写入相互阻塞)
+journal_db_proxy = Proxy()
+
+JOURNAL_DB_NAME = "queue.db"
+# 表结构版本: 版本不一致时丢弃旧日志
+JOURNAL_SCHEMA_VERSION = 1
+
+# 事件类型
+EVENT_ENQUEUED = "E"
+EVENT_STARTED = "S"
+EVENT_FINISHED = "F"
+
+# 缓冲的记录达到该数量或超过该时间后写入数据库
+_FLUSH_THRESHOLD = 2000
+_FLUSH_INTERVAL = 1.0
+
+# 结束的操作达到该数量后压缩日志 (删除这些操作的全部记录并截断 WAL 文件)
+_COMPACT_THRESHOLD = 20000
+
+
+class JournalRecord(Model):
+    """操作事件记录 (只追加，压缩时按操作删除)"""
+    seq = AutoField()
+    op_id = CharField(max_length=32, index=True)
+    event = CharField(max_length=1)
+    payload = TextField(null=True)  # 入队事件保存操作内容 (JSON)
+    
+    class Meta:
+        database = journal_db_proxy
+        table_name = "queue_journal"
+
+
+class DeadLetterRecord(Model):
+    """重试用尽的操作"""
+    op_id = CharField(max_length=32, unique=True)
+    payload = TextField()
+    error = TextField(default="")
+    attempts = IntegerField(default=0)
+    failed_at = FloatField()
+    
+    class Meta:
+        database = journal_db_proxy
+        table_name = "dead_letters"
+
+
+_TABLES = [JournalRecord, DeadLetterRecord]
+
+
+class OperationJournal:
+    """操作日志 - 单例模式 (内存缓冲 + 后台线程批量写入)"""
+    
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+        
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        
+        self._db: Optional[SqliteDatabase] = None
+        self._lock = threading.RLock()
+        # 待写入的记录: (操作ID, 事件, 内容)
+        self._buffer: List[Tuple[str, str, Optional[str]]] = []
+        # 上次压缩后结束的操作ID
+        self._finished: List[str] = []
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        
+    def _ensure_db(self):
+        """首次使用时打开日志数据库"""
+        if self._db is not None:
+            return
+        try:
+            from utils.config_manager import config_manager
+            storage_path = config_manager.get("general.storage_path", DATA_DIR)
+        except Exception:
+            storage_path = DATA_DIR
+        self._setup_database(storage_path)
+        
+    def _setup_database(self, storage_path: str):
+        """初始化数据库"""
+        db_file = os.path.join(storage_path, JOURNAL_DB_NAME)
+        os.makedirs(storage_path, exist_ok=True)
+        
+        db = SqliteDatabase(db_file, timeout=10, check_same_thread=False, pragmas={
+            "journal_mode": "wal",
+            "synchronous": "normal",  # 掉电时最多丢失最近的提交，恢复时少量操作重复执行或由下次同步补上
+        })
+        journal_db_proxy.initialize(db)
+        db.connect(reuse_if_open=True)
+        version = db.execute_sql("PRAGMA user_version").fetchone()[0]
+        if version != JOURNAL_SCHEMA_VERSION:
+            db.drop_tables(_TABLES, safe=True)
+            db.execute_sql(f"PRAGMA user_version = {JOURNAL_SCHEMA_VERSION}")
+        db.create_tables(_TABLES, safe=True)
+        self._db = db
+        
+    def record_enqueued(self, records: List[Tuple[str, dict]]):
+        """
+        记录入队的操作
+        
+        Args:
+            records: [(操作ID, 操作内容)]
+        """
+        rows = [(op_id, EVENT_ENQUEUED, json.dumps(payload, ensure_ascii=False)) for op_id, payload in records]
+        self._append(rows)
+        
+    def record_started(self, op_id: str):
+        """记录操作开始执行"""
+        self._append([(op_id, EVENT_STARTED, None)])
+        
+    def record_finished(self, op_ids: List[str]):
+        """记录操作结束 (完成、失败或取消)"""
+        self._append([(op_id, EVENT_FINISHED, None) for op_id in op_ids])
+        
+    def _append(self, rows: List[Tuple[str, str, Optional[str]]]):
+        if not rows:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer.extend(rows)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name="OperationJournal")
+                self._flusher.start()
+            if len(self._buffer) >= _FLUSH_THRESHOLD:
+                self._wakeup.set()
+                
+    def _flush_loop(self):
+        """后台写入线程"""
+        while not self._closed:
+            self._wakeup.wait(_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+            
+    def flush(self):
+        """将缓冲的记录写入数据库，结束的操作足够多时压缩日志"""
+        with self._lock:
+            if not self._buffer:
+                return
+            rows = self._buffer
+            try:
+                self._ensure_db()
+                fields = [JournalRecord.op_id, JournalRecord.event, JournalRecord.payload]
+                with self._db.atomic():
+                    for batch in chunked(rows, 500):
+                        JournalRecord.insert_many(batch, fields=fields).execute()
+            except Exception as e:
+                # 记录保留在缓冲中，下次写入时重试
+                logger.error(f"[Journal] Flush failed, {len(rows)} records kept for retry: {e}", category="queue")
+                return
+            self._buffer = []
+            self._finished.extend(op_id for op_id, event, payload in rows if event == EVENT_FINISHED)
+            if len(self._finished) >= _COMPACT_THRESHOLD:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"[Journal] Compact failed: {e}", category="queue")
+                
+    def compact(self):
+        """删除已结束操作的全部记录并截断 WAL 文件"""
+        with self._lock:
+            self._ensure_db()
+            finished, self._finished = self._finished, []
+            start = time.monotonic()
+            with self._db.atomic():
+                if finished:
+                    for batch in chunked(finished, 500):
+                        JournalRecord.delete().where(JournalRecord.op_id.in_(batch)).execute()
+                else:
+                    done = JournalRecord.select(JournalRecord.op_id).where(JournalRecord.event == EVENT_FINISHED)
+                    JournalRecord.delete().where(JournalRecord.op_id.in_(done)).execute()
+            self._db.execute_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.debug(f"[Journal] Compacted {len(finished) or 'all'} finished operations "
+                         f"in {time.monotonic() - start:.2f}s", category="queue")
+                         
+    def load_unfinished(self) -> List[Tuple[str, dict, bool]]:
+        """
+        读取未结束的操作 (先压缩日志)
+        
+        Returns:
+            按入队顺序排列的 [(操作ID, 操作内容, 是否已开始执行)]
+        """
+        with self._lock:
+            self.flush()
+            self._ensure_db()
+            self._finished = []
+            self.compact()
+            enqueued: Dict[str, dict] = {}
+            started = set()
+            query = (JournalRecord
+                     .select(JournalRecord.op_id, JournalRecord.event, JournalRecord.payload)
+                     .order_by(JournalRecord.seq)
+                     .tuples())
+            for op_id, event, payload in query.iterator():
+                if event == EVENT_ENQUEUED:
+                    try:
+                        enqueued[op_id] = json.loads(payload)
+                    except (TypeError, ValueError):
+                        continue
+                elif event == EVENT_STARTED:
+                    started.add(op_id)
+            return [(op_id, payload, op_id in started) for op_id, payload in enqueued.items()]
+            
+    def add_dead_letter(self, op_id: str, payload: dict, error: str, attempts: int, failed_at: float):
+        """记录重试用尽的操作 (立即写入)"""
+        with self._lock:
+            try:
+                self._ensure_db()
+                DeadLetterRecord.insert(
+                    op_id=op_id, payload=json.dumps(payload, ensure_ascii=False), error=error,
+                    attempts=attempts, failed_at=failed_at
+                ).on_conflict_replace().execute()
+            except Exception as e:
+                logger.error(f"[Journal] Failed to save dead letter: {e}", category="queue")
+                
+    def load_dead_letters(self) -> List[Tuple[str, dict, str, int, float]]:
+        """
+        读取死信列表
+        
+        Returns:
+            按失败顺序排列的 [(操作ID, 操作内容, 失败信息, 重试次数, 失败时间戳)]
+        """
+        with self._lock:
+            self._ensure_db()
+            query = (DeadLetterRecord
+                     .select(DeadLetterRecord.op_id, DeadLetterRecord.payload, DeadLetterRecord.error,
+                             DeadLetterRecord.attempts, DeadLetterRecord.failed_at)
+                     .order_by(DeadLetterRecord.failed_at)
+                     .tuples())
+            letters = []
+            for op_id, payload, error, attempts, failed_at in query.iterator():
+                try:
+                    letters.append((op_id, json.loads(payload), error, attempts, failed_at))
+                except (TypeError, ValueError):
+                    continue
+            return letters
+            
+    def remove_dead_letters(self, op_ids: Optional[List[str]] = None):
+        """从死信列表中删除操作 (None 表示全部)"""
+        with self._lock:
+            try:
+                self._ensure_db()
+                with self._db.atomic():
+                    if op_ids is None:
+                        DeadLetterRecord.delete().execute()
+                    else:
+                        for batch in chunked(op_ids, 500):
+                            DeadLetterRecord.delete().where(DeadLetterRecord.op_id.in_(batch)).execute()
+            except Exception as e:
+                logger.error(f"[Journal] Failed to remove dead letters: {e}", category="queue")
+                
+    def close(self):
+        """写入缓冲并关闭数据库"""
+        with self._lock:
+            self.flush()
+            self._closed = True
+            self._wakeup.set()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# 全局实例
+operation_journal = OperationJournal()
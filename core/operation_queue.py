@@ -1,24 +1,64 @@
 """
-独立操作队列模块 - 所有文件操作在单独线程中执行
+独立操作队列模块 - 所有文件操作在后台工作线程中执行
+多个工作线程并行执行时，涉及同一路径或上下级路径的操作按入队顺序依次执行；
+操作按源和目标所在设备分组，每个设备的并行数单独限制 (机械硬盘默认 1)；
+实时事件优先于全量同步，全量同步优先于启动时的对账同步，同一优先级内各任务轮流执行；
+同一任务写入同一路径的等待中操作会合并 (重复复制只保留一个，复制后删除只保留删除)；
+启用操作日志后，入队、开始和结束都会记录，重新启动时恢复未结束的操作；
+失败的操作按重试策略指数退避后重试 (由时间轮调度)，重试用尽后进入死信列表，可批量重新入队
 """
 import os
-import queue
+import stat
+import time
+import uuid
+import random
+import itertools
 import threading
 import shutil
-from enum import Enum
+from collections import deque
+from functools import lru_cache
+from enum import Enum, IntEnum
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Callable, Optional, List, Dict, Any, Tuple
+from typing import Callable, Optional, List, Dict, Any, Set, Tuple
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from utils.copy_engine import (
+    copy_file, fan_out_copy, copy_small_file, CopyStats, ProgressCallback, SMALL_FILE_SIZE
+)
+from utils.device_info import device_of, auto_concurrency
+
 
 class OperationType(Enum):
     """操作类型"""
     COPY_FILE = "copy"
+    COPY_BATCH = "copy_batch"
     DELETE_FILE = "delete"
+    CREATE_DIR = "mkdir"
     FULL_SYNC = "full_sync"
 
 
+class OperationPriority(IntEnum):
+    """操作优先级 (数值越小越优先)"""
+    REALTIME = 0    # 监控到的实时变更
+    FULL_SYNC = 1   # 手动或计划的全量同步
+    RECONCILE = 2   # 启动时的对账同步
+
+
+@dataclass
+class RetryPolicy:
+    """失败重试策略 (指数退避 + 随机抖动)"""
+    max_retries: int = 5        # 最多重试次数 (0 表示不重试)
+    base_delay: float = 2.0     # 第一次重试前的等待秒数，之后每次翻倍
+    max_delay: float = 300.0    # 单次等待的上限 (秒)
+    jitter: float = 0.5         # 随机缩短等待时间的最大比例，避免大量操作同时重试
+    
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次重试 (从 1 开始) 前的等待秒数"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * (1 - random.uniform(0, self.jitter))
+
+
 class OperationStatus(Enum):
     """操作状态"""
     PENDING = "pending"
@@ -41,15 +81,244 @@ class FileOperation:
     error_message: str = ""
     created_at: datetime = field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
+    bytes_total: int = 0  # 复制操作的文件大小
+    bytes_done: int = 0   # 已复制的字节数
+    # 多目标复制: 所有目标路径 (源文件只读取一次，target_path 为第一个目标)
+    targets: List[str] = field(default_factory=list)
+    # 小文件批量复制: [(源文件路径, 目标路径列表)]
+    batch: List[Tuple[str, List[str]]] = field(default_factory=list)
+    priority: OperationPriority = OperationPriority.REALTIME
+    # 重试策略 (None 表示使用队列按操作类型设置的策略)、已重试次数、等待重试的到期时间 (monotonic)
+    retry_policy: Optional[RetryPolicy] = None
+    attempts: int = 0
+    retry_at: float = 0.0
+    # 调度时判断冲突的路径和涉及的设备、入队序号 (入队时计算)
+    paths: Tuple[str, ...] = ()
+    devices: Tuple[int, ...] = ()
+    seq: int = 0
 
 
 class OperationQueueSignals(QObject):
     """操作队列信号"""
-    progress_updated = pyqtSignal(int, int, str)  # current, total, current_file
+    # completed, total, bytes_done, bytes_total, current_file (字节数可能超过 32 位)
+    progress_updated = pyqtSignal(int, int, 'qint64', 'qint64', str)
     operation_completed = pyqtSignal(str, bool, str)  # op_id, success, message
     queue_status_changed = pyqtSignal(dict)  # status dict
 
 
+# 状态信号的最小发送间隔 (秒)，间隔内的变化合并到下一次发送
+_STATUS_INTERVAL = 0.2
+
+# 每个小文件批量操作包含的最大文件数
+SMALL_BATCH_FILES = 256
+
+# 设备吞吐量的统计窗口 (秒)
+_RATE_WINDOW = 10.0
+
+# 目录 -> 设备号缓存的最大条目数
+_DEVICE_CACHE_SIZE = 4096
+
+# 重试时间轮的刻度 (秒) 和槽数 (超过一圈的到期时间按轮数等待)
+_RETRY_TICK = 0.5
+_RETRY_SLOTS = 512
+
+# 不会因重试而成功的失败信息前缀 (不重试，也不进入死信列表)
+_PERMANENT_ERRORS = ("Task not found", "Task object missing", "Unknown op")
+
+
+# 上级目录链缓存的最大条目数 (按目录缓存，同一目录下的文件共用)
+_PARENT_CACHE_SIZE = 65536
+
+# 操作ID: 进程内唯一前缀 + 递增序号 (日志恢复的操作保留原ID，不会与本次生成的重复)
+_OP_ID_PREFIX = uuid.uuid4().hex[:12]
+_op_counter = itertools.count(1)
+
+
+def _new_op_id() -> str:
+    return f"{_OP_ID_PREFIX}{next(_op_counter):x}"
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+@lru_cache(maxsize=_PARENT_CACHE_SIZE)
+def _dir_chain(directory: str) -> Tuple[str, ...]:
+    """目录本身及其所有上级目录"""
+    parent = os.path.dirname(directory)
+    if parent == directory:
+        return (directory,)
+    return (directory,) + _dir_chain(parent)
+
+
+def _parents(key: str) -> Tuple[str, ...]:
+    """路径的所有上级目录"""
+    parent = os.path.dirname(key)
+    if parent == key:
+        return ()
+    return _dir_chain(parent)
+
+
+def _operation_paths(op: FileOperation) -> Tuple[str, ...]:
+    """操作涉及的路径 (批量操作登记其中的每个文件，只与涉及相同文件或其上级目录的操作冲突)"""
+    if op.batch:
+        paths = {path for source, targets in op.batch for path in [source, *targets]}
+    else:
+        paths = {op.source_path, op.target_path, *op.targets}
+    return tuple({_path_key(path) for path in paths if path})
+
+
+def _operation_record(op: FileOperation) -> dict:
+    """操作在日志中保存的内容 (省略空值)"""
+    record = {
+        "type": op.op_type.value,
+        "source": op.source_path,
+        "target": op.target_path,
+        "targets": op.targets,
+        "batch": op.batch,
+        "task_id": op.task_id,
+        "task_name": op.task_name,
+        "priority": int(op.priority),
+        "size": op.bytes_total
+    }
+    return {key: value for key, value in record.items() if value}
+
+
+def _operation_from_record(op_id: str, data: dict) -> Optional[FileOperation]:
+    """由日志内容重建操作 (内容无法识别时返回 None)"""
+    try:
+        return FileOperation(
+            id=op_id,
+            op_type=OperationType(data.get("type", OperationType.COPY_FILE.value)),
+            source_path=data.get("source", ""),
+            target_path=data.get("target", ""),
+            task_id=data.get("task_id", ""),
+            task_name=data.get("task_name", ""),
+            targets=list(data.get("targets") or []),
+            batch=[(source, list(targets)) for source, targets in data.get("batch") or []],
+            priority=OperationPriority(data.get("priority", OperationPriority.REALTIME)),
+            bytes_total=int(data.get("size") or 0)
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _writes(op: FileOperation) -> List[Tuple[Optional[str], str]]:
+    """操作写入的路径及其复制源: [(源文件路径, 写入路径)]，删除操作的源为 None"""
+    if op.op_type == OperationType.COPY_FILE:
+        targets = op.targets or ([op.target_path] if op.target_path else [])
+        return [(op.source_path, target) for target in targets]
+    if op.op_type == OperationType.COPY_BATCH:
+        return [(source, target) for source, targets in op.batch for target in targets]
+    if op.op_type == OperationType.DELETE_FILE:
+        return [(None, op.source_path)] if op.source_path else []
+    return []
+
+
+def _copy_source(op: FileOperation, target_key: str) -> Optional[str]:
+    """复制操作中写入指定目标的源文件路径 (不是复制操作时返回 None)"""
+    if op.op_type == OperationType.COPY_FILE:
+        return op.source_path
+    if op.op_type == OperationType.COPY_BATCH:
+        for source, targets in op.batch:
+            if any(_path_key(target) == target_key for target in targets):
+                return source
+    return None
+
+
+def _drop_target(op: FileOperation, target_key: str):
+    """从复制操作中去掉一个目标"""
+    if op.op_type == OperationType.COPY_FILE:
+        op.targets = [target for target in op.targets if _path_key(target) != target_key]
+        if _path_key(op.target_path) == target_key:
+            op.target_path = op.targets[0] if op.targets else ""
+    elif op.op_type == OperationType.COPY_BATCH:
+        op.batch = [(source, remaining) for source, remaining in
+                    ((source, [t for t in targets if _path_key(t) != target_key]) for source, targets in op.batch)
+                    if remaining]
+        if op.batch:
+            op.source_path, targets = op.batch[0]
+            op.target_path = targets[0]
+
+
+@dataclass
+class DeadLetter:
+    """重试用尽的操作"""
+    op: FileOperation
+    error: str
+    attempts: int
+    failed_at: float  # 时间戳
+
+
+class _TimerWheel:
+    """哈希时间轮: 按到期刻度分槽存放等待重试的操作，推进时只检查经过的槽"""
+    
+    def __init__(self, tick: float, slots: int):
+        self._tick = tick
+        self._slots: List[List[Tuple[int, FileOperation]]] = [[] for _ in range(slots)]
+        self._current = int(time.monotonic() / tick)
+        
+    def schedule(self, op: FileOperation, deadline: float):
+        tick = max(int(deadline / self._tick) + 1, self._current + 1)
+        self._slots[tick % len(self._slots)].append((tick, op))
+        
+    def advance(self, now: float) -> List[FileOperation]:
+        """推进到当前时间，返回到期的操作"""
+        target = int(now / self._tick)
+        if target <= self._current:
+            return []
+        due = []
+        for step in range(1, min(target - self._current, len(self._slots)) + 1):
+            slot = self._slots[(self._current + step) % len(self._slots)]
+            if slot:
+                waiting = [(tick, op) for tick, op in slot if tick > target]
+                due.extend(op for tick, op in slot if tick <= target)
+                slot[:] = waiting
+        self._current = target
+        return due
+        
+    def clear(self):
+        for slot in self._slots:
+            slot.clear()
+
+
+class _PathIndex:
+    """未完成操作涉及的路径索引: 查找路径相同或存在上下级关系的操作"""
+    
+    def __init__(self):
+        self._held: Dict[str, Set[str]] = {}   # 路径 -> 涉及该路径的操作ID
+        self._under: Dict[str, Set[str]] = {}  # 路径 -> 涉及该路径或其下级路径的操作ID
+        
+    def conflicts(self, paths: Tuple[str, ...]) -> Set[str]:
+        """与给定路径冲突的操作ID"""
+        found: Set[str] = set()
+        for path in paths:
+            found.update(self._under.get(path, ()))
+            for parent in _parents(path):
+                found.update(self._held.get(parent, ()))
+        return found
+        
+    def add(self, op_id: str, paths: Tuple[str, ...]):
+        for path in paths:
+            self._held.setdefault(path, set()).add(op_id)
+            for key in itertools.chain((path,), _parents(path)):
+                self._under.setdefault(key, set()).add(op_id)
+                
+    def remove(self, op_id: str, paths: Tuple[str, ...]):
+        for path in paths:
+            self._discard(self._held, path, op_id)
+            for key in itertools.chain((path,), _parents(path)):
+                self._discard(self._under, key, op_id)
+                
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, op_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(op_id)
+            if not ids:
+                del index[key]
+
+
 class OperationQueue:
     """独立操作队列 - 单例模式"""
     
@@ -66,136 +335,647 @@ class OperationQueue:
             return
         self._initialized = True
         
-        self._queue: queue.Queue = queue.Queue()
-        self._pending_ops: List[FileOperation] = []
-        self._current_op: Optional[FileOperation] = None
+        # 等待中和执行中的操作 (按入队顺序)
+        self._pending_ops: Dict[str, FileOperation] = {}
+        self._enqueue_seq = itertools.count(1)
+        # 执行中的操作 (按开始顺序)
+        self._running: Dict[str, FileOperation] = {}
+        # 路径冲突依赖: 操作ID -> 尚未完成的前序冲突操作数 / 前序冲突操作 / 依赖它的后续操作
+        self._path_index = _PathIndex()
+        self._blockers: Dict[str, int] = {}
+        self._blocked_by: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        # 可以执行的操作: 优先级 -> 任务ID -> 设备组 -> 操作，同一优先级内任务和设备组轮流取出
+        self._ready: Dict[int, Dict[str, Dict[Tuple[int, ...], deque]]] = {}
+        # 各优先级等待中的操作数
+        self._queued_by_priority: Dict[int, int] = {}
+        # 等待中的操作写入的路径: (任务ID, 路径) -> 操作ID，用于合并重复操作
+        self._writers: Dict[Tuple[str, str], str] = {}
+        self._coalesced_count = 0
+        # 操作日志 (OperationJournal，由 enable_journal 启用)
+        self._journal = None
+        # 失败重试: 按操作类型的重试策略、等待重试的操作、重试用尽的操作 (按失败顺序)
+        self._retry_policies: Dict[OperationType, RetryPolicy] = {}
+        self._default_retry_policy = RetryPolicy()
+        self._retry_wheel = _TimerWheel(_RETRY_TICK, _RETRY_SLOTS)
+        self._retry_waiting = 0
+        self._dead_letters: Dict[str, DeadLetter] = {}
+        # 各设备的并行上限 (0 表示不单独限制)、执行中和排队中的操作数、完成记录
+        self._device_limits: Dict[int, int] = {}
+        self._configured_limits: Dict[int, int] = {}
+        self._device_running: Dict[int, int] = {}
+        self._device_queued: Dict[int, int] = {}
+        self._device_bytes: Dict[int, int] = {}
+        self._device_history: Dict[int, deque] = {}
+        self._device_names: Dict[int, str] = {}
+        self._dir_devices: Dict[str, Optional[int]] = {}
         self._completed_count = 0
         self._failed_count = 0
+        # 已完成操作的字节数 / 所有已知操作的总字节数
+        self._bytes_done = 0
+        self._bytes_total = 0
+        # 状态信号节流: 上次发送时间 / 等待发送合并后状态的定时器
+        self._status_lock = threading.Lock()
+        self._last_status_emit = 0.0
+        self._status_timer: Optional[threading.Timer] = None
         self._is_running = True
         self._is_paused = False
         self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
         
         # Qt信号
         self.signals = OperationQueueSignals()
         
-        # 启动工作线程
-        self._worker_thread = threading.Thread(target=self._worker, daemon=True)
-        self._worker_thread.start()
+        # 启动工作线程 (数量由 configure 调整)
+        self._workers: List[threading.Thread] = []
+        self.configure(1)
+        
+    def configure(self, workers: int):
+        """
+        设置并行执行操作的工作线程数
+        
+        Args:
+            workers: 线程数 (至少为 1)
+        """
+        workers = max(1, int(workers))
+        with self._cond:
+            if not self._is_running:
+                return
+            while len(self._workers) < workers:
+                thread = threading.Thread(target=self._worker, daemon=True,
+                                          name=f"OperationQueue-{len(self._workers)}")
+                self._workers.append(thread)
+                thread.start()
+            # 多余的线程完成当前操作后退出
+            del self._workers[workers:]
+            self._cond.notify_all()
+            
+    @property
+    def worker_count(self) -> int:
+        """工作线程数"""
+        return len(self._workers)
     
+    def set_device_limits(self, limits: Dict[str, int]):
+        """
+        按路径设置所在设备的并行操作数
+        
+        Args:
+            limits: {路径: 并行数}，0 表示不单独限制；未设置的设备自动判断 (机械硬盘为 1)
+        """
+        configured = {}
+        for path, limit in (limits or {}).items():
+            dev = device_of(path)
+            if dev is not None:
+                configured[dev] = max(0, int(limit))
+                self._device_names.setdefault(dev, path)
+        with self._cond:
+            self._configured_limits = configured
+            self._device_limits = dict(configured)
+            self._cond.notify_all()
+            
+    def set_retry_policy(self, policy: RetryPolicy, op_type: Optional[OperationType] = None):
+        """
+        设置失败重试策略
+        
+        Args:
+            policy: 重试策略
+            op_type: 只用于该类型的操作 (None 表示默认策略)
+        """
+        with self._lock:
+            if op_type is None:
+                self._default_retry_policy = policy
+            else:
+                self._retry_policies[op_type] = policy
+            
+    def _device_limit(self, dev: int) -> int:
+        """设备的并行上限 (需持有锁)，未配置的设备首次使用时自动判断"""
+        limit = self._device_limits.get(dev)
+        if limit is None:
+            try:
+                limit = auto_concurrency(dev)
+            except Exception:
+                limit = 0
+            self._device_limits[dev] = limit
+        return limit or len(self._workers)
+        
+    def _operation_devices(self, op: FileOperation) -> Tuple[int, ...]:
+        """操作的源和目标所在设备 (按所在目录缓存)"""
+        if op.batch:
+            directories = set(op.paths)
+        else:
+            directories = {os.path.dirname(path) for path in op.paths}
+        devices = set()
+        for directory in directories:
+            if directory not in self._dir_devices:
+                if len(self._dir_devices) >= _DEVICE_CACHE_SIZE:
+                    self._dir_devices.clear()
+                self._dir_devices[directory] = device_of(directory)
+            dev = self._dir_devices[directory]
+            if dev is not None:
+                devices.add(dev)
+                self._device_names.setdefault(dev, directory)
+        return tuple(sorted(devices))
+        
     def add_operation(self, op_type: OperationType, source: str, target: str = "",
-                      task_id: str = "", task_name: str = "") -> str:
-        """添加操作到队列"""
-        import uuid
-        op_id = str(uuid.uuid4())[:8]
+                      task_id: str = "", task_name: str = "",
+                      targets: Optional[List[str]] = None,
+                      priority: OperationPriority = OperationPriority.REALTIME) -> str:
+        """添加操作到队列 (复制操作可通过 targets 指定多个目标)"""
+        op = self._create_operation(op_type, source, target, task_id, task_name, targets)
+        op.priority = OperationPriority(priority)
+        self._enqueue([op])
+        self._emit_status()
+        return op.id
         
+    def _create_operation(self, op_type: OperationType, source: str, target: str = "",
+                          task_id: str = "", task_name: str = "",
+                          targets: Optional[List[str]] = None, size: Optional[int] = None) -> FileOperation:
+        if not isinstance(op_type, OperationType):
+            op_type = OperationType(op_type)
+        targets = list(dict.fromkeys(targets or []))
         op = FileOperation(
-            id=op_id,
+            id=_new_op_id(),
             op_type=op_type,
             source_path=source,
-            target_path=target,
+            target_path=target or (targets[0] if targets else ""),
             task_id=task_id,
-            task_name=task_name
+            task_name=task_name,
+            targets=targets
         )
+        if op_type == OperationType.COPY_FILE:
+            if size is not None:
+                op.bytes_total = size
+            else:
+                try:
+                    op.bytes_total = os.path.getsize(source)
+                except OSError:
+                    pass
+        return op
         
+    def enable_journal(self, journal, task_ids: Optional[Set[str]] = None) -> int:
+        """
+        启用操作日志，并恢复上次未结束的操作 (按原入队顺序重新入队)
+        
+        Args:
+            journal: OperationJournal 实例
+            task_ids: 仍然存在的任务ID，其他任务的操作不再恢复 (None 表示不过滤)
+            
+        Returns:
+            恢复的操作数
+        """
+        from utils.logger import logger
+        restored = []
+        dropped = []
+        interrupted = 0
+        try:
+            unfinished = journal.load_unfinished()
+        except Exception as e:
+            logger.error(f"读取操作日志失败: {e}", category="queue")
+            unfinished = []
+        for op_id, data, started in unfinished:
+            op = _operation_from_record(op_id, data)
+            if op is None or (task_ids is not None and op.task_id not in task_ids):
+                dropped.append(op_id)
+                continue
+            restored.append(op)
+            interrupted += started
+        journal.record_finished(dropped)
+        try:
+            letters = journal.load_dead_letters()
+        except Exception as e:
+            logger.error(f"读取死信列表失败: {e}", category="queue")
+            letters = []
         with self._lock:
-            self._pending_ops.append(op)
-            self._queue.put(op)
+            for op_id, data, error, attempts, failed_at in letters:
+                op = _operation_from_record(op_id, data)
+                if op is not None:
+                    self._dead_letters[op_id] = DeadLetter(op, error, attempts, failed_at)
+        self._journal = journal
+        if restored:
+            self._enqueue(restored, journal=False)
+            logger.info(f"从操作日志恢复了 {len(restored)} 个未完成的操作 (其中 {interrupted} 个执行中断)",
+                        category="queue")
+            self._emit_status()
+        return len(restored)
         
-        self._emit_status()
-        return op_id
+    def _journal_enqueued(self, ops: List[FileOperation]):
+        if self._journal is not None:
+            self._journal.record_enqueued([(op.id, _operation_record(op)) for op in ops])
+            
+    def _journal_finished(self, op_ids: List[str]):
+        if self._journal is not None and op_ids:
+            self._journal.record_finished(op_ids)
+            
+    def _enqueue(self, ops: List[FileOperation], journal: bool = True):
+        for op in ops:
+            op.paths = _operation_paths(op)
+            op.devices = self._operation_devices(op)
+        if journal:
+            self._journal_enqueued(ops)
+        with self._cond:
+            for op in ops:
+                op.seq = next(self._enqueue_seq)
+                if not self._coalesce(op):
+                    continue
+                # 与尚未完成的前序操作路径冲突时，等这些操作全部完成后才能执行
+                blockers = self._path_index.conflicts(op.paths)
+                self._path_index.add(op.id, op.paths)
+                self._pending_ops[op.id] = op
+                self._bytes_total += op.bytes_total
+                for dev in op.devices:
+                    self._device_queued[dev] = self._device_queued.get(dev, 0) + 1
+                self._queued_by_priority[op.priority] = self._queued_by_priority.get(op.priority, 0) + 1
+                for blocker in blockers:
+                    self._dependents.setdefault(blocker, []).append(op.id)
+                if blockers:
+                    self._blockers[op.id] = len(blockers)
+                    self._blocked_by[op.id] = blockers
+                    # 前序冲突操作优先级较低时提升到与本操作相同，避免实时变更排在批量同步之后
+                    self._boost(blockers, op.priority)
+                else:
+                    self._push_ready(op)
+            self._cond.notify(len(ops))
+            
+    def _coalesce(self, op: FileOperation) -> bool:
+        """
+        与同一任务中写入相同路径的等待中操作合并 (需持有锁)
+        
+        - 复制 + 复制 (源相同): 新操作去掉该目标，等待中的操作执行时会复制最新内容
+        - 复制 + 复制 (源不同) / 复制 + 删除: 等待中的操作去掉该目标，由新操作决定结果
+        - 删除 + 删除: 新操作丢弃
+        删除后的复制不合并，仍按顺序执行；等待中的操作之后还有其他冲突操作
+        (如删除上级目录、改写复制源) 时也不合并，否则会改变执行结果。
+        
+        Returns:
+            新操作是否仍需入队 (目标全部被合并时返回 False)
+        """
+        merged = 0
+        for source, path in _writes(op):
+            target_key = _path_key(path)
+            key = (op.task_id, target_key)
+            waiting = self._pending_ops.get(self._writers.get(key, ""))
+            paths = (target_key,) if source is None else (_path_key(source), target_key)
+            if (waiting is not None and waiting.status == OperationStatus.PENDING and
+                    self._is_latest_conflict(waiting, paths)):
+                waiting_source = _copy_source(waiting, target_key)
+                if waiting_source is None:
+                    # 等待中的是删除操作
+                    if source is None:
+                        self._boost({waiting.id}, op.priority)
+                        self._coalesced_count += 1
+                        op.status = OperationStatus.CANCELLED
+                        self._journal_finished([op.id])
+                        return False
+                elif waiting_source == source:
+                    _drop_target(op, target_key)
+                    self._boost({waiting.id}, op.priority)
+                    merged += 1
+                    continue
+                else:
+                    self._drop_waiting_target(waiting, target_key)
+                    merged += 1
+            self._writers[key] = op.id
+            
+        if not merged:
+            return True
+        self._coalesced_count += merged
+        if not _writes(op):
+            # 所有目标都已由等待中的操作覆盖
+            op.status = OperationStatus.CANCELLED
+            self._journal_finished([op.id])
+            return False
+        # 部分目标被合并时重新计算冲突路径 (涉及的设备只会变少，保持不变)
+        op.paths = _operation_paths(op)
+        self._journal_enqueued([op])
+        return True
+        
+    def _is_latest_conflict(self, waiting: FileOperation, paths: Tuple[str, ...]) -> bool:
+        """等待中的操作是否为与给定路径冲突的未完成操作中最后入队的 (需持有锁)"""
+        for op_id in self._path_index.conflicts(paths):
+            other = self._pending_ops.get(op_id)
+            if other is not None and other.seq > waiting.seq:
+                return False
+        return True
+        
+    def _drop_waiting_target(self, op: FileOperation, target_key: str):
+        """去掉等待中复制操作的一个目标，没有剩余目标时取消该操作 (需持有锁)"""
+        self._writers.pop((op.task_id, target_key), None)
+        _drop_target(op, target_key)
+        if not _writes(op):
+            self._cancel_waiting(op)
+            return
+        # 已依赖它的后续操作保持不变，之后入队的操作按剩余路径判断冲突
+        self._path_index.remove(op.id, op.paths)
+        op.paths = _operation_paths(op)
+        self._path_index.add(op.id, op.paths)
+        # 日志中以最后一次记录的内容为准，恢复时不会再写入已去掉的目标
+        self._journal_enqueued([op])
+        
+    def _cancel_waiting(self, op: FileOperation):
+        """取消一个等待中的操作，并释放依赖它的后续操作 (需持有锁)"""
+        if op.retry_at:
+            self._retry_waiting -= 1
+        op.status = OperationStatus.CANCELLED
+        self._bytes_total -= op.bytes_total
+        self._path_index.remove(op.id, op.paths)
+        for dev in op.devices:
+            self._device_queued[dev] -= 1
+        self._queued_by_priority[op.priority] -= 1
+        self._blockers.pop(op.id, None)
+        self._blocked_by.pop(op.id, None)
+        self._forget_writer(op)
+        del self._pending_ops[op.id]
+        self._release_dependents(op)
+        self._journal_finished([op.id])
+        
+    def _forget_writer(self, op: FileOperation):
+        """操作开始执行或取消后，不再参与合并 (需持有锁)"""
+        for source, path in _writes(op):
+            key = (op.task_id, _path_key(path))
+            if self._writers.get(key) == op.id:
+                del self._writers[key]
     
-    def add_batch_operations(self, operations: List[dict]) -> List[str]:
-        """批量添加操作"""
-        op_ids = []
+    def _push_ready(self, op: FileOperation):
+        """操作进入可执行分组 (需持有锁)"""
+        self._ready.setdefault(op.priority, {}).setdefault(op.task_id, {}).setdefault(
+            op.devices, deque()).append(op)
+            
+    def _boost(self, op_ids: Set[str], priority: OperationPriority):
+        """
+        把尚未执行的操作及其前序冲突操作提升到指定优先级 (需持有锁)
+        
+        已在可执行分组中的操作按新优先级再加入一次，旧位置在取出时跳过。
+        """
+        stack = list(op_ids)
+        while stack:
+            op = self._pending_ops.get(stack.pop())
+            if op is None or op.status != OperationStatus.PENDING or op.priority <= priority:
+                continue
+            self._queued_by_priority[op.priority] -= 1
+            self._queued_by_priority[priority] = self._queued_by_priority.get(priority, 0) + 1
+            op.priority = priority
+            if op.id in self._blockers:
+                stack.extend(self._blocked_by.get(op.id, ()))
+            elif not op.retry_at:
+                self._push_ready(op)
+                
+    def add_batch_operations(self, operations: List[dict],
+                             priority: OperationPriority = OperationPriority.REALTIME) -> List[str]:
+        """
+        批量添加操作 (状态信号只发送一次)
+        
+        同一任务中同一源文件的复制操作合并为一个多目标操作，执行时源文件只读取一次；
+        小文件的复制操作再按任务打包为批量操作，由一次执行完成。
+        
+        Args:
+            operations: 操作列表
+            priority: 这批操作的优先级
+        """
+        merged: Dict[Tuple[str, str], dict] = {}
+        batch = []
         for op_data in operations:
-            op_id = self.add_operation(
-                op_type=op_data.get("op_type", OperationType.COPY_FILE),
+            op_type = op_data.get("op_type", OperationType.COPY_FILE)
+            if not isinstance(op_type, OperationType):
+                op_type = OperationType(op_type)
+            op_data = dict(op_data, op_type=op_type)
+            if op_type == OperationType.COPY_FILE:
+                op_targets = op_data.get("targets") or [op_data.get("target", "")]
+                key = (op_data.get("task_id", ""), op_data.get("source", ""))
+                existing = merged.get(key)
+                if existing is not None:
+                    existing["targets"].extend(op_targets)
+                    continue
+                op_data["targets"] = list(op_targets)
+                merged[key] = op_data
+            else:
+                # 删除等其他操作之后的复制不能并入之前的操作，否则会先于它执行
+                merged.clear()
+            batch.append(op_data)
+            
+        ops = []
+        # 任务ID -> 正在收集的小文件批量操作
+        small_batches: Dict[str, FileOperation] = {}
+        for op_data in batch:
+            if op_data["op_type"] != OperationType.COPY_FILE:
+                small_batches.clear()
+            size = op_data.get("size")
+            if op_data["op_type"] == OperationType.COPY_FILE and size is None:
+                size = self._regular_file_size(op_data.get("source", ""))
+            if op_data["op_type"] == OperationType.COPY_FILE and size is not None and size <= SMALL_FILE_SIZE:
+                task_id = op_data.get("task_id", "")
+                batch_op = small_batches.get(task_id)
+                if batch_op is None:
+                    batch_op = self._create_operation(OperationType.COPY_BATCH, op_data.get("source", ""),
+                                                      op_data.get("target", ""), task_id,
+                                                      op_data.get("task_name", ""))
+                    small_batches[task_id] = batch_op
+                    ops.append(batch_op)
+                batch_op.batch.append((op_data.get("source", ""), op_data["targets"]))
+                batch_op.bytes_total += size
+                if len(batch_op.batch) >= SMALL_BATCH_FILES:
+                    del small_batches[task_id]
+                continue
+            ops.append(self._create_operation(
+                op_type=op_data["op_type"],
                 source=op_data.get("source", ""),
                 target=op_data.get("target", ""),
                 task_id=op_data.get("task_id", ""),
-                task_name=op_data.get("task_name", "")
-            )
-            op_ids.append(op_id)
-        return op_ids
+                task_name=op_data.get("task_name", ""),
+                targets=op_data.get("targets"),
+                size=size
+            ))
+            
+        for op in ops:
+            op.priority = OperationPriority(priority)
+        self._enqueue(ops)
+        self._emit_status()
+        return [op.id for op in ops]
+        
+    @staticmethod
+    def _regular_file_size(path: str) -> Optional[int]:
+        """普通文件的大小 (目录或无法访问时返回 None)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size if stat.S_ISREG(st.st_mode) else None
     
     def pause(self):
         """暂停队列"""
         self._is_paused = True
-        self._emit_status()
+        self._emit_status(force=True)
     
     def resume(self):
         """恢复队列"""
-        self._is_paused = False
-        self._emit_status()
+        with self._cond:
+            self._is_paused = False
+            self._cond.notify_all()
+        self._emit_status(force=True)
     
     def clear(self):
         """清空待处理队列"""
         with self._lock:
-            # 清空队列
-            while not self._queue.empty():
-                try:
-                    self._queue.get_nowait()
-                except queue.Empty:
-                    break
-            
-            # 标记所有待处理为取消
-            for op in self._pending_ops:
-                if op.status == OperationStatus.PENDING:
-                    op.status = OperationStatus.CANCELLED
-            self._pending_ops.clear()
+            # 取消所有等待中的操作 (执行中的操作继续完成)
+            cancelled = []
+            for op in list(self._pending_ops.values()):
+                if op.id in self._running:
+                    continue
+                cancelled.append(op.id)
+                op.status = OperationStatus.CANCELLED
+                self._bytes_total -= op.bytes_total
+                self._path_index.remove(op.id, op.paths)
+                for dev in op.devices:
+                    self._device_queued[dev] -= 1
+                self._queued_by_priority[op.priority] -= 1
+                self._blockers.pop(op.id, None)
+                self._blocked_by.pop(op.id, None)
+                self._dependents.pop(op.id, None)
+                del self._pending_ops[op.id]
+            self._ready.clear()
+            self._writers.clear()
+            self._retry_wheel.clear()
+            self._retry_waiting = 0
+        self._journal_finished(cancelled)
         
-        self._emit_status()
+        self._emit_status(force=True)
     
     def get_status(self) -> dict:
         """获取队列状态"""
         with self._lock:
-            pending = len([op for op in self._pending_ops if op.status == OperationStatus.PENDING])
+            pending = len(self._pending_ops) - len(self._running)
+            running = list(self._running.values())
+            current_op = running[0] if running else None
             current_file = ""
-            if self._current_op:
-                current_file = os.path.basename(self._current_op.source_path)
+            if current_op is not None:
+                current_file = self._describe(current_op)
+                if len(running) > 1:
+                    current_file += f" 等 {len(running)} 项"
+            # 多个操作同时执行时按总和显示字节进度
+            current_done = sum(op.bytes_done for op in running)
+            current_total = sum(op.bytes_total for op in running)
             
             return {
                 "pending": pending,
+                "running": len(running),
+                "workers": len(self._workers),
                 "completed": self._completed_count,
                 "failed": self._failed_count,
                 "is_paused": self._is_paused,
                 "current_file": current_file,
-                "current_op": self._current_op
+                "current_op": current_op,
+                "current_bytes_done": current_done,
+                "current_bytes_total": current_total,
+                "bytes_done": self._bytes_done + current_done,
+                "bytes_total": self._bytes_total,
+                "devices": self._device_status(),
+                "coalesced": self._coalesced_count,
+                "retrying": self._retry_waiting,
+                "dead_letters": len(self._dead_letters),
+                "priorities": {OperationPriority(priority).name.lower(): count
+                               for priority, count in sorted(self._queued_by_priority.items()) if count}
+            }
+            
+    def _device_status(self) -> Dict[int, dict]:
+        """各设备的并行上限、执行中和排队中的操作数及吞吐量 (需持有锁)"""
+        now = time.monotonic()
+        devices = {}
+        for dev in set(self._device_queued) | set(self._device_running) | set(self._device_bytes):
+            history = self._device_history.get(dev, ())
+            recent = sum(size for second, size in history if now - second <= _RATE_WINDOW)
+            devices[dev] = {
+                "path": self._device_names.get(dev, ""),
+                "limit": self._device_limit(dev),
+                "running": self._device_running.get(dev, 0),
+                "queued": self._device_queued.get(dev, 0),
+                "bytes_done": self._device_bytes.get(dev, 0),
+                "rate": recent / _RATE_WINDOW
             }
+        return devices
     
     def get_next_operations(self, count: int = 5) -> List[dict]:
         """获取接下来的操作预览"""
         with self._lock:
-            pending = [op for op in self._pending_ops if op.status == OperationStatus.PENDING]
+            pending = list(itertools.islice(
+                (op for op in self._pending_ops.values() if op.status == OperationStatus.PENDING), count))
             return [{
                 "id": op.id,
                 "type": op.op_type.value,
-                "file": os.path.basename(op.source_path),
+                "file": self._describe(op),
                 "task": op.task_name
             } for op in pending[:count]]
+            
+    @staticmethod
+    def _describe(op: FileOperation) -> str:
+        """操作的显示名称 (批量操作显示首个文件和文件数)"""
+        name = os.path.basename(op.source_path)
+        if op.op_type == OperationType.COPY_BATCH and len(op.batch) > 1:
+            return f"{name} 等 {len(op.batch)} 个文件"
+        return name
     
+    def _take_runnable(self) -> Optional[FileOperation]:
+        """
+        取出下一个可执行的操作 (需持有锁)
+        
+        按优先级从高到低查找；同一优先级内各任务轮流取出，任务内各设备组轮流取出，
+        取出后该任务和设备组排到最后。涉及的设备已达到并行上限的设备组跳过，
+        慢速设备上排队的操作不会阻塞其他设备，也不会阻塞较低优先级中可以执行的操作。
+        """
+        for priority in sorted(self._ready):
+            tasks = self._ready[priority]
+            for task_id in list(tasks):
+                lanes = tasks[task_id]
+                for devices in list(lanes):
+                    lane = lanes[devices]
+                    # 跳过已被提升到更高优先级并已取出的操作
+                    while lane and (lane[0].status != OperationStatus.PENDING or lane[0].priority != priority):
+                        lane.popleft()
+                    if not lane:
+                        del lanes[devices]
+                        continue
+                    if any(self._device_running.get(dev, 0) >= self._device_limit(dev) for dev in devices):
+                        continue
+                    op = lane.popleft()
+                    del lanes[devices]
+                    if lane:
+                        lanes[devices] = lane
+                    del tasks[task_id]
+                    if lanes:
+                        tasks[task_id] = lanes
+                    if not tasks:
+                        del self._ready[priority]
+                    return op
+                if not lanes:
+                    del tasks[task_id]
+            if not tasks:
+                del self._ready[priority]
+        return None
+        
     def _worker(self):
         """工作线程"""
-        while self._is_running:
-            try:
-                # 检查暂停状态
-                if self._is_paused:
-                    import time
-                    time.sleep(0.1)
-                    continue
-                
-                # 获取下一个操作
-                try:
-                    op = self._queue.get(timeout=0.5)
-                except queue.Empty:
-                    continue
-                
+        me = threading.current_thread()
+        while True:
+            with self._cond:
+                op = None
+                while self._is_running and me in self._workers:
+                    if not self._is_paused:
+                        self._release_retries()
+                        op = self._take_runnable()
+                        if op is not None:
+                            break
+                    self._cond.wait(0.5)
                 if op is None:
-                    break
-                
-                # 执行操作
-                self._current_op = op
+                    return
                 op.status = OperationStatus.RUNNING
+                self._running[op.id] = op
+                self._queued_by_priority[op.priority] -= 1
+                self._forget_writer(op)
+                for dev in op.devices:
+                    self._device_queued[dev] -= 1
+                    self._device_running[dev] = self._device_running.get(dev, 0) + 1
+                
+            try:
+                if self._journal is not None:
+                    self._journal.record_started(op.id)
                 self._emit_status()
                 
                 # logger.debug(f"Executing queue op: {op.op_type} {op.source_path}")
@@ -205,31 +985,223 @@ class OperationQueue:
                 op.completed_at = datetime.now()
                 if success:
                     op.status = OperationStatus.COMPLETED
-                    with self._lock:
-                        self._completed_count += 1
                 else:
-                    from utils.logger import logger
-                    logger.error(f"Queue op failed: {op.source_path} - {message}", category="queue")
                     op.status = OperationStatus.FAILED
                     op.error_message = message
-                    with self._lock:
-                        self._failed_count += 1
-                
-                # 从待处理列表移除
-                with self._lock:
-                    if op in self._pending_ops:
-                        self._pending_ops.remove(op)
-                
-                self._current_op = None
-                
-                # 发送完成信号
-                self.signals.operation_completed.emit(op.id, success, message)
-                self._emit_status()
-                
             except Exception as e:
                 from utils.logger import logger
                 logger.error(f"Queue worker error: {e}", category="queue")
+                success, message = False, str(e)
+                op.status = OperationStatus.FAILED
+                op.error_message = message
+            finally:
+                # 释放路径并从待处理列表移除 (等待重试的操作保留路径和后续依赖)
+                dead_letter = None
+                # 需要访问文件系统，在持有锁之前判断 (慢速或无响应的网络共享不会阻塞其他线程)
+                retryable = op.status != OperationStatus.COMPLETED and self._is_retryable(op)
+                with self._cond:
+                    finished = time.monotonic()
+                    retry_delay = None
+                    if op.status == OperationStatus.COMPLETED:
+                        self._completed_count += 1
+                        self._bytes_done += op.bytes_total
+                    else:
+                        retry_delay = self._retry_delay(op, retryable)
+                        if retry_delay is None:
+                            self._failed_count += 1
+                            self._bytes_total -= op.bytes_total
+                            if retryable:
+                                dead_letter = DeadLetter(op, op.error_message, op.attempts, time.time())
+                                self._dead_letters[op.id] = dead_letter
+                    for dev in op.devices:
+                        self._device_running[dev] -= 1
+                        if op.status == OperationStatus.COMPLETED:
+                            self._device_bytes[dev] = self._device_bytes.get(dev, 0) + op.bytes_total
+                            # 按秒累计，统计吞吐量时只需汇总窗口内的几个记录
+                            history = self._device_history.setdefault(dev, deque())
+                            second = int(finished)
+                            if history and history[-1][0] == second:
+                                history[-1][1] += op.bytes_total
+                            else:
+                                history.append([second, op.bytes_total])
+                            while history and finished - history[0][0] > _RATE_WINDOW:
+                                history.popleft()
+                    del self._running[op.id]
+                    if retry_delay is not None:
+                        self._schedule_retry(op, finished + retry_delay)
+                    else:
+                        self._pending_ops.pop(op.id, None)
+                        self._path_index.remove(op.id, op.paths)
+                        self._release_dependents(op)
+                    self._cond.notify_all()
+                    drained = not self._pending_ops
+                self._log_failure(op, retry_delay)
+                if retry_delay is None:
+                    self._journal_finished([op.id])
+                if dead_letter is not None and self._journal is not None:
+                    self._journal.add_dead_letter(op.id, _operation_record(op), dead_letter.error,
+                                                  dead_letter.attempts, dead_letter.failed_at)
+                    
+            # 发送完成信号
+            try:
+                self.signals.operation_completed.emit(op.id, success, message)
+            except Exception:
+                pass
+            # 队列清空时立即发送最终状态
+            self._emit_status(force=drained)
+            
+    def _is_retryable(self, op: FileOperation) -> bool:
+        """失败是否可能是暂时的 (源文件已不存在的复制和无法执行的操作不重试，会访问文件系统，不能持有锁调用)"""
+        if op.error_message.startswith(_PERMANENT_ERRORS):
+            return False
+        if op.op_type == OperationType.COPY_FILE and not os.path.exists(op.source_path):
+            return False
+        return True
+        
+    def _retry_delay(self, op: FileOperation, retryable: bool) -> Optional[float]:
+        """失败操作下次重试前的等待秒数，不再重试时返回 None (需持有锁，retryable 为 _is_retryable 的结果)"""
+        if not self._is_running or not retryable:
+            return None
+        policy = op.retry_policy or self._retry_policies.get(op.op_type, self._default_retry_policy)
+        if op.attempts >= policy.max_retries:
+            return None
+        op.attempts += 1
+        return policy.delay(op.attempts)
+        
+    def _schedule_retry(self, op: FileOperation, retry_at: float):
+        """失败的操作回到等待状态，到期后由时间轮放回可执行分组 (需持有锁)"""
+        op.status = OperationStatus.PENDING
+        op.retry_at = retry_at
+        op.bytes_done = 0
+        self._retry_waiting += 1
+        self._queued_by_priority[op.priority] = self._queued_by_priority.get(op.priority, 0) + 1
+        for dev in op.devices:
+            self._device_queued[dev] = self._device_queued.get(dev, 0) + 1
+        # 等待期间仍可与后续写入相同路径的操作合并
+        for source, path in _writes(op):
+            self._writers.setdefault((op.task_id, _path_key(path)), op.id)
+        self._retry_wheel.schedule(op, retry_at)
+        
+    def _release_retries(self):
+        """到期的重试操作进入可执行分组 (需持有锁)"""
+        for op in self._retry_wheel.advance(time.monotonic()):
+            if op.status != OperationStatus.PENDING or not op.retry_at:
+                continue
+            op.retry_at = 0.0
+            self._retry_waiting -= 1
+            self._push_ready(op)
+            
+    @staticmethod
+    def _log_failure(op: FileOperation, retry_delay: Optional[float]):
+        if op.status == OperationStatus.COMPLETED:
+            return
+        from utils.logger import logger
+        if retry_delay is not None:
+            logger.warning(f"Queue op failed, retry {op.attempts} in {retry_delay:.1f}s: "
+                           f"{op.source_path} - {op.error_message}", category="queue")
+        else:
+            logger.error(f"Queue op failed: {op.source_path} - {op.error_message}", category="queue")
+            
+    def get_dead_letters(self, limit: int = 0) -> List[dict]:
+        """
+        获取重试用尽的操作 (按失败顺序)
+        
+        Args:
+            limit: 最多返回的数量 (0 表示全部)
+        """
+        with self._lock:
+            letters = list(self._dead_letters.values())
+        if limit > 0:
+            letters = letters[:limit]
+        return [{
+            "id": letter.op.id,
+            "type": letter.op.op_type.value,
+            "file": self._describe(letter.op),
+            "source": letter.op.source_path,
+            "target": letter.op.target_path,
+            "task_id": letter.op.task_id,
+            "task": letter.op.task_name,
+            "error": letter.error,
+            "attempts": letter.attempts,
+            "failed_at": letter.failed_at
+        } for letter in letters]
+        
+    def requeue_dead_letters(self, op_ids: Optional[List[str]] = None) -> int:
+        """
+        把死信列表中的操作重新加入队列 (重试次数重新计算)
+        
+        Args:
+            op_ids: 要重新入队的操作ID (None 表示全部)
+            
+        Returns:
+            重新入队的操作数
+        """
+        letters = self._take_dead_letters(op_ids)
+        ops = []
+        for letter in letters:
+            op = _operation_from_record(_new_op_id(), _operation_record(letter.op))
+            if op is not None:
+                op.retry_policy = letter.op.retry_policy
+                ops.append(op)
+        if ops:
+            self._enqueue(ops)
+        self._emit_status(force=True)
+        return len(ops)
+        
+    def discard_dead_letters(self, op_ids: Optional[List[str]] = None) -> int:
+        """
+        从死信列表中删除操作
+        
+        Args:
+            op_ids: 要删除的操作ID (None 表示全部)
+            
+        Returns:
+            删除的操作数
+        """
+        count = len(self._take_dead_letters(op_ids))
+        self._emit_status(force=True)
+        return count
+        
+    def _take_dead_letters(self, op_ids: Optional[List[str]]) -> List[DeadLetter]:
+        with self._lock:
+            if op_ids is None:
+                letters = list(self._dead_letters.values())
+                self._dead_letters.clear()
+            else:
+                letters = [self._dead_letters.pop(op_id) for op_id in op_ids if op_id in self._dead_letters]
+        if letters and self._journal is not None:
+            self._journal.remove_dead_letters(None if op_ids is None else [letter.op.id for letter in letters])
+        return letters
+            
+    def _release_dependents(self, op: FileOperation):
+        """操作完成后，前序冲突操作已全部完成的后续操作进入可执行分组 (需持有锁)"""
+        for dependent_id in self._dependents.pop(op.id, ()):
+            remaining = self._blockers.get(dependent_id)
+            if remaining is None:
+                continue
+            if remaining > 1:
+                self._blockers[dependent_id] = remaining - 1
+                continue
+            del self._blockers[dependent_id]
+            self._blocked_by.pop(dependent_id, None)
+            self._push_ready(self._pending_ops[dependent_id])
     
+    def update_bytes(self, op: FileOperation, done: int, total: int):
+        """
+        更新操作的字节进度 (由执行器在复制过程中调用)
+        
+        Args:
+            op: 正在执行的操作
+            done: 已复制字节数
+            total: 文件总字节数
+        """
+        with self._lock:
+            if total != op.bytes_total:
+                self._bytes_total += total - op.bytes_total
+                op.bytes_total = total
+            op.bytes_done = done
+        self._emit_status()
+        
     def set_executor(self, executor: Callable[[FileOperation], Tuple[bool, str]]):
         """设置外部执行器"""
         self._executor = executor
@@ -243,15 +1215,22 @@ class OperationQueue:
             
             # 回退到内部简单实现
             if op.op_type == OperationType.COPY_FILE:
-                return self._do_copy(op.source_path, op.target_path)
+                progress = lambda done, total: self.update_bytes(op, done, total)
+                if len(op.targets) > 1 and os.path.isfile(op.source_path):
+                    return self._do_copy_multi(op.source_path, op.targets, progress)
+                return self._do_copy(op.source_path, op.target_path, progress)
+            elif op.op_type == OperationType.COPY_BATCH:
+                return self._do_copy_batch(op.batch)
             elif op.op_type == OperationType.DELETE_FILE:
                 return self._do_delete(op.source_path)
+            elif op.op_type == OperationType.CREATE_DIR:
+                return self._do_mkdir(op.source_path)
             else:
                 return False, f"Unknown operation type: {op.op_type}"
         except Exception as e:
             return False, str(e)
     
-    def _do_copy(self, source: str, target: str) -> tuple:
+    def _do_copy(self, source: str, target: str, progress: Optional[ProgressCallback] = None) -> tuple:
         """执行复制"""
         try:
             if not os.path.exists(source):
@@ -261,17 +1240,56 @@ class OperationQueue:
             if target_dir and not os.path.exists(target_dir):
                 os.makedirs(target_dir, exist_ok=True)
             
+            # 同一写时复制卷上克隆，否则使用内核零拷贝复制
             if os.path.isdir(source):
                 if os.path.exists(target):
                     shutil.rmtree(target)
-                shutil.copytree(source, target)
+                shutil.copytree(source, target, copy_function=copy_file)
             else:
-                shutil.copy2(source, target)
+                copy_file(source, target, progress=progress)
             
             return True, ""
         except Exception as e:
             return False, str(e)
+            
+    def _do_copy_multi(self, source: str, targets: List[str],
+                       progress: Optional[ProgressCallback] = None) -> tuple:
+        """执行多目标复制 (源文件只读取一次)"""
+        try:
+            for target in targets:
+                target_dir = os.path.dirname(target)
+                if target_dir and not os.path.exists(target_dir):
+                    os.makedirs(target_dir, exist_ok=True)
+                    
+            failures = [f"{target}: {outcome}"
+                        for target, outcome in fan_out_copy(source, targets, progress=progress).items()
+                        if not isinstance(outcome, CopyStats)]
+            if failures:
+                return False, "; ".join(failures)
+            return True, ""
+        except Exception as e:
+            return False, str(e)
     
+    def _do_copy_batch(self, items: List[Tuple[str, List[str]]]) -> tuple:
+        """执行小文件批量复制 (批次内缓存已创建的目录)"""
+        created_dirs = set()
+        failures = []
+        for source, targets in items:
+            try:
+                for target in targets:
+                    target_dir = os.path.dirname(target)
+                    if target_dir and target_dir not in created_dirs:
+                        os.makedirs(target_dir, exist_ok=True)
+                        created_dirs.add(target_dir)
+                for target, outcome in copy_small_file(source, targets).items():
+                    if not isinstance(outcome, CopyStats):
+                        failures.append(f"{target}: {outcome}")
+            except Exception as e:
+                failures.append(f"{source}: {e}")
+        if failures:
+            return False, "; ".join(failures[:5])
+        return True, ""
+        
     def _do_delete(self, path: str) -> tuple:
         """执行删除"""
         try:
@@ -287,8 +1305,44 @@ class OperationQueue:
         except Exception as e:
             return False, str(e)
     
-    def _emit_status(self):
-        """发送状态更新信号"""
+    def _do_mkdir(self, path: str) -> tuple:
+        """执行目录创建"""
+        try:
+            os.makedirs(path, exist_ok=True)
+            return True, ""
+        except Exception as e:
+            return False, str(e)
+            
+    def _emit_status(self, force: bool = False):
+        """
+        发送状态更新信号 (不需持有锁)
+        
+        距上次发送不足 _STATUS_INTERVAL 时不立即发送，由定时器在间隔结束时发送一次最新状态，
+        大量入队或快速完成的操作不会产生同样多的跨线程信号。
+        
+        Args:
+            force: 立即发送 (暂停、恢复、清空和队列执行完毕时)
+        """
+        with self._status_lock:
+            now = time.monotonic()
+            wait = self._last_status_emit + _STATUS_INTERVAL - now
+            if not force and wait > 0:
+                if self._status_timer is None:
+                    self._status_timer = threading.Timer(wait, self._flush_status)
+                    self._status_timer.daemon = True
+                    self._status_timer.start()
+                return
+            self._last_status_emit = now
+        self._publish_status()
+        
+    def _flush_status(self):
+        """定时器到期: 发送间隔内合并的状态"""
+        with self._status_lock:
+            self._status_timer = None
+            self._last_status_emit = time.monotonic()
+        self._publish_status()
+        
+    def _publish_status(self):
         try:
             status = self.get_status()
             self.signals.queue_status_changed.emit(status)
@@ -296,16 +1350,25 @@ class OperationQueue:
             pending = status["pending"]
             completed = status["completed"]
             total = pending + completed
-            self.signals.progress_updated.emit(completed, total, status["current_file"])
+            self.signals.progress_updated.emit(completed, total, status["bytes_done"],
+                                               status["bytes_total"], status["current_file"])
         except Exception:
             pass
     
     def shutdown(self):
-        """关闭队列"""
-        self._is_running = False
-        self._queue.put(None)
-        if self._worker_thread.is_alive():
-            self._worker_thread.join(timeout=2.0)
+        """关闭队列 (执行中的操作最多等待 2 秒)"""
+        with self._cond:
+            self._is_running = False
+            workers = list(self._workers)
+            self._workers.clear()
+            self._cond.notify_all()
+        deadline = time.monotonic() + 2.0
+        for thread in workers:
+            if thread.is_alive():
+                thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        # 未执行的操作留在日志中，下次启动时恢复
+        if self._journal is not None:
+            self._journal.flush()
 
 
 # 全局实例
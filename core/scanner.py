@@ -3,12 +3,88 @@
 提供可追踪、可配置的文件扫描功能
 """
 import os
-import fnmatch
-from typing import List, Optional
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 from utils.logger import logger
+from utils.path_filter import PathFilter
+
+
+# 增量扫描模式
+SCAN_MODE_FULL = "full"            # 总是列出所有目录
+SCAN_MODE_STAT = "stat"            # 目录未变化时不再列出，只 stat 其中已知的文件
+SCAN_MODE_STRUCTURE = "structure"  # 目录未变化时直接沿用上次的文件记录 (只能发现增删和重命名)
+SCAN_MODES = (SCAN_MODE_FULL, SCAN_MODE_STAT, SCAN_MODE_STRUCTURE)
+
+# 目录修改时间距上次扫描开始不足该秒数时不可信 (同一时间刻度内的修改无法从 mtime 区分)
+_RACY_WINDOW = 2.0
+# 未能完整列出的目录记录为该值，下次扫描时必定重新列出
+_UNLISTED = -1
+
+
+class ScanEntry(NamedTuple):
+    """扫描记录 (相对路径 + 扫描时已获取的元数据)"""
+    rel_path: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+class ScanBaseline:
+    """
+    上次扫描的结果 (增量扫描的比对基准)
+    POSIX 下目录的 mtime 只在其中的条目增删或重命名时改变，
+    mtime 未变的目录无需重新列出
+    """
+    
+    def __init__(self, files: Dict[str, ScanEntry], dirs: Dict[str, int] = None, started_at: float = 0):
+        """
+        Args:
+            files: {相对路径: ScanEntry}
+            dirs: {目录相对路径前缀 ("" 为根目录，其余以分隔符结尾): mtime_ns}
+            started_at: 上次扫描的开始时间 (时间戳)
+        """
+        self.files = files
+        self.dirs = dirs or {}
+        self.started_at = started_at
+        # 在此之后修改过的目录需要重新列出
+        self._trusted_before_ns = int((started_at - _RACY_WINDOW) * 1_000_000_000)
+        self._build_tree()
+        
+    def is_unchanged(self, rel_dir: str, mtime_ns: int) -> bool:
+        """目录是否与上次扫描时一致"""
+        return mtime_ns < self._trusted_before_ns and self.dirs.get(rel_dir) == mtime_ns
+        
+    def _build_tree(self):
+        """按目录分组文件记录和子目录"""
+        sep = os.sep
+        files_by_dir: Dict[str, List[ScanEntry]] = {}
+        for entry in self.files.values():
+            head, _, _ = entry.rel_path.rpartition(sep)
+            files_by_dir.setdefault(head + sep if head else "", []).append(entry)
+        subdirs: Dict[str, List[str]] = {}
+        for rel_dir in self.dirs:
+            if rel_dir:
+                head, _, _ = rel_dir[:-1].rpartition(sep)
+                subdirs.setdefault(head + sep if head else "", []).append(rel_dir)
+        self._files_by_dir = files_by_dir
+        self._subdirs = subdirs
+        
+    def files_in(self, rel_dir: str) -> List[ScanEntry]:
+        """目录中上次记录的文件"""
+        return self._files_by_dir.get(rel_dir, [])
+        
+    def subdirs_of(self, rel_dir: str) -> List[str]:
+        """目录中上次记录的子目录"""
+        return self._subdirs.get(rel_dir, [])
+
 
 class Scanner:
-    def __init__(self, root_path: str, include_patterns: List[str] = None, exclude_patterns: List[str] = None):
+    def __init__(self, root_path: str, include_patterns: List[str] = None, exclude_patterns: List[str] = None,
+                 path_filter: Optional[PathFilter] = None, workers: int = 1,
+                 baseline: Optional[ScanBaseline] = None, mode: str = SCAN_MODE_STAT,
+                 track_dirs: bool = False):
         """
         初始化扫描器
         
@@ -16,10 +92,27 @@ class Scanner:
             root_path: 扫描根目录
             include_patterns: 包含模式列表
             exclude_patterns: 排除模式列表
+            path_filter: 预编译的过滤器 (提供时忽略 include/exclude 参数)
+            workers: 并行遍历线程数 (1 表示单线程)
+            baseline: 上次扫描的结果，提供时按 mode 跳过未变化的目录
+            mode: 增量扫描模式 (SCAN_MODE_*)
+            track_dirs: 是否记录目录修改时间 (供下次增量扫描使用，提供 baseline 时自动开启)
         """
         self.root_path = os.path.abspath(root_path)
-        self.include_patterns = include_patterns or []
-        self.exclude_patterns = exclude_patterns or []
+        if path_filter is None:
+            path_filter = PathFilter(include_patterns, exclude_patterns)
+        self.path_filter = path_filter.with_root(self.root_path)
+        self.include_patterns = self.path_filter.include_patterns
+        self.exclude_patterns = self.path_filter.exclude_patterns
+        self.workers = max(1, int(workers or 1))
+        self.mode = mode if mode in SCAN_MODES else SCAN_MODE_STAT
+        self.baseline = baseline if self.mode != SCAN_MODE_FULL else None
+        self.track_dirs = track_dirs or self.baseline is not None
+        
+        # 扫描结果: 各目录的 mtime_ns 与扫描开始时间，可组成下一次的 ScanBaseline
+        self.dir_mtimes: Dict[str, int] = {}
+        self.started_at = 0.0
+        self.reused_dirs = 0
         
     def scan(self) -> List[str]:
         """
@@ -28,89 +121,206 @@ class Scanner:
         Returns:
             只有符合条件的文件绝对路径列表
         """
-        files = []
+        root = self.root_path
+        return [os.path.join(root, entry.rel_path) for entry in self.iter_entries()]
+        
+    def iter_entries(self) -> Iterator[ScanEntry]:
+        """
+        流式扫描 (基于 os.scandir)
+        
+        逐个产出符合条件的文件记录，复用 DirEntry 缓存的类型与 stat 信息，
+        调用方无需再次 stat 即可获得大小、修改时间和 inode。
+        workers > 1 时使用并行遍历，产出顺序不固定。
+        
+        Yields:
+            ScanEntry(rel_path, size, mtime_ns, inode)
+        """
         if not os.path.exists(self.root_path):
             logger.warning(f"[Scanner]Root path does not exist: {self.root_path}", category="scan")
-            return files
+            return
             
         logger.debug(f"[Scanner] Start scanning: {self.root_path}", category="scan")
         logger.debug(f"[Scanner] Includes: {self.include_patterns}", category="scan")
         logger.debug(f"[Scanner] Excludes: {self.exclude_patterns}", category="scan")
-        
+        if self.workers > 1:
+            logger.debug(f"[Scanner] Parallel traversal with {self.workers} workers", category="scan")
+            
+        self.dir_mtimes = {}
+        self.started_at = time.time()
+        self.reused_dirs = 0
+        count = 0
+        entries = self._iter_parallel() if self.workers > 1 else self._iter_serial()
         try:
-            for root, dirs, filenames in os.walk(self.root_path):
-                # 1. 目录过滤 (修剪遍历树)
-                i = 0
-                while i < len(dirs):
-                    d = dirs[i]
-                    d_path = os.path.join(root, d)
-                    
-                    if self._should_exclude(d, d_path, is_dir=True):
-                        # logger.debug(f"[Scanner] Pruning directory: {d_path}", category="scan")
-                        del dirs[i]
-                    else:
-                        i += 1
-                
-                # 2. 文件过滤
-                for filename in filenames:
-                    f_path = os.path.join(root, filename)
-                    if self._should_include(filename, f_path):
-                        files.append(f_path)
-                    # else:
-                        # logger.debug(f"[Scanner] Skipping file: {f_path}", category="scan")
-                        
+            for entry in entries:
+                count += 1
+                yield entry
         except Exception as e:
             logger.error(f"[Scanner] Scan failed: {e}", category="scan")
+        finally:
+            # 调用方提前结束迭代时，确保并行工作线程被回收
+            entries.close()
             
-        logger.debug(f"[Scanner] Scan finished. Found {len(files)} files.", category="scan")
-        return files
-
-    def _should_exclude(self, name: str, path: str, is_dir: bool = False) -> bool:
-        """检查是否应该排除"""
-        for pattern in self.exclude_patterns:
-            # 1. 匹配名称 (例如 "*.git")
-            if fnmatch.fnmatch(name, pattern):
-                return True
-                
-            # 2. 匹配路径 (例如 "C:\Backup\Target")
-            # 注意: fnmatch 对路径分隔符敏感，需标准化
-            # 如果 pattern 包含分隔符，或者是绝对路径，则尝试匹配完整路径
-            if os.sep in pattern or (os.name == 'nt' and ':' in pattern):
-                # 归一化路径分隔符
-                norm_pattern = os.path.normpath(pattern)
-                norm_path = os.path.normpath(path)
-                
-                # 如果是目录，我们要确保不仅仅是前缀匹配，而是完全匹配或者是子目录
-                if is_dir:
-                    # 检查 path 是否是 pattern 的子目录或者就是 pattern
-                    # 例如 pattern="C:/Backup", path="C:/Backup/Sub" -> 应该排除
-                    # 但os.walk是从上到下的，所以当我们遇到 "C:/Backup" 时排除即可
-                    if norm_path == norm_pattern:
-                        return True
-                    # 如果 pattern 是 "C:/Backup"，而我们正在扫描 "C:/" 下的 "Backup" 目录
-                    if norm_path.startswith(norm_pattern + os.sep):
-                         return True
+        if self.baseline is not None:
+            logger.debug(f"[Scanner] Scan finished. Found {count} files, "
+                         f"{self.reused_dirs}/{len(self.dir_mtimes)} dirs unchanged.", category="scan")
+        else:
+            logger.debug(f"[Scanner] Scan finished. Found {count} files.", category="scan")
+        
+    def get_baseline(self, files: Dict[str, ScanEntry]) -> ScanBaseline:
+        """用本次扫描的结果构建下一次增量扫描的基准"""
+        return ScanBaseline(files, self.dir_mtimes, self.started_at)
+        
+    def _list_dir(self, dir_path: str, rel_dir: str,
+                  mtime_ns: Optional[int] = None) -> Tuple[List[ScanEntry], List[Tuple[str, str, Optional[int]]]]:
+        """
+        列出单个目录
+        
+        Args:
+            dir_path: 目录绝对路径
+            rel_dir: 相对路径前缀
+            mtime_ns: 目录修改时间 (未知时为 None)
+            
+        Returns:
+            (该目录下符合条件的文件记录, 未被排除的子目录 [(绝对路径, 相对路径前缀, mtime_ns)])
+        """
+        if self.track_dirs:
+            if mtime_ns is None:
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except OSError as e:
+                    logger.debug(f"[Scanner] Cannot stat {dir_path}: {e}", category="scan")
+                    self.dir_mtimes[rel_dir] = _UNLISTED
+                    return [], []
+            if self.baseline is not None and self.baseline.is_unchanged(rel_dir, mtime_ns):
+                files, subdirs = self._reuse_dir(dir_path, rel_dir)
+                self._record_dir(rel_dir, mtime_ns, subdirs)
+                return files, subdirs
                 
-                if fnmatch.fnmatch(norm_path, norm_pattern):
-                    return True
-                    
-        return False
-
-    def _should_include(self, name: str, path: str) -> bool:
-        """检查是否应该包含"""
-        # 首先检查显式的排除
-        if self._should_exclude(name, path, is_dir=False):
-            return False
+        files = []
+        subdirs = []
+        try:
+            it = os.scandir(dir_path)
+        except OSError as e:
+            # 与 os.walk 一致: 无法列出的目录直接跳过
+            logger.debug(f"[Scanner] Cannot list {dir_path}: {e}", category="scan")
+            if self.track_dirs:
+                self.dir_mtimes[rel_dir] = _UNLISTED
+            return files, subdirs
+        
+        match_name = self.path_filter.match_name
+        try:
+            with it:
+                for entry in it:
+                    name = entry.name
+                    rel_path = rel_dir + name if rel_dir else name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                        
+                    if is_dir:
+                        # 1. 目录过滤 (修剪遍历树)，与 os.walk 一样不跟随符号链接
+                        if entry.is_symlink():
+                            continue
+                        if match_name(name, entry.path, is_dir=True):
+                            sub_mtime = None
+                            if self.track_dirs:
+                                try:
+                                    sub_mtime = entry.stat().st_mtime_ns
+                                except OSError:
+                                    pass
+                            subdirs.append((entry.path, rel_path + os.sep, sub_mtime))
+                        continue
+                        
+                    # 2. 文件过滤
+                    if not match_name(name, entry.path):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        # 文件在扫描过程中被删除
+                        continue
+                    files.append(ScanEntry(rel_path, st.st_size, st.st_mtime_ns, entry.inode()))
+        except OSError as e:
+            logger.debug(f"[Scanner] Listing interrupted {dir_path}: {e}", category="scan")
+            if self.track_dirs:
+                self.dir_mtimes[rel_dir] = _UNLISTED
+            return files, subdirs
             
-        # 如果没有包含模式，默认包含所有
-        if not self.include_patterns:
-            return True
+        # 只记录完整列出的目录 (mtime 取自列出之前，列出期间的变化会在下次扫描时发现)
+        if self.track_dirs:
+            self._record_dir(rel_dir, mtime_ns, subdirs)
+        return files, subdirs
+        
+    def _record_dir(self, rel_dir: str, mtime_ns: int, subdirs: List[Tuple[str, str, Optional[int]]]):
+        """记录目录的修改时间，子目录先登记为未列出 (扫描中断时下次仍会被访问)"""
+        dir_mtimes = self.dir_mtimes
+        dir_mtimes[rel_dir] = mtime_ns
+        for _, sub_rel, _ in subdirs:
+            dir_mtimes.setdefault(sub_rel, _UNLISTED)
             
-        # 检查包含模式
-        for pattern in self.include_patterns:
-            if fnmatch.fnmatch(name, pattern):
-                return True
-            if fnmatch.fnmatch(path, pattern):
-                return True
-                
-        return False
+    def _reuse_dir(self, dir_path: str, rel_dir: str) -> Tuple[List[ScanEntry], List[Tuple[str, str, Optional[int]]]]:
+        """目录未变化: 沿用上次的条目列表，不再列出目录"""
+        self.reused_dirs += 1
+        baseline = self.baseline
+        match_name = self.path_filter.match_name
+        root = self.root_path
+        files = []
+        for known in baseline.files_in(rel_dir):
+            path = os.path.join(root, known.rel_path)
+            # 过滤规则可能已收紧，沿用前重新检查
+            if not match_name(os.path.basename(known.rel_path), path):
+                continue
+            if self.mode == SCAN_MODE_STRUCTURE:
+                files.append(known)
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append(ScanEntry(known.rel_path, st.st_size, st.st_mtime_ns, st.st_ino))
+            
+        subdirs = []
+        for sub_rel in baseline.subdirs_of(rel_dir):
+            path = os.path.join(root, sub_rel[:-1])
+            if match_name(os.path.basename(sub_rel[:-1]), path, is_dir=True):
+                subdirs.append((path, sub_rel, None))
+        return files, subdirs
+        
+    def _iter_serial(self) -> Iterator[ScanEntry]:
+        """单线程深度优先遍历"""
+        # 显式栈代替递归: (绝对路径, 相对路径前缀, mtime_ns)
+        stack = [(self.root_path, "", None)]
+        while stack:
+            dir_path, rel_dir, mtime_ns = stack.pop()
+            files, subdirs = self._list_dir(dir_path, rel_dir, mtime_ns)
+            yield from files
+            # 逆序入栈，保持与 os.walk 相近的遍历顺序
+            stack.extend(reversed(subdirs))
+            
+    def _iter_parallel(self) -> Iterator[ScanEntry]:
+        """
+        多线程遍历
+        子目录分发给有界线程池并行列出，结果在调用线程中按完成顺序产出。
+        适用于 NAS/机械硬盘等列目录受 I/O 延迟限制的场景。
+        """
+        pending_dirs = deque([(self.root_path, "", None)])
+        max_in_flight = self.workers * 4
+        in_flight = set()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scanner")
+        try:
+            while pending_dirs or in_flight:
+                # 补充在途任务 (限制数量，避免一次性提交数十万个目录)
+                while pending_dirs and len(in_flight) < max_in_flight:
+                    dir_path, rel_dir, mtime_ns = pending_dirs.popleft()
+                    in_flight.add(executor.submit(self._list_dir, dir_path, rel_dir, mtime_ns))
+                    
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    pending_dirs.extend(subdirs)
+                    yield from files
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
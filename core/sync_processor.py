@@ -2,22 +2,54 @@
 同步处理器模块
 """
 import os
+import time
 import shutil
-from typing import List, Tuple, Dict, Callable, Optional
+from typing import List, Set, Tuple, Dict, Callable, Iterable, Optional
 from dataclasses import dataclass, field
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from threading import Lock
 
 from utils.constants import SyncMode, ConflictStrategy, FileEventType
 from utils.file_utils import (
-    safe_copy_file, safe_delete_file, safe_move_file,
-    get_relative_path, scan_directory, compare_files,
-    format_file_size, get_file_size, match_file_patterns
+    copy_file_with_stats, copy_file_to_targets_with_stats, safe_delete_file, safe_move_file,
+    get_relative_path, scan_directory,
+    format_file_size, get_file_size
 )
+from utils.path_filter import PathFilter
+from utils.copy_engine import DURABILITY_FILE, ProgressCallback
 from utils.logger import logger
 from .conflict_handler import ConflictHandler
 from .file_monitor import FileEvent
-from .scanner import Scanner
+from .scanner import Scanner, ScanEntry, SCAN_MODE_FULL, SCAN_MODE_STAT
+from .metadata_index import MetadataIndex
+from .hash_cache import hash_cache
+from .hash_service import hash_service
+
+
+# 全量同步时每个工作线程允许的在途任务数 (限制内存占用)
+_IN_FLIGHT_PER_WORKER = 64
+
+# 哈希比较模式下每批预先计算哈希的文件数
+_HASH_BATCH_SIZE = 256
+
+# 需要读取文件内容的比较方式
+_CONTENT_COMPARE_METHODS = ("hash", "fingerprint")
+
+# 批量操作失败时在错误信息中列出的条目数
+_BATCH_ERRORS_SHOWN = 5
+
+# 已确认存在的目标目录缓存上限 (超过后清空重建)
+_DIR_CACHE_LIMIT = 65536
+
+
+def _with_ancestors(rel_dirs: Iterable[str]) -> Set[str]:
+    """相对目录及其全部上级目录 (不含根目录)"""
+    result: Set[str] = set()
+    for rel_dir in set(rel_dirs):
+        while rel_dir and rel_dir not in result:
+            result.add(rel_dir)
+            rel_dir = os.path.dirname(rel_dir)
+    return result
 
 
 @dataclass
@@ -31,6 +63,16 @@ class SyncResult:
     file_size: int = 0
 
 
+@dataclass
+class _PendingCopy:
+    """需要复制的目标 (由 _plan_file 生成，复制完成后转换为 SyncResult)"""
+    target_file: str
+    dest: str          # 实际写入的路径 (冲突保留双方时为重命名后的路径)
+    message: str       # 复制成功时的说明
+    error_path: str    # 复制失败时记录的目标路径
+    error_prefix: str  # 复制失败时的说明前缀
+
+
 @dataclass
 class SyncStats:
     """同步统计"""
@@ -40,6 +82,10 @@ class SyncStats:
     skipped_files: int = 0
     failed_files: int = 0
     total_size: int = 0
+    # 复制方式 -> 文件数，以及实际复制的字节数和耗时 (用于计算复制速度)
+    copy_methods: Dict[str, int] = field(default_factory=dict)
+    copy_bytes: int = 0
+    copy_seconds: float = 0.0
     
     def reset(self):
         self.total_files = 0
@@ -48,6 +94,9 @@ class SyncStats:
         self.skipped_files = 0
         self.failed_files = 0
         self.total_size = 0
+        self.copy_methods = {}
+        self.copy_bytes = 0
+        self.copy_seconds = 0.0
 
 
 @dataclass
@@ -71,33 +120,110 @@ class SyncProcessor:
                  include_patterns: List[str] = None,
                  exclude_patterns: List[str] = None,
                  max_workers: int = 4,
-                 disable_delete: bool = False):
+                 disable_delete: bool = False,
+                 path_filter: Optional[PathFilter] = None,
+                 scan_workers: int = 1,
+                 task_id: str = "",
+                 metadata_index: Optional[MetadataIndex] = None,
+                 index_max_age: float = 0,
+                 scan_mode: str = SCAN_MODE_STAT,
+                 compare_method: str = "mtime",
+                 buffer_size: int = 1024 * 1024,
+                 use_reflink: bool = True,
+                 durability: str = DURABILITY_FILE,
+                 resumable_threshold: int = 0,
+                 delta_sync: bool = False,
+                 delta_in_place: bool = False):
         """
         初始化同步处理器
+        
+        Args:
+            path_filter: 任务级预编译过滤器 (提供时忽略 include/exclude 参数)
+            scan_workers: 目录扫描并行线程数
+            task_id: 任务ID (元数据索引按任务存放快照)
+            metadata_index: 元数据索引，为 None 时不记录快照
+            index_max_age: 单向同步时目标快照的可信时长(秒)，超过后重新扫描目标，0 表示总是扫描
+            scan_mode: 有索引时的增量扫描模式 (见 scanner.SCAN_MODE_*)
+            compare_method: 文件比较方式 (mtime, hash, fingerprint)
+            buffer_size: 无法使用内核复制时的复制缓冲区大小
+            use_reflink: 源和目标位于同一写时复制卷 (btrfs/XFS) 时是否克隆而非复制
+            durability: 复制的持久化策略 (none, file, full)
+            resumable_threshold: 不小于该大小(字节)的文件分块复制，失败重试时从断点继续 (0 表示不启用)
+            delta_sync: 目标已有旧版本的大文件按块比较，只传输变化的部分
+            delta_in_place: 增量传输时允许原地修补目标 (不经临时文件，中断后目标可能新旧混杂)
         """
         self.source_path = os.path.abspath(source_path)
         self.target_paths = [os.path.abspath(p) for p in target_paths]
         self.sync_mode = sync_mode
-        self.conflict_handler = ConflictHandler(conflict_strategy)
-        self.include_patterns = include_patterns or []
-        self.exclude_patterns = exclude_patterns or []
+        self.compare_method = compare_method
+        self.conflict_handler = ConflictHandler(conflict_strategy, compare_method=compare_method)
+        if path_filter is None:
+            path_filter = PathFilter(include_patterns, exclude_patterns)
+        self.path_filter = path_filter
+        self.include_patterns = path_filter.include_patterns
+        self.exclude_patterns = path_filter.exclude_patterns
+        # 按根目录绑定的过滤器 (源 + 各目标)，检查时可逐级识别被排除的上级目录
+        self._root_filters: Dict[str, PathFilter] = {
+            root: path_filter.with_root(root) for root in [self.source_path] + self.target_paths
+        }
         self.max_workers = max_workers
+        self.scan_workers = scan_workers
         self.disable_delete = disable_delete
+        self.task_id = task_id
+        self.metadata_index = metadata_index
+        self.index_max_age = index_max_age
+        self.scan_mode = scan_mode
+        self.buffer_size = buffer_size
+        self.use_reflink = use_reflink
+        self.durability = durability
+        self.resumable_threshold = resumable_threshold
+        self.delta_sync = delta_sync
+        self.delta_in_place = delta_in_place
+        # 索引根目录按长度降序，嵌套目录优先匹配更深的根
+        self._index_roots = sorted(self._root_filters, key=len, reverse=True)
         
         self._stats = SyncStats()
         self._stats_lock = Lock()
+        # 最近一次 scan_and_plan 各阶段耗时 (秒): targets, source, index, orphans
+        self.last_plan_timings: Dict[str, float] = {}
+        # 已创建或已确认存在的目录 (复制时命中则不再检查目标目录)
+        self._known_dirs: Set[str] = set()
         self._progress_callback: Optional[Callable[[int, int, str], None]] = None
         self._is_running = False
         self._should_stop = False
         
-    def execute_op(self, op_type: str, source: str, target: str) -> Tuple[bool, str]:
-        """执行单个操作 (供 OperationQueue 调用)"""
+    def execute_op(self, op_type: str, source: str, target: str,
+                   progress: Optional[ProgressCallback] = None,
+                   targets: Optional[List[str]] = None) -> Tuple[bool, str]:
+        """
+        执行单个操作 (供 OperationQueue 调用，progress 接收复制的字节进度)
+        
+        复制操作带有多个目标 (targets) 时，源文件只读取一次并同时写入所有目标。
+        """
         try:
             if op_type == "copy":
                 # 检查是文件还是目录
-                if os.path.isfile(source):
+                if targets and len(targets) > 1 and os.path.isfile(source):
+                    results = self._sync_file_multi(source, targets, False, progress)
+                    failures = []
+                    for result in results:
+                        self._index_result(result)
+                        if not result.success:
+                            failures.append(f"{result.target_path}: {result.message}")
+                    if failures:
+                        return False, "; ".join(failures)
+                    return True, results[0].message
+                    
+                elif targets and len(targets) > 1 and os.path.isdir(source):
+                    for path in targets:
+                        if not os.path.exists(path):
+                            os.makedirs(path, exist_ok=True)
+                    return True, "Directory created"
+                    
+                elif os.path.isfile(source):
                      # 文件复制 - 严格走文件同步逻辑
-                     result = self._sync_file(source, target, False)
+                     result = self._sync_file(source, target, False, progress)
+                     self._index_result(result)
                      return result.success, result.message
                 
                 elif os.path.isdir(source):
@@ -109,6 +235,12 @@ class SyncProcessor:
                 else:
                     return False, f"Source not found: {source}"
                 
+            elif op_type == "mkdir":
+                # 计划中的目录按深度依次创建，随后的复制直接命中目录缓存
+                os.makedirs(source, exist_ok=True)
+                self._dir_cache().add(source)
+                return True, "Directory created"
+                
             elif op_type == "delete":
                 result = self._sync_deletion(source, target) # target here might be base path?
                 # 注意: _sync_deletion 的参数是 (deleted_path, target_base)
@@ -128,6 +260,8 @@ class SyncProcessor:
                 # op_type="delete", source=dst_path (要删除的文件), target=""
                 
                 success, error = safe_delete_file(source)
+                if success:
+                    self._index_forget(source)
                 return success, error
             
             else:
@@ -136,71 +270,354 @@ class SyncProcessor:
         except Exception as e:
             return False, str(e)
 
-    def scan_and_plan(self, delete_orphans: bool = False) -> List[dict]:
+    def execute_copy_batch(self, items: List[Tuple[str, List[str]]]) -> Tuple[bool, str]:
         """
-        扫描并生成同步计划 (不执行操作)
+        执行小文件批量复制 (供 OperationQueue 调用)
         
+        使用处理器的目录缓存，不逐个文件报告字节进度。
+        
+        Args:
+            items: [(源文件路径, 目标文件路径列表)]
+            
         Returns:
-            List[dict]: 操作列表 [{"op_type": "copy"|"delete", "source": "...", "target": "..."}]
+            (全部成功标志, 失败信息)
         """
-        plans = []
+        dir_cache = self._dir_cache()
+        failures = []
+        for source, targets in items:
+            try:
+                results = self._sync_file_multi(source, targets, dir_cache=dir_cache)
+            except Exception as e:
+                failures.append(f"{source}: {e}")
+                continue
+            for result in results:
+                self._index_result(result)
+                if not result.success:
+                    failures.append(f"{result.target_path}: {result.message}")
+        if failures:
+            more = f" (共 {len(failures)} 个失败)" if len(failures) > _BATCH_ERRORS_SHOWN else ""
+            return False, "; ".join(failures[:_BATCH_ERRORS_SHOWN]) + more
+        return True, f"{len(items)} 个文件已同步"
         
-        # 扫描源目录 (返回绝对路径列表)
-        source_scanner = Scanner(self.source_path, self.include_patterns, self.exclude_patterns)
-        source_list = source_scanner.scan()
+    def scan_and_plan(self, delete_orphans: bool = False) -> List[dict]:
+        """
+        扫描并生成同步计划 (不执行操作)
+        
+        源与目标直接用扫描时已获取的大小和 mtime_ns 在内存中比对，
+        未变化的文件不产生任何额外的系统调用。各阶段耗时记录在 last_plan_timings 中。
         
-        # 转换为相对路径 -> 绝对路径的字典
-        source_files = {get_relative_path(p, self.source_path): p for p in source_list}
-        logger.debug(f"[Scan] Source: {len(source_list)} files in {self.source_path}", category="sync")
+        计划按依赖顺序排列: 先按深度创建目标上缺少的目录 (每个目录一次)，再复制文件，
+        最后由深到浅删除孤儿；源中已不存在、且其中只有孤儿文件的整个目录合并为一次删除。
         
-        # 处理每个目标目录
+        Returns:
+            List[dict]: 操作列表 [{"op_type": "mkdir"|"copy"|"delete", "source": "...", "target": "..."}]，
+                        复制操作附带源文件大小 "size"
+        """
+        copies = []
+        timings = {}
+        # 目录可能在两次同步之间被删除，重新确认
+        self._known_dirs.clear()
+        phase_start = time.perf_counter()
+        
+        # 先获取所有目标目录的文件记录 (相对路径 -> 扫描记录)，源目录随后流式消费
+        targets = []
         for target_base in self.target_paths:
-            # 1. 扫描目标目录
-            target_scanner = Scanner(target_base, self.include_patterns, self.exclude_patterns)
-            target_list = target_scanner.scan()
-            target_files = {get_relative_path(p, target_base): p for p in target_list}
-            logger.debug(f"[Scan] Target: {len(target_list)} files in {target_base}", category="sync")
-            
-            # 2. 处理需要复制/更新的文件 (源 -> 目标)
-            changes_count = 0
-            for rel_path, src_path in source_files.items():
-                dst_path = os.path.join(target_base, rel_path)
+            target_files, from_index = self._get_target_entries(target_base)
+            logger.debug(f"[Scan] Target: {len(target_files)} files in {target_base}"
+                         f"{' (index)' if from_index else ''}", category="sync")
+            targets.append((target_base, target_files))
+        timings["targets"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+            
+        # 扫描源目录: 边扫描边比对，无需先构建完整的源文件列表
+        source_scanner = self._create_scanner(self.source_path)
+        source_entries = []
+        source_rel_paths = set()
+        changes_counts = [0] * len(targets)
+        # 各目标中新增文件所在的相对目录
+        new_dirs: List[Set[str]] = [set() for _ in targets]
+        # 哈希比较模式下大小相同但修改时间不同的文件: 扫描完成后批量计算哈希再决定
+        hash_candidates = []
+        for entry in source_scanner.iter_entries():
+            rel_path = entry.rel_path
+            source_entries.append(entry)
+            source_rel_paths.add(rel_path)
+            src_path = os.path.join(self.source_path, rel_path)
+        
+            for i, (target_base, target_files) in enumerate(targets):
+                # 检查是否需要更新 (目标扫描结果已包含存在性、大小和修改时间)
+                known = target_files.get(rel_path)
+                if known is None:
+                    message = "文件新增"
+                    new_dirs[i].add(os.path.dirname(rel_path))
+                elif known.size != entry.size or known.mtime_ns != entry.mtime_ns:
+                    # 与 ConflictHandler.check_conflict 一致: 大小或修改时间不同即需处理，
+                    # 具体是否覆盖由执行时的冲突策略决定
+                    message = "文件更新"
+                else:
+                    continue
+                plan = {
+                    "op_type": "copy",
+                    "source": src_path,
+                    "target": os.path.join(target_base, rel_path),
+                    "message": message,
+                    "size": entry.size
+                }
+                if (known is not None and known.size == entry.size and
+                        self.compare_method in _CONTENT_COMPARE_METHODS):
+                    hash_candidates.append((i, plan))
+                    continue
+                copies.append(plan)
+                changes_counts[i] += 1
                 
-                # 检查是否需要更新
-                if not os.path.exists(dst_path):
-                     plans.append({
-                        "op_type": "copy",
-                        "source": src_path,
-                        "target": dst_path,
-                        "message": "文件新增"
-                    })
-                     changes_count += 1
-                elif not compare_files(src_path, dst_path):
-                    plans.append({
-                        "op_type": "copy",
-                        "source": src_path,
-                        "target": dst_path,
-                        "message": "文件更新"
-                    })
-                    changes_count += 1
+        if hash_candidates:
+            hash_start = time.perf_counter()
+            if self.compare_method == "fingerprint":
+                # 指纹不同的文件内容必然不同，直接加入计划，其余再比较完整哈希
+                matched = []
+                for i, plan in hash_candidates:
+                    if self._fingerprints_match(plan["source"], plan["target"]):
+                        matched.append((i, plan))
+                    else:
+                        copies.append(plan)
+                        changes_counts[i] += 1
+                hash_candidates = matched
+            digests = hash_service.hash_files(
+                path for _, plan in hash_candidates for path in (plan["source"], plan["target"]))
+            for i, plan in hash_candidates:
+                source_hash = digests.get(plan["source"])
+                if source_hash and source_hash == digests.get(plan["target"]):
+                    continue
+                copies.append(plan)
+                changes_counts[i] += 1
+            timings["hash"] = time.perf_counter() - hash_start
+            logger.debug(f"[Scan] Hashed {len(hash_candidates)} candidate pairs in "
+                         f"{timings['hash']:.2f}s", category="sync")
+            
+        logger.debug(f"[Scan] Source: {len(source_rel_paths)} files in {self.source_path}", category="sync")
+        timings["source"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+        self._save_snapshot(self.source_path, source_scanner, source_entries)
+        timings["index"] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
             
-            logger.debug(f"[Scan] Found {changes_count} changes for target {target_base}", category="sync")
+        new_dir_paths = []
+        deletes = []
+        source_dirs = None
+        for i, (target_base, target_files) in enumerate(targets):
+            logger.debug(f"[Scan] Found {changes_counts[i]} changes for target {target_base}", category="sync")
             
-            # 3. 处理需要删除的文件 (目标 -> 孤儿)
+            # 新增文件所在、目标中还没有的目录 (含上级目录)
+            if new_dirs[i]:
+                existing = _with_ancestors(os.path.dirname(rel_path) for rel_path in target_files)
+                missing = _with_ancestors(new_dirs[i]) - existing
+                new_dir_paths.extend(os.path.join(target_base, rel_dir) for rel_dir in missing)
+                logger.debug(f"[Scan] Found {len(missing)} new directories for target {target_base}", category="sync")
+                
+            # 处理需要删除的文件 (目标 -> 孤儿)
             if delete_orphans and not self.disable_delete:
-                del_count = 0
-                for rel_path, dst_path in target_files.items():
-                    if rel_path not in source_files:
-                        plans.append({
-                            "op_type": "delete",
-                            "source": dst_path,
-                            "target": "",
-                            "message": "删除孤儿文件"
-                        })
-                        del_count += 1
-                logger.debug(f"[Scan] Found {del_count} deletions for target {target_base}", category="sync")
+                if source_dirs is None:
+                    source_dirs = _with_ancestors(os.path.dirname(rel_path) for rel_path in source_rel_paths)
+                orphan_roots: Dict[str, Optional[str]] = {}
+                # 可整体删除的目录 -> 其中的孤儿文件 (None 对应不在这类目录中的孤儿文件)
+                by_root: Dict[Optional[str], List[str]] = {}
+                for rel_path in target_files:
+                    if rel_path in source_rel_paths:
+                        continue
+                    root = self._orphan_root(os.path.dirname(rel_path), source_dirs, orphan_roots)
+                    by_root.setdefault(root, []).append(rel_path)
+                orphan_files = by_root.pop(None, [])
+                collapsed = []
+                for root, rel_paths in by_root.items():
+                    # 目录中还有被过滤或未列出的条目时逐个删除孤儿文件，不动其他文件
+                    if self._only_listed_files(target_base, root, set(rel_paths)):
+                        collapsed.append(root)
+                    else:
+                        orphan_files.extend(rel_paths)
+                del_count = len(deletes)
+                for rel_path in orphan_files:
+                    deletes.append({
+                        "op_type": "delete",
+                        "source": os.path.join(target_base, rel_path),
+                        "target": "",
+                        "message": "删除孤儿文件"
+                    })
+                for root in collapsed:
+                    deletes.append({
+                        "op_type": "delete",
+                        "source": os.path.join(target_base, root),
+                        "target": "",
+                        "message": "删除孤儿目录"
+                    })
+                del_count = len(deletes) - del_count
+                logger.debug(f"[Scan] Found {del_count} deletions ({len(collapsed)} directories) "
+                             f"for target {target_base}", category="sync")
+        timings["orphans"] = time.perf_counter() - phase_start
+        
+        # 上级目录先于子目录创建；删除由深到浅
+        new_dir_paths.sort(key=lambda path: (path.count(os.sep), path))
+        deletes.sort(key=lambda plan: plan["source"].count(os.sep), reverse=True)
+        plans = [{"op_type": "mkdir", "source": path, "target": "", "message": "创建目录"}
+                 for path in new_dir_paths]
+        plans.extend(copies)
+        plans.extend(deletes)
         
+        self.last_plan_timings = timings
+        logger.info(f"同步计划生成完成: {len(source_rel_paths)} 个源文件, {len(plans)} 个操作, 耗时 "
+                    f"目标 {timings['targets']:.2f}s / 源扫描比对 {timings['source']:.2f}s / "
+                    f"索引 {timings['index']:.2f}s / 孤儿 {timings['orphans']:.2f}s", category="sync")
         return plans
+        
+    def _orphan_root(self, rel_dir: str, source_dirs: Set[str], memo: Dict[str, Optional[str]]) -> Optional[str]:
+        """
+        孤儿文件所在的最上层可整体删除的候选目录 (没有时返回 None)
+        
+        目录下没有任何源文件且源中对应目录已不存在时作为候选，与实时同步中源目录被删除时的处理一致；
+        是否整体删除还需确认目录中没有未列出的文件 (见 _only_listed_files)。
+        
+        Args:
+            rel_dir: 孤儿文件所在的相对目录
+            source_dirs: 包含源文件的全部相对目录
+            memo: 已判断过的目录 -> 结果
+        """
+        if not rel_dir or rel_dir in source_dirs:
+            return None
+        if rel_dir not in memo:
+            root = self._orphan_root(os.path.dirname(rel_dir), source_dirs, memo)
+            if root is None and not os.path.isdir(os.path.join(self.source_path, rel_dir)):
+                root = rel_dir
+            memo[rel_dir] = root
+        return memo[rel_dir]
+        
+    def _only_listed_files(self, target_base: str, rel_dir: str, rel_paths: Set[str]) -> bool:
+        """
+        目录下的全部文件 (不经过滤) 是否都在给定的列表中
+        
+        被过滤规则排除、符号链接或无法列出的条目都视为未列出，此时不能整体删除该目录。
+        """
+        unreadable = []
+        for dirpath, dirnames, filenames in os.walk(os.path.join(target_base, rel_dir), onerror=unreadable.append):
+            rel = os.path.relpath(dirpath, target_base)
+            links = [name for name in dirnames if os.path.islink(os.path.join(dirpath, name))]
+            for name in filenames + links:
+                if os.path.join(rel, name) not in rel_paths:
+                    return False
+        return not unreadable
+        
+    def _fingerprints_match(self, source_file: str, target_file: str) -> bool:
+        """源和目标文件的快速指纹是否相同 (指纹不同说明内容一定不同)"""
+        source_fingerprint = hash_cache.get_fingerprint(source_file)
+        return bool(source_fingerprint) and source_fingerprint == hash_cache.get_fingerprint(target_file)
+        
+    def _prefetch_hashes(self, pending: List[Tuple[str, str, ScanEntry]]):
+        """
+        哈希/指纹比较模式下批量预先计算需要比较内容的文件哈希 (结果写入哈希缓存，
+        随后 _sync_file 中的冲突检查直接命中缓存)。指纹模式下只计算指纹相同的文件。
+        
+        Args:
+            pending: [(源文件路径, 目标文件夹路径, 源扫描记录)]
+        """
+        paths = []
+        for source_file, target_path, entry in pending:
+            target_file = os.path.join(target_path, entry.rel_path)
+            try:
+                st = os.stat(target_file)
+            except OSError:
+                continue
+            if st.st_size == entry.size and st.st_mtime_ns != entry.mtime_ns:
+                if self.compare_method == "fingerprint" and not self._fingerprints_match(source_file, target_file):
+                    continue
+                paths.append(source_file)
+                paths.append(target_file)
+        if paths:
+            hash_service.hash_files(paths)
+        
+    def _use_target_index(self, target_base: str) -> bool:
+        """
+        目标快照是否可直接代替扫描
+        仅单向同步 (目标只由本程序写入) 且快照未超过可信时长时使用
+        """
+        if self.metadata_index is None or self.index_max_age <= 0:
+            return False
+        if self.sync_mode != SyncMode.ONE_WAY or not os.path.isdir(target_base):
+            return False
+        age = self.metadata_index.snapshot_age(self.task_id, target_base)
+        return age is not None and age <= self.index_max_age
+        
+    def _get_target_entries(self, target_base: str) -> Tuple[Dict[str, ScanEntry], bool]:
+        """
+        获取目标目录的文件记录 (优先使用快照，否则扫描并更新快照)
+        
+        Returns:
+            ({相对路径: ScanEntry}, 是否来自快照)
+        """
+        if self._use_target_index(target_base):
+            target_files = self.metadata_index.load_snapshot(self.task_id, target_base)
+            if target_files is not None:
+                return target_files, True
+                
+        target_scanner = self._create_scanner(target_base)
+        target_files = {entry.rel_path: entry for entry in target_scanner.iter_entries()}
+        self._save_snapshot(target_base, target_scanner, target_files.values())
+        return target_files, False
+        
+    def _create_scanner(self, root: str) -> Scanner:
+        """创建扫描器 (有索引时以上次的快照为基准，跳过未变化的目录)"""
+        incremental = self.metadata_index is not None and self.scan_mode != SCAN_MODE_FULL
+        baseline = None
+        if incremental:
+            try:
+                baseline = self.metadata_index.load_baseline(self.task_id, root, self.path_filter.signature)
+            except Exception as e:
+                logger.warning(f"读取索引快照失败 {root}: {e}", category="sync")
+        return Scanner(root, path_filter=self.path_filter, workers=self.scan_workers,
+                       baseline=baseline, mode=self.scan_mode, track_dirs=incremental)
+        
+    def _save_snapshot(self, root: str, scanner: Scanner, entries):
+        """保存完整扫描结果 (及目录修改时间) 到元数据索引"""
+        if self.metadata_index is None or not os.path.isdir(root):
+            return
+        try:
+            previous = scanner.baseline.files if scanner.baseline is not None else None
+            self.metadata_index.save_snapshot(self.task_id, root, entries, previous=previous)
+            if scanner.track_dirs:
+                self.metadata_index.save_dirs(self.task_id, root, scanner.dir_mtimes,
+                                              scanner.started_at, self.path_filter.signature)
+        except Exception as e:
+            logger.warning(f"保存索引快照失败 {root}: {e}", category="sync")
+            
+    def _index_root_of(self, path: str) -> Optional[str]:
+        """返回路径所属的索引根目录 (源或某个目标)"""
+        for root in self._index_roots:
+            if path.startswith(root + os.sep):
+                return root
+        return None
+        
+    def _index_forget(self, path: str):
+        """从元数据索引中移除已删除的文件/目录"""
+        if self.metadata_index is None:
+            return
+        root = self._index_root_of(path)
+        if root:
+            self.metadata_index.forget(self.task_id, root, path)
+            
+    def _index_result(self, result: SyncResult):
+        """根据实际执行的同步结果更新元数据索引 (模拟运行的结果不应传入)"""
+        if self.metadata_index is None or not result.success or not result.target_path:
+            return
+        root = self._index_root_of(result.target_path)
+        if root is None:
+            return
+        try:
+            if result.action == "copy":
+                self.metadata_index.record_path(self.task_id, root, result.target_path)
+            elif result.action == "delete":
+                self.metadata_index.forget(self.task_id, root, result.target_path)
+            elif result.action == "move":
+                # 目录移动涉及的文件未知，下次同步时重新扫描该根目录
+                self.metadata_index.invalidate(self.task_id, root)
+        except Exception as e:
+            logger.warning(f"更新索引失败 {result.target_path}: {e}", category="sync")
 
     def set_progress_callback(self, callback: Callable[[int, int, str], None]):
         """设置进度回调 (current, total, message)"""
@@ -214,21 +631,84 @@ class SyncProcessor:
             except Exception:
                 pass
     
-    def _should_process_file(self, filepath: str) -> bool:
+    def _should_process_file(self, filepath: str, base_path: str = None) -> bool:
         """检查是否应该处理该文件"""
-        return match_file_patterns(filepath, self.include_patterns, self.exclude_patterns)
+        root_filter = self._root_filters.get(base_path or self.source_path, self.path_filter)
+        return root_filter.match(filepath)
     
-    def _sync_file(self, source_file: str, target_path: str, dry_run: bool = False) -> SyncResult:
+    def _dir_cache(self) -> Set[str]:
+        """已确认存在的目录集合 (超过上限时清空)"""
+        if len(self._known_dirs) >= _DIR_CACHE_LIMIT:
+            self._known_dirs.clear()
+        return self._known_dirs
+        
+    def _forget_missing_dir(self, path: str, dir_cache: Set[str]) -> bool:
+        """文件所在目录在缓存中但已被删除或移走时移出缓存，返回是否需要重试"""
+        directory = os.path.dirname(path)
+        if directory in dir_cache and not os.path.isdir(directory):
+            dir_cache.discard(directory)
+            return True
+        return False
+        
+    def _copy_file(self, src: str, dst: str, progress: Optional[ProgressCallback] = None) -> Tuple[bool, str]:
+        """复制文件并记录使用的复制方式和速度"""
+        dir_cache = self._dir_cache()
+        for _ in range(2):
+            success, error, copy_stats = copy_file_with_stats(src, dst, self.buffer_size,
+                                                              self.use_reflink, self.durability,
+                                                              self.resumable_threshold, progress,
+                                                              self.delta_sync, dir_cache, self.delta_in_place)
+            if success or not self._forget_missing_dir(dst, dir_cache):
+                break
+        if copy_stats is not None:
+            logger.debug(f"[Copy] {src} via {copy_stats.method}: {format_file_size(copy_stats.bytes_copied)} "
+                         f"@ {format_file_size(int(copy_stats.rate))}/s", category="sync")
+            with self._stats_lock:
+                methods = self._stats.copy_methods
+                methods[copy_stats.method] = methods.get(copy_stats.method, 0) + 1
+                self._stats.copy_bytes += copy_stats.bytes_copied
+                self._stats.copy_seconds += copy_stats.elapsed
+        return success, error
+        
+    def _copy_file_multi(self, src: str, dsts: List[str], progress: Optional[ProgressCallback] = None,
+                         dir_cache: Optional[Set[str]] = None) -> Dict[str, Tuple[bool, str]]:
         """
-        同步单个文件
+        把源文件复制到多个目标 (源文件只读取一次)，返回 {目标: (成功标志, 错误信息)}
         
-        Args:
-            source_file: 源文件路径
-            target_path: 目标文件夹路径
-            dry_run: 是否为模拟运行
+        dir_cache 为批量复制共用的已存在目录集合 (未提供时使用处理器的目录缓存)
+        """
+        if len(dsts) == 1 and dir_cache is None:
+            return {dsts[0]: self._copy_file(src, dsts[0], progress)}
+        if dir_cache is None:
+            dir_cache = self._dir_cache()
+        outcomes = copy_file_to_targets_with_stats(src, dsts, self.buffer_size, self.use_reflink,
+                                                   self.durability, self.resumable_threshold,
+                                                   progress, self.delta_sync, dir_cache,
+                                                   self.delta_in_place)
+        retry = [dst for dst, (success, _, _) in outcomes.items()
+                 if not success and self._forget_missing_dir(dst, dir_cache)]
+        if retry:
+            outcomes.update(copy_file_to_targets_with_stats(src, retry, self.buffer_size, self.use_reflink,
+                                                            self.durability, self.resumable_threshold,
+                                                            progress, self.delta_sync, dir_cache,
+                                                            self.delta_in_place))
+        results = {}
+        for dst, (success, error, copy_stats) in outcomes.items():
+            if copy_stats is not None:
+                with self._stats_lock:
+                    methods = self._stats.copy_methods
+                    methods[copy_stats.method] = methods.get(copy_stats.method, 0) + 1
+                    self._stats.copy_bytes += copy_stats.bytes_copied
+                    self._stats.copy_seconds += copy_stats.elapsed
+            results[dst] = (success, error)
+        return results
+        
+    def _plan_file(self, source_file: str, target_path: str, dry_run: bool = False):
+        """
+        判断单个文件对某个目标需要执行的操作
         
         Returns:
-            同步结果
+            无需复制 (跳过、模拟运行或出错) 时返回 SyncResult，需要复制时返回 _PendingCopy
         """
         try:
             # 修正路径逻辑: 如果 target_path 实际上是完整的目标文件路径
@@ -265,26 +745,7 @@ class SyncProcessor:
                         message="[模拟] 将复制文件",
                         file_size=file_size
                     )
-
-                success, error = safe_copy_file(source_file, target_file)
-                if success:
-                    file_size = get_file_size(source_file)
-                    return SyncResult(
-                        success=True,
-                        action="copy",
-                        source_path=source_file,
-                        target_path=target_file,
-                        message="文件已复制",
-                        file_size=file_size
-                    )
-                else:
-                    return SyncResult(
-                        success=False,
-                        action="error",
-                        source_path=source_file,
-                        target_path=target_file,
-                        message=f"复制失败: {error}"
-                    )
+                return _PendingCopy(target_file, target_file, "文件已复制", target_file, "复制失败")
             
             # 检查冲突
             if self.conflict_handler.check_conflict(source_file, target_file):
@@ -301,47 +762,11 @@ class SyncProcessor:
                             message=f"[模拟] 冲突解决: {reason}",
                             file_size=file_size
                         )
-
-                    success, error = safe_copy_file(source_file, resolved_path or target_file)
-                    if success:
-                        file_size = get_file_size(source_file)
-                        return SyncResult(
-                            success=True,
-                            action="copy",
-                            source_path=source_file,
-                            target_path=resolved_path or target_file,
-                            message=reason,
-                            file_size=file_size
-                        )
-                    else:
-                        return SyncResult(
-                            success=False,
-                            action="error",
-                            source_path=source_file,
-                            target_path=target_file,
-                            message=f"复制失败: {error}"
-                        )
+                    return _PendingCopy(target_file, resolved_path or target_file, reason,
+                                        target_file, "复制失败")
                 
                 elif action == "keep_both":
-                    success, error = safe_copy_file(source_file, resolved_path)
-                    if success:
-                        file_size = get_file_size(source_file)
-                        return SyncResult(
-                            success=True,
-                            action="copy",
-                            source_path=source_file,
-                            target_path=resolved_path,
-                            message=reason,
-                            file_size=file_size
-                        )
-                    else:
-                        return SyncResult(
-                            success=False,
-                            action="error",
-                            source_path=source_file,
-                            target_path=resolved_path,
-                            message=f"保留双方失败: {error}"
-                        )
+                    return _PendingCopy(target_file, resolved_path, reason, resolved_path, "保留双方失败")
                 
                 else:  # skip
                     return SyncResult(
@@ -362,13 +787,87 @@ class SyncProcessor:
             )
             
         except Exception as e:
+            return self._sync_error(source_file, target_path, e)
+            
+    def _sync_error(self, source_file: str, target_path: str, error: Exception) -> SyncResult:
+        return SyncResult(
+            success=False,
+            action="error",
+            source_path=source_file,
+            target_path=target_path,
+            message=f"同步异常: {str(error)}"
+        )
+        
+    def _copy_result(self, source_file: str, pending: '_PendingCopy', success: bool, error: str) -> SyncResult:
+        """根据复制结果生成同步结果"""
+        if success:
             return SyncResult(
-                success=False,
-                action="error",
+                success=True,
+                action="copy",
                 source_path=source_file,
-                target_path=target_path,
-                message=f"同步异常: {str(e)}"
+                target_path=pending.dest,
+                message=pending.message,
+                file_size=get_file_size(source_file)
             )
+        return SyncResult(
+            success=False,
+            action="error",
+            source_path=source_file,
+            target_path=pending.error_path,
+            message=f"{pending.error_prefix}: {error}"
+        )
+        
+    def _sync_file(self, source_file: str, target_path: str, dry_run: bool = False,
+                   progress: Optional[ProgressCallback] = None) -> SyncResult:
+        """
+        同步单个文件
+        
+        Args:
+            source_file: 源文件路径
+            target_path: 目标文件夹路径
+            dry_run: 是否为模拟运行
+            progress: 复制的字节进度回调 (已复制, 总大小)
+            
+        Returns:
+            同步结果
+        """
+        plan = self._plan_file(source_file, target_path, dry_run)
+        if isinstance(plan, SyncResult):
+            return plan
+        try:
+            success, error = self._copy_file(source_file, plan.dest, progress)
+            return self._copy_result(source_file, plan, success, error)
+        except Exception as e:
+            return self._sync_error(source_file, target_path, e)
+            
+    def _sync_file_multi(self, source_file: str, target_paths: List[str], dry_run: bool = False,
+                         progress: Optional[ProgressCallback] = None,
+                         dir_cache: Optional[Set[str]] = None) -> List[SyncResult]:
+        """
+        把单个文件同步到多个目标，需要复制的目标共用一次源文件读取
+        
+        Args:
+            source_file: 源文件路径
+            target_paths: 目标文件夹 (或完整目标文件) 路径列表
+            dry_run: 是否为模拟运行
+            progress: 读取源文件的字节进度回调 (已读取, 总大小)
+            dir_cache: 批量复制共用的已存在目录集合
+            
+        Returns:
+            与 target_paths 顺序一致的同步结果
+        """
+        plans = [self._plan_file(source_file, target_path, dry_run) for target_path in target_paths]
+        pending = [plan for plan in plans if isinstance(plan, _PendingCopy)]
+        if not pending:
+            return plans
+        try:
+            outcomes = self._copy_file_multi(source_file, [plan.dest for plan in pending], progress, dir_cache)
+        except Exception as e:
+            return [plan if isinstance(plan, SyncResult) else self._sync_error(source_file, target_path, e)
+                    for plan, target_path in zip(plans, target_paths)]
+        return [plan if isinstance(plan, SyncResult) else
+                self._copy_result(source_file, plan, *outcomes.get(plan.dest, (False, "未执行复制")))
+                for plan in plans]
     
     def _sync_deletion(self, deleted_path: str, target_path: str, dry_run: bool = False) -> SyncResult:
         """同步删除操作"""
@@ -577,6 +1076,9 @@ class SyncProcessor:
                         result2 = self._sync_file(event.dst_path, target_path)
                         results.append(result2)
         
+        for result in results:
+            self._index_result(result)
+            
         # 更新统计
         with self._stats_lock:
             for result in results:
@@ -610,7 +1112,7 @@ class SyncProcessor:
             source_file = os.path.join(self.source_path, rel_path)
             
             # 检查过滤规则
-            if not self._should_process_file(target_file):
+            if not self._should_process_file(target_file, target_base):
                 return SyncResult(
                     success=True,
                     action="skip",
@@ -632,7 +1134,7 @@ class SyncProcessor:
                         file_size=file_size
                     )
 
-                success, error = safe_copy_file(target_file, source_file)
+                success, error = self._copy_file(target_file, source_file)
                 if success:
                     file_size = get_file_size(target_file)
                     return SyncResult(
@@ -657,7 +1159,7 @@ class SyncProcessor:
                 action, resolved_path, reason = self.conflict_handler.resolve(target_file, source_file)
                 
                 if action == "copy":
-                    success, error = safe_copy_file(target_file, resolved_path or source_file)
+                    success, error = self._copy_file(target_file, resolved_path or source_file)
                     if success:
                         file_size = get_file_size(target_file)
                         return SyncResult(
@@ -813,6 +1315,9 @@ class SyncProcessor:
                         result2 = self._sync_file_reverse(event.dst_path, target_base)
                         results.append(result2)
         
+        for result in results:
+            self._index_result(result)
+            
         # 更新统计
         with self._stats_lock:
             for result in results:
@@ -829,6 +1334,40 @@ class SyncProcessor:
         
         return results
 
+    def _collect_results(self, futures, results: List[SyncResult], current: int, total: int,
+                         label: str, skip_unchanged: bool = False, dry_run: bool = False) -> int:
+        """收集已提交的同步结果 (单个结果或多目标结果列表) 并更新进度，返回新的进度计数"""
+        for future in as_completed(futures):
+            if self._should_stop:
+                break
+            outcome = future.result()
+            for result in (outcome if isinstance(outcome, list) else [outcome]):
+                if not dry_run:
+                    self._index_result(result)
+                if not (skip_unchanged and result.action == "skip"):  # 反向同步仅记录实际操作
+                    results.append(result)
+                current += 1
+                self._update_progress(current, total, f"{label}: {os.path.basename(result.source_path)}")
+            
+                # 记录日志
+                if result.action == "error":
+                    logger.error(f"{label}失败: {result.source_path} - {result.message}", category="sync")
+        return current
+        
+    def _submit_deferred(self, executor, futures: set, deferred: List[Tuple[str, str, ScanEntry]],
+                         dry_run: bool) -> int:
+        """批量计算哈希后提交延迟的同步任务 (同一源文件的各目标合并提交)，返回提交的目标数量"""
+        try:
+            self._prefetch_hashes(deferred)
+        except Exception as e:
+            logger.warning(f"批量计算哈希失败: {e}", category="sync")
+        grouped: Dict[str, List[str]] = {}
+        for source_file, target_path, _ in deferred:
+            grouped.setdefault(source_file, []).append(target_path)
+        for source_file, target_paths in grouped.items():
+            futures.add(executor.submit(self._sync_file_multi, source_file, target_paths, dry_run))
+        return len(deferred)
+        
     def full_sync(self, delete_orphans: bool = False, dry_run: bool = False) -> List[SyncResult]:
         """
         执行全量同步
@@ -846,50 +1385,93 @@ class SyncProcessor:
         results = []
         
         try:
-            # 扫描源文件夹
-            source_scanner = Scanner(self.source_path, self.include_patterns, self.exclude_patterns)
-            source_files = source_scanner.scan()
-            total = len(source_files) * len(self.target_paths)
+            logger.info(f"开始全量同步: {self.source_path} → {len(self.target_paths)} 个目标",
+                       category="sync")
+                       
+            # 单向同步时可信的目标快照: 大小和修改时间与源一致的文件直接跳过，无需逐个检查目标
+            target_snapshots = {}
+            for target_path in self.target_paths:
+                if self._use_target_index(target_path):
+                    snapshot = self.metadata_index.load_snapshot(self.task_id, target_path)
+                    if snapshot is not None:
+                        target_snapshots[target_path] = snapshot
+                        
+            # 扫描源文件夹: 边扫描边提交同步任务
+            source_scanner = self._create_scanner(self.source_path)
+            source_entries = []
+            source_rel_paths = set()
+            submitted = 0
             current = 0
             
-            logger.info(f"开始全量同步: {len(source_files)} 个文件 → {len(self.target_paths)} 个目标",
+            # 使用线程池并行处理，在途任务数量受限，避免一次性持有全部 Future
+            max_in_flight = self.max_workers * _IN_FLIGHT_PER_WORKER
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = set()
+                # 哈希比较模式: 攒够一批后先批量计算哈希再提交
+                deferred = []
+                for entry in source_scanner.iter_entries():
+                    if self._should_stop:
+                        break
+                    source_entries.append(entry)
+                    source_rel_paths.add(entry.rel_path)
+                    source_file = os.path.join(self.source_path, entry.rel_path)
+                    # 需要检查的目标合并为一个任务，复制时源文件只读取一次
+                    pending_targets = []
+                    for target_path in self.target_paths:
+                        known = target_snapshots.get(target_path, {}).get(entry.rel_path)
+                        if known is not None and known.size == entry.size and known.mtime_ns == entry.mtime_ns:
+                            results.append(SyncResult(
+                                success=True,
+                                action="skip",
+                                source_path=source_file,
+                                target_path=os.path.join(target_path, entry.rel_path),
+                                message="文件已是最新"
+                            ))
+                            continue
+                        if self.compare_method in _CONTENT_COMPARE_METHODS:
+                            deferred.append((source_file, target_path, entry))
+                            continue
+                        pending_targets.append(target_path)
+                    if pending_targets:
+                        futures.add(executor.submit(self._sync_file_multi, source_file, pending_targets, dry_run))
+                        submitted += len(pending_targets)
+                        
+                    if len(deferred) >= _HASH_BATCH_SIZE:
+                        submitted += self._submit_deferred(executor, futures, deferred, dry_run)
+                        deferred = []
+                        
+                    if len(futures) >= max_in_flight:
+                        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                        current = self._collect_results(done, results, current, submitted, "同步", dry_run=dry_run)
+                        
+                if deferred and not self._should_stop:
+                    submitted += self._submit_deferred(executor, futures, deferred, dry_run)
+                        
+                if not self._should_stop:
+                    current = self._collect_results(futures, results, current, submitted, "同步", dry_run=dry_run)
+                    
+            if not self._should_stop:
+                self._save_snapshot(self.source_path, source_scanner, source_entries)
+                    
+            logger.info(f"全量同步扫描完成: {len(source_rel_paths)} 个文件 → {len(self.target_paths)} 个目标",
                        category="sync")
             
             for target_path in self.target_paths:
                 if self._should_stop:
                     break
                 
-                # 使用线程池并行处理
-                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    futures = {}
-                    for source_file in source_files:
-                        if self._should_stop:
-                            break
-                        future = executor.submit(self._sync_file, source_file, target_path, dry_run)
-                        futures[future] = source_file
-                    
-                    for future in as_completed(futures):
-                        if self._should_stop:
-                            break
-                        result = future.result()
-                        results.append(result)
-                        current += 1
-                        self._update_progress(current, total, f"同步: {os.path.basename(result.source_path)}")
-                        
-                        # 记录日志
-                        if result.action == "error":
-                            logger.error(f"同步失败: {result.source_path} - {result.message}",
-                                        category="sync")
-                
                 # 删除目标中多余的文件 (仅单向同步且配置了删除)
                 if delete_orphans and self.sync_mode == SyncMode.ONE_WAY and not self._should_stop:
-                    target_scanner = Scanner(target_path, self.include_patterns, self.exclude_patterns)
-                    target_files = target_scanner.scan()
-                    source_rel_paths = set(get_relative_path(f, self.source_path) for f in source_files)
+                    if target_path in target_snapshots:
+                        # 直接使用快照中的目标文件列表，无需再次扫描
+                        target_rel_paths = list(target_snapshots[target_path])
+                    else:
+                        target_files, _ = self._get_target_entries(target_path)
+                        target_rel_paths = list(target_files)
                     
-                    for target_file in target_files:
-                        rel_path = get_relative_path(target_file, target_path)
+                    for rel_path in target_rel_paths:
                         if rel_path not in source_rel_paths:
+                            target_file = os.path.join(target_path, rel_path)
                             result = SyncResult(
                                 success=True,
                                 action="delete",
@@ -906,35 +1488,36 @@ class SyncProcessor:
                                     result.success = False
                                     result.action = "error"
                                     result.message = f"删除失败: {error}"
+                                else:
+                                    self._index_forget(target_file)
                                 results.append(result)
                             
                 # 双向同步：反向同步 (目标 -> 源)
                 if self.sync_mode == SyncMode.TWO_WAY and not self._should_stop:
                     logger.info(f"双向同步：开始反向扫描 {target_path}", category="sync")
-                    target_scanner = Scanner(target_path, self.include_patterns, self.exclude_patterns)
-                    target_files = target_scanner.scan()
-                    total_reverse = len(target_files)
+                    target_scanner = self._create_scanner(target_path)
+                    submitted_reverse = 0
                     current_reverse = 0
                     
                     with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                        futures = {}
-                        for target_file in target_files:
+                        futures = set()
+                        for entry in target_scanner.iter_entries():
                             if self._should_stop:
                                 break
-                            future = executor.submit(self._sync_file_reverse, target_file, target_path, dry_run)
-                            futures[future] = target_file
+                            target_file = os.path.join(target_path, entry.rel_path)
+                            futures.add(executor.submit(self._sync_file_reverse, target_file, target_path, dry_run))
+                            submitted_reverse += 1
                         
-                        for future in as_completed(futures):
-                            if self._should_stop:
-                                break
-                            result = future.result()
-                            if result.action != "skip": # 仅记录实际操作
-                                results.append(result)
-                            current_reverse += 1
-                            self._update_progress(current_reverse, total_reverse, f"反向同步: {os.path.basename(result.source_path)}")
+                            if len(futures) >= max_in_flight:
+                                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                                current_reverse = self._collect_results(done, results, current_reverse,
+                                                                        submitted_reverse, "反向同步",
+                                                                        skip_unchanged=True, dry_run=dry_run)
                             
-                            if result.action == "error":
-                                logger.error(f"反向同步失败: {result.source_path} - {result.message}", category="sync")
+                        if not self._should_stop:
+                            current_reverse = self._collect_results(futures, results, current_reverse,
+                                                                    submitted_reverse, "反向同步",
+                                                                    skip_unchanged=True, dry_run=dry_run)
 
             # 更新统计
             with self._stats_lock:
@@ -955,6 +1538,10 @@ class SyncProcessor:
                        f"跳过 {self._stats.skipped_files}, "
                        f"失败 {self._stats.failed_files}",
                        category="sync")
+            if self._stats.copy_methods:
+                rate = self._stats.copy_bytes / self._stats.copy_seconds if self._stats.copy_seconds > 0 else 0
+                logger.info(f"复制方式: {self._stats.copy_methods}, "
+                            f"平均速度 {format_file_size(int(rate))}/s", category="sync")
             
         except Exception as e:
             logger.error(f"全量同步异常: {e}", category="sync")
@@ -984,5 +1571,8 @@ class SyncProcessor:
                 "deleted_files": self._stats.deleted_files,
                 "skipped_files": self._stats.skipped_files,
                 "failed_files": self._stats.failed_files,
-                "total_size": format_file_size(self._stats.total_size)
+                "total_size": format_file_size(self._stats.total_size),
+                "copy_methods": dict(self._stats.copy_methods),
+                "copy_rate": (format_file_size(int(self._stats.copy_bytes / self._stats.copy_seconds)) + "/s"
+                              if self._stats.copy_seconds > 0 else "")
             }
@@ -11,8 +11,20 @@ from datetime import datetime
 from utils.constants import SyncMode, ConflictStrategy, TaskStatus
 from utils.config_manager import config_manager
 from utils.logger import logger
+from utils.path_filter import PathFilter
+from utils.copy_engine import TEMP_SUFFIX, DURABILITY_FILE, sweep_temp_files
 from .file_monitor import FileMonitor, FileEvent, PollingMonitor
 from .sync_processor import SyncProcessor
+from .metadata_index import metadata_index
+from .operation_journal import operation_journal
+from .hash_cache import hash_cache
+from .hash_service import hash_service
+from .scanner import SCAN_MODE_STAT
+
+
+# 本次运行中已清理过残留临时文件的目录
+_swept_roots = set()
+_swept_lock = threading.Lock()
 
 
 @dataclass
@@ -37,6 +49,8 @@ class BackupTask:
     poll_interval: int = 5  # 轮询间隔(秒)
     safety_threshold: int = 50  # 安全阈值：一次同步最大允许变更文件数 (超过则警告)
     batch_delay: float = 1.0  # 批量操作防抖延迟(秒)
+    scan_workers: int = 1  # 目录扫描并行线程数 (NAS/机械硬盘可调高)
+    delta_sync: bool = False  # 大文件增量传输：只写入变化的块 (适合虚拟机镜像、数据库等原地修改的文件)
     created_at: str = ""
     updated_at: str = ""
     last_run_time: str = ""
@@ -83,6 +97,9 @@ class TaskRunner:
         # 安全暂停状态
         self._is_safety_paused = False
         self._paused_batch: List[Tuple[FileEvent, bool, object]] = []
+        
+        # 任务级过滤器: 只编译一次，供扫描、监控和同步共用
+        self.path_filter = PathFilter(self.task.include_patterns, self._get_effective_excludes())
     
     def set_event_callback(self, callback: Callable[[str, FileEvent, dict], None]):
         """设置事件回调 (task_id, event, result)"""
@@ -162,6 +179,8 @@ class TaskRunner:
     def _get_effective_excludes(self) -> List[str]:
         """获取有效的排除列表 (自动添加嵌套的目标目录)"""
         effective_excludes = list(self.task.exclude_patterns)
+        # 复制过程中的临时文件
+        effective_excludes.append("*" + TEMP_SUFFIX)
         for target_path in self.task.target_paths:
             try:
                 rel = os.path.relpath(target_path, self.task.source_path)
@@ -175,6 +194,29 @@ class TaskRunner:
             except ValueError:
                 pass
         return effective_excludes
+        
+    def create_processor(self) -> SyncProcessor:
+        """按任务配置创建同步处理器 (共用任务级过滤器)"""
+        return SyncProcessor(
+            source_path=self.task.source_path,
+            target_paths=self.task.target_paths,
+            sync_mode=SyncMode(self.task.sync_mode),
+            conflict_strategy=ConflictStrategy(self.task.conflict_strategy),
+            disable_delete=self.task.disable_delete,
+            path_filter=self.path_filter,
+            scan_workers=self.task.scan_workers,
+            task_id=self.task.id,
+            metadata_index=metadata_index,
+            index_max_age=config_manager.get("backup.index_max_age_hours", 24) * 3600,
+            scan_mode=config_manager.get("backup.incremental_scan", SCAN_MODE_STAT),
+            compare_method=config_manager.get("backup.compare_method", "mtime"),
+            buffer_size=config_manager.get("backup.buffer_size", 1024 * 1024),
+            use_reflink=config_manager.get("backup.reflink", True),
+            durability=config_manager.get("backup.durability", DURABILITY_FILE),
+            resumable_threshold=config_manager.get("backup.resumable_threshold_mb", 256) * 1024 * 1024,
+            delta_sync=self.task.delta_sync,
+            delta_in_place=config_manager.get("backup.delta_in_place", False)
+        )
 
     def confirm_safety_alert(self):
         """确认并执行安全暂停期间累积的所有变更"""
@@ -200,7 +242,7 @@ class TaskRunner:
             logger.warning("执行批量任务: 批次为空", task_id=self.task.id, category="task")
             return
             
-        from .operation_queue import operation_queue, OperationType
+        from .operation_queue import operation_queue, OperationType, OperationPriority
         from utils.constants import FileEventType, FileEvent
         from utils.file_utils import get_relative_path
         
@@ -259,14 +301,15 @@ class TaskRunner:
                                 })
                             continue # 已添加所有目标，跳过通用逻辑
                         else:
-                            # 源新增/修改 -> 复制到目标
+                            # 源新增/修改 -> 复制到所有目标 (一个多目标操作，源文件只读取一次)
                             rel = get_relative_path(src_path, self.task.source_path)
-                            for t_path in self.task.target_paths:
-                                dst = os.path.join(t_path, rel)
+                            dsts = [os.path.join(t_path, rel) for t_path in self.task.target_paths]
+                            if dsts:
                                 ops.append({
                                     "op_type": op_type,
                                     "source": src_path,
-                                    "target": dst,
+                                    "target": dsts[0],
+                                    "targets": dsts,
                                     "task_id": task_id,
                                     "task_name": task_name
                                 })
@@ -286,7 +329,7 @@ class TaskRunner:
                     logger.error(f"解析批量项失败: {e}", task_id=task_id)
 
         if ops:
-            operation_queue.add_batch_operations(ops)
+            operation_queue.add_batch_operations(ops, priority=OperationPriority.REALTIME)
 
 
     def _execute_batch(self, batch):
@@ -476,19 +519,8 @@ class TaskRunner:
                 return True
             
             try:
-                # 获取有效的排除列表（包含自动排除的嵌套目标）
-                effective_excludes = self._get_effective_excludes()
-
-                # 创建同步处理器
-                self._processor = SyncProcessor(
-                    source_path=self.task.source_path,
-                    target_paths=self.task.target_paths,
-                    sync_mode=SyncMode(self.task.sync_mode),
-                    conflict_strategy=ConflictStrategy(self.task.conflict_strategy),
-                    include_patterns=self.task.include_patterns,
-                    exclude_patterns=effective_excludes,
-                    disable_delete=self.task.disable_delete
-                )
+                # 创建同步处理器 (过滤器已包含自动排除的嵌套目标)
+                self._processor = self.create_processor()
 
                 # 创建源文件夹监控器（根据模式选择实时或轮询）
                 if self.task.monitor_mode == "polling":
@@ -497,16 +529,18 @@ class TaskRunner:
                         callback=self._on_file_event,
                         interval=self.task.poll_interval,
                         recursive=True,
-                        include_patterns=self.task.include_patterns,
-                        exclude_patterns=effective_excludes
+                        path_filter=self.path_filter,
+                        scan_workers=self.task.scan_workers,
+                        metadata_index=metadata_index,
+                        task_id=self.task.id,
+                        scan_mode=config_manager.get("backup.incremental_scan", SCAN_MODE_STAT)
                     )
                 else:
                     self._monitor = FileMonitor(
                         path=self.task.source_path,
                         callback=self._on_file_event,
                         recursive=True,
-                        include_patterns=self.task.include_patterns,
-                        exclude_patterns=effective_excludes
+                        path_filter=self.path_filter
                     )
                 
                 if not self._monitor.start():
@@ -520,8 +554,7 @@ class TaskRunner:
                             path=target_path,
                             callback=lambda evt, tp=target_path: self._on_target_file_event(tp, evt),
                             recursive=True,
-                            include_patterns=self.task.include_patterns,
-                            exclude_patterns=self.task.exclude_patterns
+                            path_filter=self.path_filter
                         )
                         if target_monitor.start():
                             self._target_monitors.append(target_monitor)
@@ -537,6 +570,8 @@ class TaskRunner:
                     import time
                     time.sleep(0.5)
                     
+                    self._sweep_temp_files()
+                    
                     # Issue 4 Fix: 初始同步前先进行安全检查
                     try:
                         safety = self.check_sync_safety()
@@ -569,7 +604,8 @@ class TaskRunner:
                     
                     # 初始同步删除规则
                     delete_rule = getattr(self.task, 'initial_sync_delete', False)
-                    self.run_full_sync(delete_orphans_override=delete_rule)
+                    from .operation_queue import OperationPriority
+                    self.run_full_sync(delete_orphans_override=delete_rule, priority=OperationPriority.RECONCILE)
                     
                 threading.Thread(target=auto_sync, daemon=True).start()
                 logger.info(f"触发启动时全量同步(删除策略={getattr(self.task, 'initial_sync_delete', False)}): {self.task.name}", 
@@ -581,6 +617,19 @@ class TaskRunner:
                 logger.error(f"启动任务失败: {e}", task_id=self.task.id, category="task")
                 self._set_status(TaskStatus.ERROR)
                 return False
+                
+    def _sweep_temp_files(self):
+        """清理上次运行中断时残留的复制临时文件 (每个目录在本次运行中只清理一次)"""
+        roots = list(self.task.target_paths)
+        if self.task.sync_mode == SyncMode.TWO_WAY.value:
+            roots.append(self.task.source_path)
+        with _swept_lock:
+            roots = [root for root in roots if root not in _swept_roots]
+            _swept_roots.update(roots)
+        for root in roots:
+            removed = sweep_temp_files(root)
+            if removed:
+                logger.info(f"已清理 {removed} 个残留的临时文件: {root}", task_id=self.task.id, category="task")
     
     def stop(self):
         """停止任务"""
@@ -621,28 +670,28 @@ class TaskRunner:
                 self._set_status(TaskStatus.RUNNING)
                 logger.info(f"任务已恢复: {self.task.name}", task_id=self.task.id, category="task")
     
-    def run_full_sync(self, skip_safety_check: bool = False, delete_orphans_override: Optional[bool] = None) -> bool:
-        """执行全量同步 (通过操作队列)"""
+    def run_full_sync(self, skip_safety_check: bool = False, delete_orphans_override: Optional[bool] = None,
+                      priority: Optional[int] = None) -> bool:
+        """
+        执行全量同步 (通过操作队列)
+        
+        Args:
+            priority: 队列优先级 (默认 OperationPriority.FULL_SYNC，启动时的对账同步使用 RECONCILE)
+        """
         if self._is_syncing:
             return False
             
         # 启动后台线程进行扫描和计划
         import threading
-        from .operation_queue import operation_queue, OperationType
+        from .operation_queue import operation_queue, OperationType, OperationPriority
+        if priority is None:
+            priority = OperationPriority.FULL_SYNC
         
         def plan_and_queue():
              try:
                 with self._operation_lock:
                     if self._processor is None:
-                        self._processor = SyncProcessor(
-                            source_path=self.task.source_path,
-                            target_paths=self.task.target_paths,
-                            sync_mode=SyncMode(self.task.sync_mode),
-                            conflict_strategy=ConflictStrategy(self.task.conflict_strategy),
-                            include_patterns=self.task.include_patterns,
-                            exclude_patterns=self.task.exclude_patterns,
-                            disable_delete=self.task.disable_delete
-                        )
+                        self._processor = self.create_processor()
                     
                     delete_orphans = delete_orphans_override if delete_orphans_override is not None else self.task.delete_orphans
                     logger.info(f"开始全量同步扫描(清理={delete_orphans}): {self.task.name}", task_id=self.task.id, category="task")
@@ -665,11 +714,12 @@ class TaskRunner:
                             "op_type": p["op_type"],
                             "source": p["source"],
                             "target": p["target"],
+                            "size": p.get("size"),
                             "task_id": self.task.id,
                             "task_name": self.task.name
                         })
                     
-                operation_queue.add_batch_operations(ops)
+                operation_queue.add_batch_operations(ops, priority=priority)
                     
                 logger.info(f"已将 {len(ops)} 个全量同步操作加入队列", task_id=self.task.id, category="task")
                 self.task.last_run_time = datetime.now().isoformat()
@@ -707,15 +757,7 @@ class TaskRunner:
             # 临时创建处理器如果不存在
             processor = self._processor
             if processor is None:
-                processor = SyncProcessor(
-                    source_path=self.task.source_path,
-                    target_paths=self.task.target_paths,
-                    sync_mode=SyncMode(self.task.sync_mode),
-                    conflict_strategy=ConflictStrategy(self.task.conflict_strategy),
-                    include_patterns=self.task.include_patterns,
-                    exclude_patterns=self._get_effective_excludes(),
-                    disable_delete=self.task.disable_delete
-                )
+                processor = self.create_processor()
             
             # 执行模拟运行
             logger.info(f"正在进行安全检查(Dry Run): {self.task.name}", task_id=self.task.id, category="safety")
@@ -739,8 +781,8 @@ class TaskRunner:
             
             # 1. 检查空源保护 (仅在单向同步且开启清理时)
             if self.task.sync_mode == SyncMode.ONE_WAY.value and self.task.delete_orphans:
-                 from utils.file_utils import scan_directory
-                 source_files = scan_directory(self.task.source_path)
+                 from .scanner import Scanner
+                 source_files = Scanner(self.task.source_path, workers=self.task.scan_workers).scan()
                  if len(source_files) == 0 and delete_count > 0:
                      return {
                         "safe": False,
@@ -809,12 +851,25 @@ class TaskManager:
         self._event_callback: Optional[Callable] = None
         self._status_callback: Optional[Callable] = None
         
+        hash_cache.configure(config_manager.get("backup.hash_cache_max_entries", 100000),
+                             algorithm=config_manager.get("backup.hash_algorithm", "blake2b"))
+        hash_service.configure(config_manager.get("backup.hash_workers", 0))
+        
         # 加载保存的任务
         self._load_tasks()
         
-        # 设置操作队列执行器
-        from .operation_queue import operation_queue
+        # 设置操作队列执行器和并行数
+        from .operation_queue import operation_queue, RetryPolicy
         operation_queue.set_executor(self._execute_queue_operation)
+        operation_queue.configure(config_manager.get("backup.max_concurrent_tasks", 3))
+        operation_queue.set_device_limits(config_manager.get("backup.device_limits", {}))
+        operation_queue.set_retry_policy(RetryPolicy(
+            max_retries=config_manager.get("backup.retry_max_attempts", 5),
+            base_delay=config_manager.get("backup.retry_base_delay", 2.0),
+            max_delay=config_manager.get("backup.retry_max_delay", 300.0)
+        ))
+        if config_manager.get("backup.queue_journal", True):
+            operation_queue.enable_journal(operation_journal, task_ids=set(self._tasks))
 
     def _execute_queue_operation(self, op) -> Tuple[bool, str]:
         """执行队列操作 (作为 OperationQueue 的执行器)"""
@@ -824,25 +879,25 @@ class TaskManager:
             
         runner = self._runners[task_id]
         if not runner._processor:
-            # 尝试初始化处理器 (可能需要从 task 创建)
-            task = self._tasks.get(task_id)
-            if not task:
-                return False, "Task object missing"
+            # 尝试初始化处理器 (可能需要从 task 创建)，多个队列线程可能同时到达
+            with self._lock:
+                if not runner._processor:
+                    task = self._tasks.get(task_id)
+                    if not task:
+                        return False, "Task object missing"
                 
-            from .sync_processor import SyncProcessor
-            runner._processor = SyncProcessor(
-                source_path=task.source_path,
-                target_paths=task.target_paths,
-                sync_mode=SyncMode(task.sync_mode),
-                conflict_strategy=ConflictStrategy(task.conflict_strategy),
-                include_patterns=task.include_patterns,
-                exclude_patterns=task.exclude_patterns,
-                disable_delete=task.disable_delete
-            )
+                    runner._processor = runner.create_processor()
         
         # 将 Enum 转换为字符串
         op_type_str = op.op_type.value if hasattr(op.op_type, 'value') else str(op.op_type)
-        return runner._processor.execute_op(op_type_str, op.source_path, op.target_path)
+        from .operation_queue import operation_queue, OperationType
+        if op.op_type == OperationType.COPY_BATCH:
+            return runner._processor.execute_copy_batch(op.batch)
+        return runner._processor.execute_op(
+            op_type_str, op.source_path, op.target_path,
+            progress=lambda done, total: operation_queue.update_bytes(op, done, total),
+            targets=op.targets
+        )
     
     def _load_tasks(self):
         """从配置加载任务"""
@@ -965,6 +1020,7 @@ class TaskManager:
                 
                 task_name = self._tasks[task_id].name
                 del self._tasks[task_id]
+                metadata_index.drop_task(task_id)
                 
                 self._save_tasks()
                 logger.info(f"删除任务: {task_name}", category="task")
@@ -1021,6 +1077,10 @@ class TaskManager:
         """停止所有任务"""
         for task_id in self._runners:
             self.stop_task(task_id)
+        hash_service.shutdown()
+        hash_cache.flush()
+        metadata_index.flush()
+        operation_journal.flush()
     
     def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
         """获取任务状态"""
@@ -5,6 +5,7 @@
 import sys
 import os
 import traceback
+import multiprocessing
 from datetime import datetime
 
 # 添加项目根目录到Python路径
@@ -95,5 +96,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序启动哈希进程池时需要
+    multiprocessing.freeze_support()
     main()
 
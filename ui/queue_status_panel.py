@@ -9,6 +9,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 
+from utils.file_utils import format_file_size
 from .styles import COLORS
 
 
@@ -92,6 +93,11 @@ class QueueStatusPanel(QWidget):
         self.failed_label.setStyleSheet(f"color: {COLORS['error']}; font-size: 12px;")
         stats_layout.addWidget(self.failed_label)
         
+        self.coalesced_label = QLabel("已合并: 0")
+        self.coalesced_label.setStyleSheet(f"color: {COLORS['text_muted']}; font-size: 12px;")
+        self.coalesced_label.setToolTip("等待期间被后续变更合并掉的重复操作数")
+        stats_layout.addWidget(self.coalesced_label)
+        
         stats_layout.addStretch()
         layout.addLayout(stats_layout)
         
@@ -131,6 +137,14 @@ class QueueStatusPanel(QWidget):
         self.clear_btn.clicked.connect(self._clear_queue)
         btn_layout.addWidget(self.clear_btn)
         
+        self.retry_btn = QPushButton("↻ 重试失败项")
+        self.retry_btn.setProperty("class", "secondary")
+        self.retry_btn.setFixedHeight(28)
+        self.retry_btn.setToolTip("把重试用尽的操作重新加入队列")
+        self.retry_btn.clicked.connect(self._requeue_failed)
+        self.retry_btn.hide()
+        btn_layout.addWidget(self.retry_btn)
+        
         btn_layout.addStretch()
         layout.addLayout(btn_layout)
         
@@ -158,12 +172,25 @@ class QueueStatusPanel(QWidget):
             self.pending_label.setText(f"待处理: {pending}")
             self.completed_label.setText(f"已完成: {completed}")
             self.failed_label.setText(f"失败: {failed}")
+            self.coalesced_label.setText(f"已合并: {status.get('coalesced', 0)}")
+            retrying = status.get("retrying", 0)
+            if retrying:
+                self.failed_label.setText(f"失败: {failed} (等待重试: {retrying})")
+            dead_letters = status.get("dead_letters", 0)
+            self.retry_btn.setText(f"↻ 重试失败项 ({dead_letters})")
+            self.retry_btn.setVisible(dead_letters > 0)
             
             # 更新当前文件
             total = pending + completed + failed
             
             if current_file:
-                self.current_file_label.setText(f"正在处理: {current_file} ({completed + 1}/{total})")
+                running = status.get("running", 1)
+                text = f"正在处理: {current_file} ({completed + running}/{total + running})"
+                current_bytes_total = status.get("current_bytes_total", 0)
+                if current_bytes_total > 0:
+                    text += (f" {format_file_size(status.get('current_bytes_done', 0))}"
+                             f" / {format_file_size(current_bytes_total)}")
+                self.current_file_label.setText(text)
                 self.status_label.setText("处理中")
                 self.status_label.setStyleSheet(f"color: {COLORS['success']}; font-size: 12px;")
             elif pending > 0:
@@ -181,9 +208,13 @@ class QueueStatusPanel(QWidget):
             else:
                 self.pause_btn.setText("⏸ 暂停")
             
-            # 更新进度条
+            # 更新进度条 (有字节信息时按字节计算，大文件复制过程中也能推进)
             total = pending + completed
-            if total > 0:
+            bytes_total = status.get("bytes_total", 0)
+            if bytes_total > 0:
+                progress = int(min(status.get("bytes_done", 0), bytes_total) / bytes_total * 100)
+                self.progress_bar.setValue(progress)
+            elif total > 0:
                 progress = int(completed / total * 100)
                 self.progress_bar.setValue(progress)
             else:
@@ -224,6 +255,14 @@ class QueueStatusPanel(QWidget):
         except Exception as e:
             print(f"Clear queue error: {e}")
     
+    def _requeue_failed(self):
+        """重试用尽的操作重新入队"""
+        try:
+            from core.operation_queue import operation_queue
+            operation_queue.requeue_dead_letters()
+        except Exception as e:
+            print(f"Requeue failed operations error: {e}")
+            
     def update_from_signal(self, status: dict):
         """从信号更新状态"""
         # 此方法可用于直接从信号更新，但当前使用定时器轮询
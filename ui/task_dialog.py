@@ -185,6 +185,11 @@ class TaskDialog(QDialog):
         self.disable_delete_check.setStyleSheet(f"color: {COLORS['success']};")
         layout.addWidget(self.disable_delete_check)
         
+        # 增量传输选项
+        self.delta_sync_check = QCheckBox("大文件增量传输 (只传输变化的块)")
+        self.delta_sync_check.setToolTip("目标已有旧版本时按块比较，只写入变化的部分，适合虚拟机镜像、数据库、PST 等局部修改的大文件")
+        layout.addWidget(self.delta_sync_check)
+        
         # 文件数量差异阈值（双向同步）
         threshold_layout = QHBoxLayout()
         threshold_label = QLabel("双向同步文件数量差异警告阈值:")
@@ -230,6 +235,21 @@ class TaskDialog(QDialog):
         delay_layout.addStretch()
         layout.addLayout(delay_layout)
         
+        # 目录扫描线程数
+        scan_layout = QHBoxLayout()
+        scan_label = QLabel("目录扫描线程数:")
+        scan_label.setStyleSheet(f"color: {COLORS['text_muted']}; font-size: 11px;")
+        scan_layout.addWidget(scan_label)
+        
+        self.scan_workers_spin = QSpinBox()
+        self.scan_workers_spin.setRange(1, 32)
+        self.scan_workers_spin.setValue(1)
+        self.scan_workers_spin.setToolTip("并行列出子目录的线程数，NAS或机械硬盘上的大目录树可适当调高")
+        self.scan_workers_spin.setFixedWidth(80)
+        scan_layout.addWidget(self.scan_workers_spin)
+        scan_layout.addStretch()
+        layout.addLayout(scan_layout)
+        
         layout.addStretch()
         return widget
     
@@ -349,9 +369,11 @@ class TaskDialog(QDialog):
         
         self.delete_orphans_check.setChecked(task.delete_orphans)
         self.disable_delete_check.setChecked(getattr(task, 'disable_delete', False))
+        self.delta_sync_check.setChecked(getattr(task, 'delta_sync', False))
         self.threshold_spinbox.setValue(getattr(task, 'file_count_diff_threshold', 20))
         self.safety_spinbox.setValue(getattr(task, 'safety_threshold', 50))
         self.batch_delay_spin.setValue(getattr(task, 'batch_delay', 1.0))
+        self.scan_workers_spin.setValue(getattr(task, 'scan_workers', 1))
         
         # 监控模式
         monitor_mode = getattr(task, 'monitor_mode', 'realtime')
@@ -433,9 +455,11 @@ class TaskDialog(QDialog):
             auto_start=self.auto_start_check.isChecked(),
             delete_orphans=self.delete_orphans_check.isChecked(),
             disable_delete=self.disable_delete_check.isChecked(),
+            delta_sync=self.delta_sync_check.isChecked(),
             file_count_diff_threshold=self.threshold_spinbox.value(),
             monitor_mode=self.monitor_mode_combo.currentData(),
             poll_interval=self.poll_interval_spin.value(),
             safety_threshold=self.safety_spinbox.value(),
-            batch_delay=self.batch_delay_spin.value()
+            batch_delay=self.batch_delay_spin.value(),
+            scan_workers=self.scan_workers_spin.value()
         )
@@ -100,9 +100,23 @@ DEFAULT_CONFIG = {
     "backup": {
         "default_sync_mode": SyncMode.ONE_WAY.value,
         "default_conflict_strategy": ConflictStrategy.NEWEST_WINS.value,
-        "max_concurrent_tasks": 3,    # 最大并发任务数
-        "compare_method": "mtime",    # 比较方式: mtime, hash
-        "buffer_size": 1024 * 1024    # 文件复制缓冲区大小 (1MB)
+        "max_concurrent_tasks": 3,    # 操作队列并行执行的操作数 (同一路径及其上下级路径的操作仍按顺序执行)
+        "device_limits": {},          # 按路径设置所在设备的并行操作数，如 {"/media/usb": 1}；未设置时机械硬盘为 1，其他不限制
+        "queue_journal": True,        # 记录操作队列日志，程序退出或崩溃后重新启动时恢复未完成的操作
+        "retry_max_attempts": 5,      # 失败操作的最多重试次数 (0 表示不重试)，用尽后进入死信列表
+        "retry_base_delay": 2.0,      # 第一次重试前的等待秒数 (之后每次翻倍，带随机抖动)
+        "retry_max_delay": 300.0,     # 重试等待时间上限 (秒)
+        "compare_method": "mtime",    # 比较方式: mtime, hash, fingerprint (大小+头中尾采样，相同时再比较完整哈希)
+        "hash_cache_max_entries": 100000,  # 哈希缓存记录上限 (超出时淘汰最久未使用的记录)
+        "hash_algorithm": "blake2b",  # 哈希算法: md5, sha1, sha256, blake2b, blake3 (需安装 blake3)
+        "hash_workers": 0,            # 哈希计算进程数 (0 表示按 CPU 核数自动设置，1 表示不使用进程池)
+        "buffer_size": 1024 * 1024,   # 文件复制缓冲区大小 (1MB)
+        "reflink": True,              # 同一写时复制卷 (btrfs/XFS) 上克隆文件而非复制 (克隆与源共享数据块)
+        "durability": "file",         # 复制持久化: none(不同步), file(重命名前同步文件), full(同时同步目录)
+        "delta_in_place": False,      # 增量传输时原地修补目标文件 (少写一份数据，但中断后目标可能新旧混杂)
+        "resumable_threshold_mb": 256,  # 不小于该大小的文件分块复制，失败重试时从断点继续 (0 表示不启用)
+        "index_max_age_hours": 24,    # 单向同步时目标快照的可信时长，超过后重新扫描目标 (0 表示总是扫描)
+        "incremental_scan": "stat"    # 增量扫描: stat(跳过未变化目录的列出), structure(仅检测增删), full(关闭)
     },
     "log": {
         "level": LogLevel.INFO.value,
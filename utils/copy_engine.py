@@ -0,0 +1,669 @@
+"""
+文件复制引擎模块
+支持写时复制的卷上优先使用 FICLONE 克隆 (reflink)，否则按 copy_file_range → sendfile →
+大缓冲区 readinto 的顺序选择复制方式，复制后保留元数据。
+数据先写入同目录下的 .sfbs-tmp 临时文件，按持久化策略同步到磁盘后再重命名到目标路径，
+中断时目标文件保持旧内容，不会留下被截断的文件。
+超过阈值的大文件分块复制，进度记录在旁路文件中，重试时从最后确认的分块继续。
+同一源文件复制到多个目标时只读取一次，每个目标由各自的写线程并行写入 (扇出复制)。
+小文件一次读入内存后直接写出，省去克隆探测和内核复制的系统调用。
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import errno
+import queue
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# 复制方式
+COPY_METHOD_REFLINK = "reflink"
+COPY_METHOD_COPY_FILE_RANGE = "copy_file_range"
+COPY_METHOD_SENDFILE = "sendfile"
+COPY_METHOD_READINTO = "readinto"
+COPY_METHOD_FAN_OUT = "fan-out"
+COPY_METHOD_SMALL = "small"
+
+# 不超过该大小的文件按小文件复制 (整体读入内存)
+SMALL_FILE_SIZE = 64 * 1024
+
+# 临时文件后缀 (扫描和监控时排除)
+TEMP_SUFFIX = ".sfbs-tmp"
+
+# 持久化策略
+DURABILITY_NONE = "none"    # 不主动同步，由操作系统决定写回时机
+DURABILITY_FILE = "file"    # 重命名前同步文件数据
+DURABILITY_FULL = "full"    # 同时在重命名后同步所在目录 (断电后重命名本身也不丢失)
+DURABILITY_MODES = (DURABILITY_NONE, DURABILITY_FILE, DURABILITY_FULL)
+
+# 清理临时文件时跳过最近仍在修改的文件 (可能正在被其他任务写入)
+_TEMP_MIN_AGE = 60.0
+
+# 可续传复制的部分文件和进度旁路文件后缀 (也以 TEMP_SUFFIX 结尾)
+PARTIAL_SUFFIX = ".partial" + TEMP_SUFFIX
+PROGRESS_SUFFIX = ".progress" + TEMP_SUFFIX
+
+# 进度回调: (已复制字节数, 总字节数)
+ProgressCallback = Callable[[int, int], None]
+
+# 可续传复制的分块大小
+RESUME_CHUNK_SIZE = 64 * 1024 * 1024
+
+# 超过该时间未继续的部分文件在清理时删除
+_PARTIAL_MAX_AGE = 7 * 24 * 3600.0
+
+# 单次内核复制调用的最大字节数
+_KERNEL_CHUNK = 1 << 30
+
+# 表示当前文件 (或文件系统组合) 不支持该复制方式、可回退到下一种方式的错误码
+_FALLBACK_ERRNOS = {
+    errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EBADF,
+    errno.EOPNOTSUPP, errno.ETXTBSY, errno.EPERM,
+}
+if hasattr(errno, "ENOTSUP"):
+    _FALLBACK_ERRNOS.add(errno.ENOTSUP)
+
+_IS_LINUX = sys.platform.startswith("linux")
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# 表示源和目标所在文件系统 (组合) 不支持克隆的错误码
+_NO_REFLINK_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.ENOSYS}
+if hasattr(errno, "ENOTSUP"):
+    _NO_REFLINK_ERRNOS.add(errno.ENOTSUP)
+
+# 扇出复制时每个目标排队等待写入的缓冲块数 (限制内存占用，读取速度受最慢的目标约束)
+_FAN_OUT_QUEUE_DEPTH = 4
+
+# 系统调用本身不可用时 (ENOSYS) 不再尝试
+_disabled = set()
+
+# (源设备, 目标设备) -> 是否支持克隆，每对设备只探测一次
+_reflink_support: Dict[Tuple[int, int], bool] = {}
+
+
+@dataclass
+class CopyStats:
+    """单个文件的复制统计"""
+    method: str
+    bytes_copied: int
+    elapsed: float
+    
+    @property
+    def rate(self) -> float:
+        """复制速度 (字节/秒)"""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes_copied / self.elapsed
+
+
+def available_methods() -> List[str]:
+    """当前平台可用的复制方式 (按优先顺序)"""
+    methods = []
+    if _IS_LINUX and hasattr(os, "copy_file_range") and COPY_METHOD_COPY_FILE_RANGE not in _disabled:
+        methods.append(COPY_METHOD_COPY_FILE_RANGE)
+    if _IS_LINUX and hasattr(os, "sendfile") and COPY_METHOD_SENDFILE not in _disabled:
+        methods.append(COPY_METHOD_SENDFILE)
+    methods.append(COPY_METHOD_READINTO)
+    return methods
+
+
+def reflink_supported(src_dev: int, dst_dev: int) -> Optional[bool]:
+    """源和目标设备之间是否支持克隆 (尚未探测时返回 None)"""
+    return _reflink_support.get((src_dev, dst_dev))
+
+
+def _try_reflink(src_fd: int, dst_fd: int, src_dev: int, dst_dev: int) -> bool:
+    """
+    尝试用 FICLONE 克隆整个文件 (共享数据块，修改前不占用额外空间)
+    
+    文件系统不支持时记录到设备缓存，之后同一对设备直接复制；
+    其他错误只对当前文件回退到复制。
+    """
+    if fcntl is None or not _IS_LINUX:
+        return False
+    key = (src_dev, dst_dev)
+    if _reflink_support.get(key) is False:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError as e:
+        if e.errno in _NO_REFLINK_ERRNOS or (e.errno == errno.EINVAL and key not in _reflink_support):
+            _reflink_support[key] = False
+        return False
+    _reflink_support[key] = True
+    return True
+
+
+def _kernel_copy(method: str, src_fd: int, dst_fd: int, offset: int, size: int) -> int:
+    """使用内核复制从 offset 开始的数据，返回复制结束时的偏移"""
+    if method == COPY_METHOD_SENDFILE:
+        # sendfile 写入目标文件的当前位置
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+    while offset < size:
+        count = min(size - offset, _KERNEL_CHUNK)
+        if method == COPY_METHOD_COPY_FILE_RANGE:
+            sent = os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+        else:
+            sent = os.sendfile(dst_fd, src_fd, offset, count)
+        if sent == 0:
+            break
+        offset += sent
+    return offset
+
+
+def _readinto_copy(src_fd: int, dst_fd: int, offset: int, buffer_size: int,
+                   end: Optional[int] = None) -> int:
+    """复用同一缓冲区读写，直到源文件结束 (或到达 end)，返回复制结束时的偏移"""
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    with open(src_fd, 'rb', buffering=0, closefd=False) as fsrc:
+        while end is None or offset < end:
+            want = buffer_size if end is None else min(buffer_size, end - offset)
+            n = fsrc.readinto(view[:want])
+            if not n:
+                break
+            written = 0
+            while written < n:
+                written += os.write(dst_fd, view[written:n])
+            offset += n
+    return offset
+
+
+def copy_data(src_fd: int, dst_fd: int, size: int, buffer_size: int = 1024 * 1024,
+              offset: int = 0, end: Optional[int] = None) -> str:
+    """
+    在两个已打开的文件之间复制数据
+    
+    依次尝试可用的复制方式，某种方式失败时从已复制的位置用下一种方式继续。
+    
+    Args:
+        src_fd: 源文件描述符
+        dst_fd: 目标文件描述符
+        size: 源文件大小
+        buffer_size: 用户态复制的缓冲区大小
+        offset: 开始复制的偏移
+        end: 只复制到该偏移 (None 表示复制到源文件结束)
+        
+    Returns:
+        最终完成复制的方式
+    """
+    limit = size if end is None else end
+    for method in available_methods():
+        if method == COPY_METHOD_READINTO:
+            _readinto_copy(src_fd, dst_fd, offset, buffer_size, end)
+            return method
+        try:
+            offset = _kernel_copy(method, src_fd, dst_fd, offset, limit)
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+            if e.errno == errno.ENOSYS:
+                _disabled.add(method)
+            continue
+        if offset >= limit and end is not None:
+            return method
+        # 复制过程中文件变长时，剩余部分交给后续方式
+        if offset >= size:
+            os.lseek(src_fd, offset, os.SEEK_SET)
+            if not os.read(src_fd, 1):
+                return method
+    return COPY_METHOD_READINTO
+
+
+def temp_path_for(dst: str) -> str:
+    """目标文件对应的临时文件路径 (同目录，保证重命名不跨文件系统)"""
+    directory, name = os.path.split(dst)
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}{TEMP_SUFFIX}")
+
+
+def _fsync_dir(directory: str):
+    """同步目录项 (Windows 不支持打开目录，忽略)"""
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def copy_file(src: str, dst: str, buffer_size: int = 1024 * 1024, reflink: bool = True,
+              durability: str = DURABILITY_FILE, resumable_threshold: int = 0,
+              progress: Optional[ProgressCallback] = None) -> CopyStats:
+    """
+    复制文件内容及元数据 (等同于 shutil.copy2，但先写临时文件再重命名)
+    
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径 (已存在时覆盖)
+        buffer_size: 用户态复制的缓冲区大小
+        reflink: 是否优先克隆 (仅在支持写时复制的同一卷上生效)
+        durability: 持久化策略 (见 DURABILITY_*)
+        resumable_threshold: 不小于该大小的文件分块复制并可续传 (0 表示不启用)
+        progress: 进度回调 (已复制字节数, 总字节数)
+        
+    Returns:
+        复制统计
+        
+    Raises:
+        OSError: 复制失败 (目标文件保持原状)
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+        
+    start = time.perf_counter()
+    if resumable_threshold > 0 and os.stat(src).st_size >= resumable_threshold:
+        with open(src, 'rb', buffering=0) as fsrc:
+            method, copied = _copy_resumable(src, dst, fsrc.fileno(), os.fstat(fsrc.fileno()),
+                                             buffer_size, reflink, durability, progress)
+        return CopyStats(method=method, bytes_copied=copied, elapsed=time.perf_counter() - start)
+        
+    tmp = temp_path_for(dst)
+    try:
+        with open(src, 'rb', buffering=0) as fsrc:
+            src_stat = os.fstat(fsrc.fileno())
+            size = src_stat.st_size
+            with open(tmp, 'xb', buffering=0) as fdst:
+                if reflink and _try_reflink(fsrc.fileno(), fdst.fileno(),
+                                            src_stat.st_dev, os.fstat(fdst.fileno()).st_dev):
+                    method = COPY_METHOD_REFLINK
+                else:
+                    method = copy_data(fsrc.fileno(), fdst.fileno(), size, buffer_size)
+                copied = os.fstat(fdst.fileno()).st_size
+                if durability != DURABILITY_NONE:
+                    os.fsync(fdst.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if durability == DURABILITY_FULL:
+        _fsync_dir(os.path.dirname(dst))
+    if progress is not None:
+        progress(copied, copied)
+    return CopyStats(method=method, bytes_copied=copied, elapsed=time.perf_counter() - start)
+
+
+def _fan_out_data(src_fd: int, dst_fds: Dict[str, int], size: int, buffer_size: int,
+                  progress: Optional[ProgressCallback] = None) -> Dict[str, Exception]:
+    """
+    读取源文件一次，把每个数据块交给所有目标的写线程
+    
+    某个目标写入失败后其写线程继续取出数据但不再写入，不影响其他目标。
+    
+    Returns:
+        {写入失败的目标: 异常}
+    """
+    errors: Dict[str, Exception] = {}
+    queues = {dst: queue.Queue(maxsize=_FAN_OUT_QUEUE_DEPTH) for dst in dst_fds}
+    
+    def write(dst: str):
+        fd = dst_fds[dst]
+        chunks = queues[dst]
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if dst in errors:
+                continue
+            try:
+                view = memoryview(chunk)
+                while view:
+                    view = view[os.write(fd, view):]
+            except Exception as e:
+                errors[dst] = e
+                
+    threads = [threading.Thread(target=write, args=(dst,), daemon=True) for dst in dst_fds]
+    for thread in threads:
+        thread.start()
+    try:
+        offset = 0
+        while len(errors) < len(queues):
+            chunk = _pread(src_fd, buffer_size, offset)
+            if not chunk:
+                break
+            for dst, chunks in queues.items():
+                if dst not in errors:
+                    chunks.put(chunk)
+            offset += len(chunk)
+            if progress is not None:
+                progress(offset, max(size, offset))
+    finally:
+        for chunks in queues.values():
+            chunks.put(None)
+        for thread in threads:
+            thread.join()
+    return errors
+
+
+def fan_out_copy(src: str, dsts: List[str], buffer_size: int = 1024 * 1024, reflink: bool = True,
+                 durability: str = DURABILITY_FILE,
+                 progress: Optional[ProgressCallback] = None) -> Dict[str, object]:
+    """
+    把同一个源文件复制到多个目标，源文件只读取一次
+    
+    能克隆的目标直接克隆；只剩一个目标时使用内核复制；其余目标共用一次读取，
+    由各自的写线程并行写入。每个目标同样先写临时文件再重命名，互不影响。
+    
+    Args:
+        src: 源文件路径
+        dsts: 目标文件路径列表 (已存在时覆盖)
+        buffer_size: 读取缓冲区大小
+        reflink: 是否优先克隆
+        durability: 持久化策略 (见 DURABILITY_*)
+        progress: 进度回调 (已读取字节数, 总字节数)
+        
+    Returns:
+        {目标路径: CopyStats (成功) 或异常 (该目标失败)}
+        
+    Raises:
+        OSError: 读取源文件失败 (所有目标保持原状)
+    """
+    start = time.perf_counter()
+    results: Dict[str, object] = {}
+    methods: Dict[str, str] = {}
+    # 目标路径 -> (临时文件路径, 文件描述符)，完成或失败后移除
+    open_files: Dict[str, Tuple[str, int]] = {}
+    
+    def discard(dst: str):
+        tmp, fd = open_files.pop(dst)
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+            
+    try:
+        with open(src, 'rb', buffering=0) as fsrc:
+            src_fd = fsrc.fileno()
+            src_stat = os.fstat(src_fd)
+            size = src_stat.st_size
+            for dst in dict.fromkeys(dsts):
+                try:
+                    if os.path.exists(dst) and os.path.samefile(src, dst):
+                        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+                    tmp = temp_path_for(dst)
+                    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+                except OSError as e:
+                    results[dst] = e
+                    continue
+                open_files[dst] = (tmp, fd)
+                if reflink and _try_reflink(src_fd, fd, src_stat.st_dev, os.fstat(fd).st_dev):
+                    methods[dst] = COPY_METHOD_REFLINK
+                    
+            streams = [dst for dst in open_files if dst not in methods]
+            if len(streams) == 1:
+                try:
+                    methods[streams[0]] = copy_data(src_fd, open_files[streams[0]][1], size, buffer_size)
+                except OSError as e:
+                    results[streams[0]] = e
+            elif streams:
+                errors = _fan_out_data(src_fd, {dst: open_files[dst][1] for dst in streams},
+                                       size, buffer_size, progress)
+                for dst in streams:
+                    if dst in errors:
+                        results[dst] = errors[dst]
+                    else:
+                        methods[dst] = COPY_METHOD_FAN_OUT
+                        
+        for dst in list(open_files):
+            if dst in results:
+                discard(dst)
+                continue
+            tmp, fd = open_files[dst]
+            try:
+                copied = os.fstat(fd).st_size
+                if durability != DURABILITY_NONE:
+                    os.fsync(fd)
+                os.close(fd)
+                open_files[dst] = (tmp, -1)
+                shutil.copystat(src, tmp)
+                os.replace(tmp, dst)
+                del open_files[dst]
+            except OSError as e:
+                results[dst] = e
+                discard(dst)
+                continue
+            if durability == DURABILITY_FULL:
+                _fsync_dir(os.path.dirname(dst))
+            results[dst] = CopyStats(method=methods[dst], bytes_copied=copied,
+                                     elapsed=time.perf_counter() - start)
+    finally:
+        for dst in list(open_files):
+            discard(dst)
+    if progress is not None:
+        progress(size, size)
+    return results
+
+
+def copy_small_file(src: str, dsts: List[str], durability: str = DURABILITY_FILE) -> Dict[str, object]:
+    """
+    复制小文件到一个或多个目标: 源文件一次读入内存，每个目标一次写入
+    
+    不尝试克隆和内核复制 (对几 KB 的文件只会增加系统调用)，
+    仍然先写临时文件再重命名并保留元数据。调用方负责创建目标目录。
+    
+    Args:
+        src: 源文件路径
+        dsts: 目标文件路径列表 (已存在时覆盖)
+        durability: 持久化策略 (见 DURABILITY_*)
+        
+    Returns:
+        {目标路径: CopyStats (成功) 或异常 (该目标失败)}
+        
+    Raises:
+        OSError: 读取源文件失败
+    """
+    start = time.perf_counter()
+    with open(src, 'rb', buffering=0) as fsrc:
+        data = fsrc.readall()
+    results: Dict[str, object] = {}
+    for dst in dict.fromkeys(dsts):
+        tmp = temp_path_for(dst)
+        try:
+            if os.path.exists(dst) and os.path.samefile(src, dst):
+                raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                if durability != DURABILITY_NONE:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            shutil.copystat(src, tmp)
+            os.replace(tmp, dst)
+        except BaseException as e:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            if not isinstance(e, OSError):
+                raise
+            results[dst] = e
+            continue
+        if durability == DURABILITY_FULL:
+            _fsync_dir(os.path.dirname(dst))
+        results[dst] = CopyStats(method=COPY_METHOD_SMALL, bytes_copied=len(data),
+                                 elapsed=time.perf_counter() - start)
+    return results
+
+
+def resume_paths_for(dst: str) -> Tuple[str, str]:
+    """可续传复制的 (部分文件路径, 进度旁路文件路径)，同一目标固定不变以便重试时找到"""
+    directory, name = os.path.split(dst)
+    return (os.path.join(directory, f".{name}{PARTIAL_SUFFIX}"),
+            os.path.join(directory, f".{name}{PROGRESS_SUFFIX}"))
+
+
+def _source_identity(src: str, src_stat: os.stat_result) -> dict:
+    return {
+        "source": os.path.abspath(src),
+        "size": src_stat.st_size,
+        "mtime_ns": src_stat.st_mtime_ns,
+        "inode": src_stat.st_ino,
+        "chunk_size": RESUME_CHUNK_SIZE,
+    }
+
+
+def _pread(fd: int, n: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, n, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, n)
+
+
+def _same_bytes(fd1: int, fd2: int, offset: int, length: int, buffer_size: int = 1024 * 1024) -> bool:
+    """比较两个文件在同一区间的内容"""
+    end = offset + length
+    while offset < end:
+        n = min(buffer_size, end - offset)
+        data = _pread(fd1, n, offset)
+        if not data or data != _pread(fd2, n, offset):
+            return False
+        offset += len(data)
+    return True
+
+
+def _resume_offset(progress_path: str, identity: dict, src_fd: int, part_fd: int) -> int:
+    """
+    读取进度旁路文件，返回可以继续复制的偏移
+    
+    源文件的路径、大小、修改时间和 inode 都必须与记录一致，
+    且最后确认的分块内容与源文件相同，否则从头复制。
+    """
+    try:
+        with open(progress_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if any(state.get(key) != value for key, value in identity.items()):
+        return 0
+    verified = state.get("verified", 0)
+    if not isinstance(verified, int) or verified <= 0 or verified > os.fstat(part_fd).st_size:
+        return 0
+    last_chunk = (verified - 1) % RESUME_CHUNK_SIZE + 1
+    if not _same_bytes(src_fd, part_fd, verified - last_chunk, last_chunk):
+        return 0
+    return verified
+
+
+def _write_progress(progress_path: str, identity: dict, verified: int):
+    state = dict(identity, verified=verified)
+    with open(progress_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+
+def _copy_resumable(src: str, dst: str, src_fd: int, src_stat: os.stat_result, buffer_size: int,
+                    reflink: bool, durability: str,
+                    progress: Optional[ProgressCallback]) -> Tuple[str, int]:
+    """
+    分块复制大文件: 每个分块同步到磁盘后记录已确认的偏移，
+    失败时保留部分文件和进度旁路文件，下次复制同一目标时从最后确认的分块继续
+    
+    Returns:
+        (复制方式, 文件大小)
+    """
+    part_path, progress_path = resume_paths_for(dst)
+    identity = _source_identity(src, src_stat)
+    size = src_stat.st_size
+    part_fd = os.open(part_path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        offset = _resume_offset(progress_path, identity, src_fd, part_fd)
+        os.ftruncate(part_fd, offset)
+        if progress is not None:
+            progress(offset, size)
+            
+        method = COPY_METHOD_READINTO
+        if offset == 0 and reflink and _try_reflink(src_fd, part_fd, src_stat.st_dev,
+                                                    os.fstat(part_fd).st_dev):
+            method = COPY_METHOD_REFLINK
+            offset = size
+        while offset < size:
+            end = min(offset + RESUME_CHUNK_SIZE, size)
+            method = copy_data(src_fd, part_fd, size, buffer_size, offset, end)
+            # 记录进度前确保分块已写入磁盘，记录的偏移才可信
+            os.fsync(part_fd)
+            offset = end
+            _write_progress(progress_path, identity, offset)
+            if progress is not None:
+                progress(offset, size)
+                
+        current = os.fstat(src_fd)
+        if current.st_size != size or current.st_mtime_ns != src_stat.st_mtime_ns:
+            raise OSError(errno.EAGAIN, f"源文件在复制过程中被修改: {src}")
+        if durability != DURABILITY_NONE:
+            os.fsync(part_fd)
+    finally:
+        os.close(part_fd)
+        
+    shutil.copystat(src, part_path)
+    os.replace(part_path, dst)
+    try:
+        os.remove(progress_path)
+    except OSError:
+        pass
+    if durability == DURABILITY_FULL:
+        _fsync_dir(os.path.dirname(dst))
+    return method, size
+
+
+def sweep_temp_files(root: str, min_age: float = _TEMP_MIN_AGE) -> int:
+    """
+    删除目录树中残留的临时文件 (程序中断时未完成的复制)
+    
+    Args:
+        root: 根目录
+        min_age: 只删除超过该时间 (秒) 未修改的临时文件
+        
+    Returns:
+        删除的文件数
+    """
+    removed = 0
+    now = time.time()
+    cutoff = now - min_age
+    partial_cutoff = now - _PARTIAL_MAX_AGE
+    stack = [root]
+    while stack:
+        try:
+            iterator = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(TEMP_SUFFIX):
+                        # 可续传复制的部分文件保留较长时间，以便重启后继续
+                        resumable = entry.name.endswith(PARTIAL_SUFFIX) or entry.name.endswith(PROGRESS_SUFFIX)
+                        if entry.stat(follow_symlinks=False).st_mtime < (partial_cutoff if resumable else cutoff):
+                            os.remove(entry.path)
+                            removed += 1
+                except OSError:
+                    continue
+    return removed
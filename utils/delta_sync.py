@@ -0,0 +1,286 @@
+"""
+增量传输模块 (rsync 算法)
+对已有目标文件按块计算弱校验 (Adler-32) 和强校验 (BLAKE2b)，用滚动校验在源文件中查找
+相同的块，只写入变化的部分。数据块位置未移动时直接原地修补目标文件；
+有块移动时生成临时文件再重命名 (目标卷支持克隆时先克隆目标，只写入不同的块)
+"""
+import os
+import mmap
+import time
+import shutil
+import hashlib
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from .copy_engine import (
+    CopyStats, DURABILITY_NONE, DURABILITY_FULL, DURABILITY_FILE,
+    temp_path_for, _try_reflink, _fsync_dir, _pread
+)
+
+
+# 复制方式
+COPY_METHOD_DELTA_INPLACE = "delta-inplace"
+COPY_METHOD_DELTA = "delta"
+
+# 小于该大小的文件直接完整复制
+DELTA_MIN_SIZE = 4 * 1024 * 1024
+
+# 块大小范围 (按文件大小取平方根附近的 2 的幂)
+_MIN_BLOCK_SIZE = 64 * 1024
+_MAX_BLOCK_SIZE = 1024 * 1024
+
+# Adler-32 模数
+_ADLER_MOD = 65521
+
+# 连续多少个块逐字节滚动都未找到匹配后，只在块边界查找 (避免完全不同的文件逐字节计算)
+_MAX_ROLL_MISSES = 16
+
+# 原地修补时比较新旧数据的粒度 (只写入真正不同的部分)
+_COMPARE_CHUNK = 64 * 1024
+
+# 增量操作: ("copy", 目标文件偏移, 长度) 或 ("data", 源文件偏移, 长度)，按输出顺序排列
+DeltaOp = Tuple[str, int, int]
+
+
+def choose_block_size(size: int) -> int:
+    """按文件大小选择块大小"""
+    block = _MIN_BLOCK_SIZE
+    while block < _MAX_BLOCK_SIZE and block * block < size * 16:
+        block *= 2
+    return block
+
+
+def _strong(data) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def block_signatures(fd: int, size: int, block_size: int) -> Dict[int, List[Tuple[int, bytes]]]:
+    """
+    计算文件中每个完整块的签名
+    
+    Returns:
+        {弱校验: [(块序号, 强校验)]}
+    """
+    signatures: Dict[int, List[Tuple[int, bytes]]] = {}
+    for index in range(size // block_size):
+        data = _pread(fd, block_size, index * block_size)
+        if len(data) < block_size:
+            break
+        signatures.setdefault(zlib.adler32(data), []).append((index, _strong(data)))
+    return signatures
+
+
+def compute_delta(source, source_size: int, signatures: Dict[int, List[Tuple[int, bytes]]],
+                  block_size: int) -> List[DeltaOp]:
+    """
+    用滚动校验在源数据中查找目标文件已有的块
+    
+    Args:
+        source: 源文件内容 (mmap 或 bytes)
+        source_size: 源文件大小
+        signatures: 目标文件的块签名
+        block_size: 块大小
+        
+    Returns:
+        按输出顺序排列的增量操作 (相邻操作已合并)
+    """
+    ops: List[DeltaOp] = []
+    
+    def emit(kind: str, offset: int, length: int):
+        if length <= 0:
+            return
+        if ops:
+            last_kind, last_offset, last_length = ops[-1]
+            if last_kind == kind and last_offset + last_length == offset:
+                ops[-1] = (kind, last_offset, last_length + length)
+                return
+        ops.append((kind, offset, length))
+        
+    def find(position: int, weak: int) -> Optional[int]:
+        candidates = signatures.get(weak)
+        if not candidates:
+            return None
+        strong = _strong(source[position:position + block_size])
+        for index, candidate in candidates:
+            if candidate == strong:
+                return index
+        return None
+        
+    position = 0
+    literal_start = 0
+    misses = 0
+    last_start = source_size - block_size
+    while position <= last_start:
+        weak = zlib.adler32(source[position:position + block_size])
+        index = find(position, weak)
+        if index is not None:
+            emit("data", literal_start, position - literal_start)
+            emit("copy", index * block_size, block_size)
+            position += block_size
+            literal_start = position
+            misses = 0
+            continue
+            
+        if misses >= _MAX_ROLL_MISSES:
+            position += block_size
+            continue
+            
+        # 逐字节滚动查找 (最多一个块的距离)，用于定位插入或删除之后重新对齐的位置
+        a = weak & 0xFFFF
+        b = weak >> 16
+        end = min(position + block_size, last_start)
+        found = False
+        while position < end:
+            out_byte = source[position]
+            in_byte = source[position + block_size]
+            a = (a - out_byte + in_byte) % _ADLER_MOD
+            b = (b - block_size * out_byte + a - 1) % _ADLER_MOD
+            position += 1
+            if ((b << 16) | a) in signatures and find(position, (b << 16) | a) is not None:
+                found = True
+                break
+        if not found:
+            misses += 1
+            if position >= last_start:
+                # 所有完整窗口都已检查
+                break
+                
+    emit("data", literal_start, source_size - literal_start)
+    return ops
+
+
+def _write_all(fd: int, data, offset: int):
+    view = memoryview(data)
+    while view:
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+
+def _patch_literal(source, dst_fd: int, offset: int, length: int, dst_size: int) -> int:
+    """原地写入源数据区间，与目标已有内容相同的部分跳过，返回实际写入字节数"""
+    written = 0
+    end = offset + length
+    while offset < end:
+        n = min(_COMPARE_CHUNK, end - offset)
+        data = source[offset:offset + n]
+        if offset + n > dst_size or _pread(dst_fd, n, offset) != data:
+            _write_all(dst_fd, data, offset)
+            written += n
+        offset += n
+    return written
+
+
+def delta_copy(src: str, dst: str, durability: str = DURABILITY_FILE, reflink: bool = True,
+               block_size: Optional[int] = None, in_place: bool = False) -> CopyStats:
+    """
+    以增量方式把源文件同步到已有的目标文件
+    
+    Args:
+        src: 源文件路径
+        dst: 已存在的目标文件路径
+        durability: 持久化策略 (见 copy_engine.DURABILITY_*)
+        reflink: 需要生成临时文件时是否先克隆目标文件
+        block_size: 块大小 (默认按文件大小选择)
+        in_place: 允许原地修补目标文件 (中断时目标会成为新旧数据的混合，
+                  仅在此为 True 或 durability 为 none 时使用)
+        
+    Returns:
+        复制统计 (bytes_copied 为实际写入的字节数)
+        
+    Raises:
+        OSError: 同步失败
+    """
+    start = time.perf_counter()
+    with open(src, 'rb', buffering=0) as fsrc, open(dst, 'rb', buffering=0) as fdst:
+        src_size = os.fstat(fsrc.fileno()).st_size
+        dst_size = os.fstat(fdst.fileno()).st_size
+        block_size = block_size or choose_block_size(max(src_size, dst_size))
+        signatures = block_signatures(fdst.fileno(), dst_size, block_size)
+        if src_size == 0:
+            source = b""
+            ops = []
+        else:
+            source = mmap.mmap(fsrc.fileno(), 0, access=mmap.ACCESS_READ)
+            ops = compute_delta(source, src_size, signatures, block_size)
+        try:
+            # 所有复用的块都在原位置且允许不安全写入时，可以直接原地修补
+            in_place = in_place or durability == DURABILITY_NONE
+            output = 0
+            for kind, offset, length in ops if in_place else ():
+                if kind == "copy" and offset != output:
+                    in_place = False
+                    break
+                output += length
+            if in_place:
+                written, method = _apply_in_place(source, dst, ops, src_size, dst_size, durability)
+            else:
+                written, method = _apply_to_temp(source, fsrc.fileno(), fdst.fileno(), dst, ops,
+                                                 src_size, durability, reflink)
+        finally:
+            if isinstance(source, mmap.mmap):
+                source.close()
+    shutil.copystat(src, dst)
+    if durability == DURABILITY_FULL:
+        _fsync_dir(os.path.dirname(dst))
+    return CopyStats(method=method, bytes_copied=written, elapsed=time.perf_counter() - start)
+
+
+def _apply_in_place(source, dst: str, ops: List[DeltaOp], src_size: int, dst_size: int,
+                    durability: str) -> Tuple[int, str]:
+    """原地修补: 只写入变化的数据并调整文件长度 (修改时间最后才更新，中断后下次会重新同步)"""
+    written = 0
+    fd = os.open(dst, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        for kind, offset, length in ops:
+            if kind == "data":
+                written += _patch_literal(source, fd, offset, length, dst_size)
+        if dst_size != src_size:
+            os.ftruncate(fd, src_size)
+        if durability != DURABILITY_NONE:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    return written, COPY_METHOD_DELTA_INPLACE
+
+
+def _apply_to_temp(source, src_fd: int, dst_fd: int, dst: str, ops: List[DeltaOp], src_size: int,
+                   durability: str, reflink: bool) -> Tuple[int, str]:
+    """生成新文件到临时路径再重命名 (克隆目标成功时，位置未变的块无需写入)"""
+    tmp = temp_path_for(dst)
+    written = 0
+    try:
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            cloned = reflink and _try_reflink(dst_fd, fd, os.fstat(dst_fd).st_dev, os.fstat(fd).st_dev)
+            output = 0
+            for kind, offset, length in ops:
+                if kind == "copy":
+                    if not (cloned and offset == output):
+                        for chunk_start in range(0, length, _COMPARE_CHUNK):
+                            n = min(_COMPARE_CHUNK, length - chunk_start)
+                            _write_all(fd, _pread(dst_fd, n, offset + chunk_start), output + chunk_start)
+                        written += length
+                elif cloned:
+                    written += _patch_literal(source, fd, offset, length, os.fstat(dst_fd).st_size)
+                else:
+                    _write_all(fd, source[offset:offset + length], output)
+                    written += length
+                output += length
+            os.ftruncate(fd, src_size)
+            if durability != DURABILITY_NONE:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return written, COPY_METHOD_DELTA
@@ -0,0 +1,101 @@
+"""
+存储设备信息模块
+获取路径所在的设备 (st_dev)，并按设备类型给出默认的并行操作数
+"""
+import os
+import sys
+from typing import Optional
+
+
+# 机械硬盘上同时执行的操作数 (并发读写会使磁头来回寻道，吞吐量反而下降)
+ROTATIONAL_CONCURRENCY = 1
+
+# 虚拟化平台的块设备 (常把 rotational 报告为 1，实际性能与物理介质无关)
+_VIRTUAL_BUSES = ("/virtual/", "/virtio", "/xen", "/vmbus", "/vbd-")
+_VIRTUAL_VENDORS = ("QEMU", "VMWARE", "VBOX", "VIRTUAL", "MSFT", "GOOGLE", "AMAZON", "XEN", "RED HAT")
+
+
+def device_of(path: str) -> Optional[int]:
+    """
+    获取路径所在的设备号
+    
+    Args:
+        path: 文件或目录路径 (不存在时使用最近的已存在上级目录)
+        
+    Returns:
+        设备号，无法确定时返回 None
+    """
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+def _disk_sysfs_path(dev: int) -> Optional[str]:
+    """
+    设备所属磁盘在 sysfs 中的实际路径 (分区返回所属磁盘)
+    
+    仅 Linux 可通过 sysfs 判断；网络文件系统、tmpfs 等没有块设备的文件系统和其他平台返回 None
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    major, minor = os.major(dev), os.minor(dev)
+    if major == 0:
+        return None
+    base = os.path.realpath(f"/sys/dev/block/{major}:{minor}")
+    # 分区没有自己的 queue 目录，使用所属磁盘的
+    for candidate in (base, os.path.dirname(base)):
+        if os.path.exists(os.path.join(candidate, "queue", "rotational")):
+            return candidate
+    return None
+
+
+def _read_sysfs(path: str) -> str:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def is_rotational(dev: int) -> Optional[bool]:
+    """
+    判断设备是否报告为机械硬盘 (虚拟磁盘也常报告为机械硬盘，见 auto_concurrency)
+    
+    无法判断时返回 None
+    """
+    disk = _disk_sysfs_path(dev)
+    if disk is None:
+        return None
+    return _read_sysfs(os.path.join(disk, "queue", "rotational")) == "1"
+
+
+def _is_virtual_disk(disk: str) -> bool:
+    """磁盘是否由虚拟化平台提供 (按总线路径和厂商/型号判断)"""
+    if any(bus in disk for bus in _VIRTUAL_BUSES):
+        return True
+    identity = " ".join(_read_sysfs(os.path.join(disk, "device", name)) for name in ("vendor", "model")).upper()
+    return any(vendor in identity for vendor in _VIRTUAL_VENDORS)
+
+
+def auto_concurrency(dev: int) -> int:
+    """
+    设备的默认并行操作数
+    
+    只有确认是机械硬盘时才限制: 报告为机械硬盘，并且通过 USB 连接或不是虚拟磁盘。
+    云主机和虚拟机的磁盘常把 rotational 报告为 1，这类设备不限制，由配置的并行数决定。
+    
+    Returns:
+        机械硬盘为 ROTATIONAL_CONCURRENCY，其他设备返回 0 (不单独限制)
+    """
+    disk = _disk_sysfs_path(dev)
+    if disk is None or _read_sysfs(os.path.join(disk, "queue", "rotational")) != "1":
+        return 0
+    if "/usb" in disk or not _is_virtual_disk(disk):
+        return ROTATIONAL_CONCURRENCY
+    return 0
@@ -2,29 +2,109 @@
 文件工具函数模块
 """
 import os
+import mmap
 import hashlib
 import shutil
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Set, Tuple
 
+from .copy_engine import (
+    CopyStats, ProgressCallback, copy_file, fan_out_copy, copy_small_file,
+    DURABILITY_FILE, SMALL_FILE_SIZE
+)
+from .delta_sync import delta_copy, DELTA_MIN_SIZE
 
-def get_file_hash(filepath: str, algorithm: str = "md5", chunk_size: int = 8192) -> str:
+try:
+    import blake3
+except ImportError:  # 可选依赖
+    blake3 = None
+
+
+# 哈希读取缓冲区大小
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# 不小于该大小的文件使用 mmap 读取
+HASH_MMAP_THRESHOLD = 8 * 1024 * 1024
+
+# 快速指纹在文件头、中、尾各采样的字节数
+FINGERPRINT_SAMPLE_SIZE = 64 * 1024
+
+
+def available_hash_algorithms() -> List[str]:
+    """可用的文件哈希算法 (blake3 需要安装 blake3 包)"""
+    algorithms = ["md5", "sha1", "sha256", "blake2b"]
+    if blake3 is not None:
+        algorithms.append("blake3")
+    return algorithms
+
+
+def new_hasher(algorithm: str):
+    """创建哈希对象 (支持 hashlib 算法及可选的 blake3)"""
+    if algorithm == "blake3":
+        if blake3 is None:
+            raise ValueError("blake3 未安装")
+        return blake3.blake3()
+    return hashlib.new(algorithm)
+
+
+def get_file_hash(filepath: str, algorithm: str = "md5", chunk_size: int = HASH_BUFFER_SIZE) -> str:
     """
     计算文件哈希值
     
+    大文件使用 mmap 整体交给哈希对象，其余文件复用同一缓冲区 readinto 读取，
+    避免每块分配新的 bytes 对象。
+    
     Args:
         filepath: 文件路径
-        algorithm: 哈希算法 (md5, sha1, sha256)
+        algorithm: 哈希算法 (md5, sha1, sha256, blake2b, blake3)
         chunk_size: 读取块大小
     
     Returns:
         文件哈希值
     """
-    hash_func = hashlib.new(algorithm)
     try:
-        with open(filepath, 'rb') as f:
-            while chunk := f.read(chunk_size):
-                hash_func.update(chunk)
+        hash_func = new_hasher(algorithm)
+        with open(filepath, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= HASH_MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hash_func.update(mapped)
+            else:
+                buffer = bytearray(min(chunk_size, max(size + 1, 64 * 1024)))
+                view = memoryview(buffer)
+                while n := f.readinto(buffer):
+                    hash_func.update(view[:n])
+        return hash_func.hexdigest()
+    except Exception:
+        return ""
+
+
+def get_file_fingerprint(filepath: str, algorithm: str = "blake2b",
+                         sample_size: int = FINGERPRINT_SAMPLE_SIZE) -> str:
+    """
+    计算文件快速指纹 (文件大小 + 头、中、尾各 sample_size 字节的哈希)
+    
+    指纹不同说明内容一定不同；指纹相同时内容仍可能不同，需要完整哈希确认。
+    
+    Args:
+        filepath: 文件路径
+        algorithm: 哈希算法
+        sample_size: 每处采样的字节数
+        
+    Returns:
+        文件指纹，读取失败时返回空字符串
+    """
+    try:
+        hash_func = new_hasher(algorithm)
+        with open(filepath, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            hash_func.update(size.to_bytes(8, "little"))
+            if size <= sample_size * 3:
+                hash_func.update(f.read(size))
+            else:
+                for offset in (0, (size - sample_size) // 2, size - sample_size):
+                    f.seek(offset)
+                    hash_func.update(f.read(sample_size))
         return hash_func.hexdigest()
     except Exception:
         return ""
@@ -73,29 +153,152 @@ def format_file_size(size_bytes: int) -> str:
     return f"{size:.2f} {units[unit_index]}"
 
 
-def safe_copy_file(src: str, dst: str, buffer_size: int = 1024 * 1024) -> Tuple[bool, str]:
+def safe_copy_file(src: str, dst: str, buffer_size: int = 1024 * 1024,
+                   reflink: bool = True, durability: str = DURABILITY_FILE) -> Tuple[bool, str]:
     """
-    安全复制文件
+    安全复制文件 (先写临时文件再重命名，中断时不会留下被截断的目标文件)
     
     Args:
         src: 源文件路径
         dst: 目标文件路径
         buffer_size: 缓冲区大小
+        reflink: 同一写时复制卷上是否优先克隆
+        durability: 持久化策略 (none, file, full)
     
     Returns:
         (成功标志, 错误信息)
     """
+    success, error, _ = copy_file_with_stats(src, dst, buffer_size, reflink, durability)
+    return success, error
+
+
+def copy_file_with_stats(src: str, dst: str, buffer_size: int = 1024 * 1024,
+                         reflink: bool = True, durability: str = DURABILITY_FILE,
+                         resumable_threshold: int = 0,
+                         progress: Optional[ProgressCallback] = None,
+                         delta: bool = False,
+                         dir_cache: Optional[Set[str]] = None,
+                         delta_in_place: bool = False) -> Tuple[bool, str, Optional[CopyStats]]:
+    """
+    安全复制文件并返回复制统计 (使用的复制方式、字节数和耗时)
+    
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+        buffer_size: 缓冲区大小
+        reflink: 同一写时复制卷上是否优先克隆
+        durability: 持久化策略 (none, file, full)
+        resumable_threshold: 不小于该大小的文件分块复制，失败后可续传 (0 表示不启用)
+        progress: 字节进度回调 (已复制, 总大小)
+        delta: 目标已存在且为大文件时，按 rsync 算法只写入变化的块
+        dir_cache: 已确认存在的目录集合 (命中时不再检查目标目录)
+        delta_in_place: 增量传输时允许原地修补目标文件 (否则写入临时文件后重命名)
+        
+    Returns:
+        (成功标志, 错误信息, 复制统计)
+    """
     try:
         # 确保目标目录存在
-        dst_dir = os.path.dirname(dst)
-        if dst_dir and not os.path.exists(dst_dir):
-            os.makedirs(dst_dir, exist_ok=True)
+        ensure_parent_dir(dst, dir_cache)
+            
+        if delta and os.path.isfile(dst):
+            if min(os.path.getsize(src), os.path.getsize(dst)) >= DELTA_MIN_SIZE:
+                stats = delta_copy(src, dst, durability, reflink, in_place=delta_in_place)
+                if progress is not None:
+                    size = os.path.getsize(dst)
+                    progress(size, size)
+                return True, "", stats
         
-        # 复制文件
-        shutil.copy2(src, dst)
-        return True, ""
+        # 复制文件 (克隆或内核零拷贝优先，保留元数据)
+        return True, "", copy_file(src, dst, buffer_size, reflink, durability,
+                                   resumable_threshold, progress)
     except Exception as e:
-        return False, str(e)
+        return False, str(e), None
+
+
+def ensure_parent_dir(path: str, dir_cache: Optional[Set[str]] = None):
+    """
+    确保文件所在目录存在
+    
+    Args:
+        path: 文件路径
+        dir_cache: 已确认存在的目录集合 (命中时不再访问文件系统)
+    """
+    directory = os.path.dirname(path)
+    if not directory or (dir_cache is not None and directory in dir_cache):
+        return
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    if dir_cache is not None:
+        dir_cache.add(directory)
+
+
+def copy_file_to_targets_with_stats(src: str, dsts: List[str], buffer_size: int = 1024 * 1024,
+                                    reflink: bool = True, durability: str = DURABILITY_FILE,
+                                    resumable_threshold: int = 0,
+                                    progress: Optional[ProgressCallback] = None,
+                                    delta: bool = False,
+                                    dir_cache: Optional[Set[str]] = None,
+                                    delta_in_place: bool = False) -> Dict[str, Tuple[bool, str, Optional[CopyStats]]]:
+    """
+    把同一源文件复制到多个目标，源文件只读取一次 (扇出复制)
+    
+    小文件一次读入后写入所有目标；需要续传的大文件和可增量传输的目标仍逐个复制。
+    其余参数含义同 copy_file_with_stats。
+    
+    Args:
+        dir_cache: 已确认存在的目录集合 (批量复制时共用，避免逐个文件检查目标目录)
+    
+    Returns:
+        {目标路径: (成功标志, 错误信息, 复制统计)}
+    """
+    results: Dict[str, Tuple[bool, str, Optional[CopyStats]]] = {}
+    try:
+        size = os.path.getsize(src)
+    except OSError as e:
+        return {dst: (False, str(e), None) for dst in dsts}
+    if size <= SMALL_FILE_SIZE and (resumable_threshold <= 0 or size < resumable_threshold):
+        try:
+            for dst in dsts:
+                ensure_parent_dir(dst, dir_cache)
+            for dst, outcome in copy_small_file(src, dsts, durability).items():
+                if isinstance(outcome, CopyStats):
+                    results[dst] = (True, "", outcome)
+                else:
+                    results[dst] = (False, str(outcome), None)
+        except Exception as e:
+            for dst in dsts:
+                results[dst] = (False, str(e), None)
+        if progress is not None:
+            progress(size, size)
+        return results
+    fan_out = []
+    for dst in dict.fromkeys(dsts):
+        if resumable_threshold > 0 and size >= resumable_threshold:
+            results[dst] = copy_file_with_stats(src, dst, buffer_size, reflink, durability,
+                                                resumable_threshold, progress, delta, dir_cache, delta_in_place)
+        elif delta and size >= DELTA_MIN_SIZE and os.path.isfile(dst):
+            results[dst] = copy_file_with_stats(src, dst, buffer_size, reflink, durability,
+                                                progress=progress, delta=True, dir_cache=dir_cache,
+                                                delta_in_place=delta_in_place)
+        else:
+            fan_out.append(dst)
+    if len(fan_out) == 1:
+        results[fan_out[0]] = copy_file_with_stats(src, fan_out[0], buffer_size, reflink, durability,
+                                                   progress=progress, dir_cache=dir_cache)
+    elif fan_out:
+        try:
+            for dst in fan_out:
+                ensure_parent_dir(dst, dir_cache)
+            for dst, outcome in fan_out_copy(src, fan_out, buffer_size, reflink, durability, progress).items():
+                if isinstance(outcome, CopyStats):
+                    results[dst] = (True, "", outcome)
+                else:
+                    results[dst] = (False, str(outcome), None)
+        except Exception as e:
+            for dst in fan_out:
+                results[dst] = (False, str(e), None)
+    return results
 
 
 def safe_delete_file(filepath: str) -> Tuple[bool, str]:
@@ -139,23 +342,46 @@ def safe_move_file(src: str, dst: str) -> Tuple[bool, str]:
         return False, str(e)
 
 
-def compare_files(file1: str, file2: str, method: str = "mtime") -> int:
+def compare_files(file1: str, file2: str, method: str = "mtime",
+                  hash_func: Callable[[str], str] = None,
+                  fingerprint_func: Callable[[str], str] = None) -> int:
     """
     比较两个文件
     
     Args:
         file1: 文件1路径
         file2: 文件2路径
-        method: 比较方法 (mtime, hash, size)
+        method: 比较方法 (mtime, hash, fingerprint, size)
+        hash_func: 哈希函数 (默认 get_file_hash，可传入带缓存的实现)
+        fingerprint_func: 指纹函数 (默认 get_file_fingerprint，可传入带缓存的实现)
     
     Returns:
         -1: file1更旧/更小
          0: 相同
          1: file1更新/更大
     """
+    if method == "fingerprint":
+        # 大小和修改时间都相同视为相同；大小相同但时间不同时先比较指纹，
+        # 指纹也相同才升级为完整哈希比较 (应对 FAT 时间精度和网络共享时钟偏差)
+        try:
+            st1 = os.stat(file1)
+            st2 = os.stat(file2)
+        except OSError:
+            # 任一文件无法访问 (目标缺失等) 时不能视为相同，按需要复制处理
+            return 1
+        if st1.st_size == st2.st_size and st1.st_mtime_ns == st2.st_mtime_ns:
+            return 0
+        method = "mtime"
+        if st1.st_size == st2.st_size:
+            fingerprint_func = fingerprint_func or get_file_fingerprint
+            fingerprint1 = fingerprint_func(file1)
+            if fingerprint1 and fingerprint1 == fingerprint_func(file2):
+                method = "hash"
+                
     if method == "hash":
-        hash1 = get_file_hash(file1)
-        hash2 = get_file_hash(file2)
+        hash_func = hash_func or get_file_hash
+        hash1 = hash_func(file1)
+        hash2 = hash_func(file2)
         if hash1 == hash2:
             return 0
         # 哈希不同时按修改时间判断
@@ -218,28 +444,10 @@ def match_file_patterns(filepath: str, include_patterns: List[str], exclude_patt
     Returns:
         True表示应该处理该文件
     """
-    import fnmatch
-    
-    include_patterns = include_patterns or []
-    exclude_patterns = exclude_patterns or []
-    
-    filename = os.path.basename(filepath)
-    
-    # 检查排除模式
-    for pattern in exclude_patterns:
-        if fnmatch.fnmatch(filename, pattern) or fnmatch.fnmatch(filepath, pattern):
-            return False
-    
-    # 如果没有包含模式,默认包含所有
-    if not include_patterns:
-        return True
-    
-    # 检查包含模式
-    for pattern in include_patterns:
-        if fnmatch.fnmatch(filename, pattern) or fnmatch.fnmatch(filepath, pattern):
-            return True
+    from .path_filter import get_path_filter
     
-    return False
+    # 相同模式组合只编译一次
+    return get_path_filter(include_patterns, exclude_patterns).match(filepath)
 
 
 def generate_versioned_filename(filepath: str, version: int = None) -> str:
@@ -284,8 +492,7 @@ def scan_directory(directory: str, recursive: bool = True,
     Returns:
         文件路径列表
     """
-    include_patterns = include_patterns or []
-    exclude_patterns = exclude_patterns or []
+    from .path_filter import get_path_filter
     
     files = []
     try:
@@ -293,36 +500,21 @@ def scan_directory(directory: str, recursive: bool = True,
         if not os.path.exists(directory):
             return files
 
+        path_filter = get_path_filter(include_patterns, exclude_patterns).with_root(directory)
         if recursive:
-            import fnmatch
             for root, dirs, filenames in os.walk(directory):
-                # 过滤目录
-                if exclude_patterns:
-                    # 原地修改 dirs 列表以修剪遍历树
-                    dirs_to_keep = []
-                    for d in dirs:
-                        # 检查目录名是否匹配排除模式
-                        # 注意：需要同时检查目录名和完整路径，就像 match_file_patterns 对文件所做的那样
-                        should_exclude = False
-                        d_path = os.path.join(root, d)
-                        for pattern in exclude_patterns:
-                            if fnmatch.fnmatch(d, pattern) or fnmatch.fnmatch(d_path, pattern):
-                                should_exclude = True
-                                break
-                        
-                        if not should_exclude:
-                            dirs_to_keep.append(d)
-                    dirs[:] = dirs_to_keep
+                # 原地修改 dirs 列表以修剪遍历树
+                dirs[:] = [d for d in dirs if path_filter.match_name(d, os.path.join(root, d), is_dir=True)]
                 
                 for filename in filenames:
                     filepath = os.path.join(root, filename)
-                    if match_file_patterns(filepath, include_patterns, exclude_patterns):
+                    if path_filter.match_name(filename, filepath):
                         files.append(filepath)
         else:
             for item in os.listdir(directory):
                 item_path = os.path.join(directory, item)
                 if os.path.isfile(item_path):
-                    if match_file_patterns(item_path, include_patterns, exclude_patterns):
+                    if path_filter.match_name(item, item_path):
                         files.append(item_path)
     except Exception as e:
         from utils.logger import logger
@@ -0,0 +1,223 @@
+"""
+路径过滤器模块
+将包含/排除通配符模式一次性编译为哈希集合和合并正则，供扫描器、文件监控和同步处理共用
+"""
+import os
+import re
+import copy
+import fnmatch
+import hashlib
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+_has_magic = re.compile(r"[*?\[]").search
+_normcase = os.path.normcase
+
+
+def _is_path_pattern(pattern: str) -> bool:
+    """模式是否包含路径分隔符 (或盘符)，需要与完整路径匹配"""
+    if os.sep in pattern or (os.altsep and os.altsep in pattern):
+        return True
+    return os.name == 'nt' and ':' in pattern
+
+
+def _compile(patterns: List[str]):
+    """将多个通配符模式合并编译为一个正则, 无模式时返回 None"""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns)).match
+
+
+class _PatternSet:
+    """一组已编译的通配符模式"""
+    
+    __slots__ = ("names", "exts", "name_match", "path_literals", "path_match", "full_match")
+    
+    def __init__(self, patterns: List[str]):
+        names = set()
+        exts = set()
+        name_wild = []
+        path_literals = set()
+        path_wild = []
+        
+        for raw in patterns:
+            if not raw:
+                continue
+            if _is_path_pattern(raw):
+                # 路径模式: 预先归一化，避免每次匹配都执行 normpath
+                pattern = _normcase(os.path.normpath(raw))
+                if _has_magic(pattern):
+                    path_wild.append(pattern)
+                else:
+                    path_literals.add(pattern)
+                continue
+                
+            pattern = _normcase(raw)
+            suffix = pattern[2:]
+            if not _has_magic(pattern):
+                # 精确名称 (例如 "node_modules")
+                names.add(pattern)
+            elif pattern.startswith("*.") and suffix and "." not in suffix and not _has_magic(suffix):
+                # 纯扩展名 (例如 "*.tmp")
+                exts.add(suffix)
+            else:
+                name_wild.append(pattern)
+                
+        self.names = names
+        self.exts = exts
+        self.name_match = _compile(name_wild)
+        self.path_literals = path_literals
+        self.path_match = _compile(path_wild)
+        # 兼容旧逻辑: 包含模式同时尝试匹配完整路径
+        self.full_match = _compile([_normcase(p) for p in patterns if p])
+        
+    def match_name(self, name: str) -> bool:
+        """名称是否匹配任一名称模式"""
+        name = _normcase(name)
+        if name in self.names:
+            return True
+        if self.exts:
+            ext = name.rpartition(".")
+            if ext[1] and ext[2] in self.exts:
+                return True
+        return bool(self.name_match and self.name_match(name))
+        
+    def match_path(self, path: str, prefix: bool = False) -> bool:
+        """
+        完整路径是否匹配任一路径模式
+        
+        Args:
+            path: 归一化的完整路径
+            prefix: 是否同时检查路径是否位于某个字面路径模式之下
+        """
+        if not self.path_literals and not self.path_match:
+            return False
+        path = _normcase(path)
+        if path in self.path_literals:
+            return True
+        if prefix:
+            for literal in self.path_literals:
+                if path.startswith(literal + os.sep):
+                    return True
+        return bool(self.path_match and self.path_match(path))
+        
+    @property
+    def has_path_patterns(self) -> bool:
+        return bool(self.path_literals or self.path_match)
+
+
+class PathFilter:
+    """
+    路径过滤器
+    每个任务构建一次，所有过滤检查共用同一份编译结果
+    """
+    
+    def __init__(self, include_patterns: List[str] = None, exclude_patterns: List[str] = None,
+                 root_path: str = None):
+        """
+        初始化路径过滤器
+        
+        Args:
+            include_patterns: 包含模式列表 (为空表示包含所有文件)
+            exclude_patterns: 排除模式列表
+            root_path: 根目录 (用于把相对路径还原为完整路径，并逐级检查上级目录)
+        """
+        self.include_patterns = list(include_patterns or [])
+        self.exclude_patterns = list(exclude_patterns or [])
+        self._include = _PatternSet(self.include_patterns) if self.include_patterns else None
+        self._exclude = _PatternSet(self.exclude_patterns)
+        self.root_path: Optional[str] = None
+        self._root_prefix = ""
+        self._set_root(root_path)
+        
+    def _set_root(self, root_path: Optional[str]):
+        if root_path:
+            self.root_path = os.path.abspath(root_path)
+            self._root_prefix = self.root_path if self.root_path.endswith(os.sep) else self.root_path + os.sep
+        else:
+            self.root_path = None
+            self._root_prefix = ""
+            
+    @property
+    def signature(self) -> str:
+        """模式列表的摘要 (过滤规则变化时，按旧规则得到的扫描结果不能再沿用)"""
+        raw = "\0".join(self.include_patterns) + "\1" + "\0".join(self.exclude_patterns)
+        return hashlib.md5(raw.encode("utf-8")).hexdigest()
+        
+    def with_root(self, root_path: str) -> 'PathFilter':
+        """返回绑定到另一根目录的过滤器 (共享已编译的模式)"""
+        clone = copy.copy(self)
+        clone._set_root(root_path)
+        return clone
+        
+    def match_name(self, name: str, path: str, is_dir: bool = False) -> bool:
+        """
+        检查单个条目 (上级目录已确认未被排除，供目录遍历使用)
+        
+        Args:
+            name: 文件/目录名
+            path: 完整路径
+            is_dir: 是否为目录
+            
+        Returns:
+            True表示应该处理该条目
+        """
+        exclude = self._exclude
+        if exclude.match_name(name) or exclude.match_path(path):
+            return False
+            
+        # 包含模式只作用于文件，目录仅做排除检查
+        if is_dir or self._include is None:
+            return True
+        include = self._include
+        if include.match_name(name):
+            return True
+        return bool(include.full_match(_normcase(path)))
+        
+    def match(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        检查路径是否应该处理
+        
+        Args:
+            rel_path: 相对根目录的路径 (也接受完整路径)
+            is_dir: 是否为目录
+            
+        Returns:
+            True表示应该处理该路径
+        """
+        rel = None
+        if os.path.isabs(rel_path):
+            full_path = os.path.normpath(rel_path)
+            if self._root_prefix and full_path.startswith(self._root_prefix):
+                rel = full_path[len(self._root_prefix):]
+        elif self.root_path:
+            rel = os.path.normpath(rel_path)
+            full_path = self._root_prefix + rel
+        else:
+            full_path = os.path.normpath(rel_path)
+            
+        if rel is None:
+            # 无法确定根目录: 只检查名称和完整路径
+            exclude = self._exclude
+            if exclude.has_path_patterns and exclude.match_path(full_path, prefix=True):
+                return False
+            return self.match_name(os.path.basename(full_path), full_path, is_dir)
+            
+        # 与扫描器的目录修剪保持一致: 任一上级目录被排除，则路径被排除
+        parts = rel.split(os.sep)
+        current = self.root_path
+        for part in parts[:-1]:
+            current = os.path.join(current, part)
+            if not self.match_name(part, current, is_dir=True):
+                return False
+        return self.match_name(parts[-1], full_path, is_dir)
+
+
+@lru_cache(maxsize=64)
+def _cached_filter(include_patterns: Tuple[str, ...], exclude_patterns: Tuple[str, ...]) -> PathFilter:
+    return PathFilter(include_patterns, exclude_patterns)
+
+
+def get_path_filter(include_patterns: List[str] = None, exclude_patterns: List[str] = None) -> PathFilter:
+    """获取 (缓存的) 无根目录过滤器，相同模式只编译一次"""
+    return _cached_filter(tuple(include_patterns or ()), tuple(exclude_patterns or ()))